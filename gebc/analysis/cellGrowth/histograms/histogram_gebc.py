@@ -1,14 +1,11 @@
-from helper_json import loadJson
+from helper_npz import loadGebc
 from matplotlib import colors
 import matplotlib.pyplot as plt
-import numpy as np
 
 resultsPath = "../../../results/cellGrowth/"
 fileName = "voronoiVertices_withinRadius30_gebc"
-vertices_gebc = loadJson(resultsPath + fileName + ".json")
-
-gebc = np.array(list(vertices_gebc.values()))
-gebc /= max(gebc)
+_, gebc = loadGebc(resultsPath + fileName)
+gebc = gebc / max(gebc)
 
 fig, ax = plt.subplots()
 nBins = 80
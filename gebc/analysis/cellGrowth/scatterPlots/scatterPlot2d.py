@@ -1,4 +1,5 @@
 from helper_json import loadJson
+from helper_npz import loadGebc
 import matplotlib.pyplot as plt
 
 resultsPath = "../../../results/cellGrowth/simulation3/"
@@ -7,13 +8,12 @@ plotPath = "simulation3/"
 
 radius = "37"
 fileName = "voronoiVertices_withinRadius" + radius + "_unnormalized_gebc"
-vertices_gebc = loadJson(resultsPath + fileName + ".json")
+ids, gebc = loadGebc(resultsPath + fileName)
 
 fileName = "vertexIdToCoords_withinRadius" + radius
 vertices_coords = loadJson(dataPath + fileName + ".json")
 
-gebc = list(vertices_gebc.values())
-coords = list(vertices_coords.values())
+coords = [vertices_coords[str(vertexId)] for vertexId in ids.tolist()]
 
 x = [float(coord[0]) for coord in coords]
 y = [float(coord[1]) for coord in coords]
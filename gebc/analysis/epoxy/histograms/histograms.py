@@ -1,5 +1,5 @@
 from os import chdir, path
-from helper_json import loadJson
+from helper_npz import loadGebc
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -8,7 +8,7 @@ import matplotlib.pyplot as plt
 chdir(path.dirname(path.realpath(__file__)))
 
 gebcs_fileNames = ["largestGroup_monomers_large" + str(i) for i in range(1, 6)]
-gebcs = [loadJson("../../../results/epoxy/" + fileName + "_gebc.json")
+gebcs = [loadGebc("../../../results/epoxy/" + fileName + "_gebc")[1]
          for fileName in gebcs_fileNames]
 
 nBins = 80
@@ -24,11 +24,9 @@ fig, axes = plt.subplots(3, 2)
 for axRow in axes:
     for ax in axRow:
 
-        gebc = gebcs[index]
-        values_list = list(gebc.values())
-        gebc_allSys += values_list
-        values = np.array(values_list)
-        values /= max(values)
+        values = gebcs[index]
+        gebc_allSys += values.tolist()
+        values = values / max(values)
 
         ax.set_title(str(index + 1), y=.7)
         histValues, bins, _ = ax.hist(values, bins=nBins,
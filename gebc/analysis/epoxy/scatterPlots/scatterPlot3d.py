@@ -1,6 +1,5 @@
 from lammpsData import LammpsData
-from helper_json import loadJson
-import numpy as np
+from helper_npz import loadGebc
 import matplotlib.pyplot as plt
 
 gebcs_fileNames = ["largestGroup_monomers_large" + str(i) for i in range(1, 6)]
@@ -63,22 +62,19 @@ for sysNum in range(len(dataFiles)):
     ax = fig.add_subplot(3, 2, sysNum + 1, projection='3d')
     data = LammpsData("../../../data/epoxy/lammpsData_annealedEquilibrated/"
                       + dataFiles[sysNum])
-    gebc = loadJson("../../../results/epoxy/"
-                    + gebcs_fileNames[sysNum] + "_gebc.json")
+    monomerIds, gebcValues = loadGebc("../../../results/epoxy/"
+                                      + gebcs_fileNames[sysNum] + "_gebc")
 
     # get coordinates of monomers
     # (representative atoms are S for DDS and central C for DGEBA)
-    representativeAtomIdsOfMonomers = list(gebc.keys())  # strings
-    # cast to np array of int
-    representativeAtomIndicesOfMonomers = np.array(
-        representativeAtomIdsOfMonomers).astype(int) - 1
+    # cast to np array of int (ids read from json are strings)
+    representativeAtomIndicesOfMonomers = monomerIds.astype(int) - 1
     # slice to retain only the coord.s of rep. atoms
     # (slicing respects the order of the indices in the array of indices)
     monomersX = data.x[representativeAtomIndicesOfMonomers]
 
     # normalize gebcs values before passing them as color map
-    gebcValues = np.array(list(gebc.values()))
-    gebcValues /= gebcValues.max()
+    gebcValues = gebcValues / gebcValues.max()
 
     plot = ax.scatter(monomersX[:, 0], monomersX[:, 1], monomersX[:, 2],
                       marker="o",
@@ -0,0 +1,112 @@
+'''
+Read a json adjacency list, {"label": [label, ...], ...} with integer
+labels (quoted or not), straight into the arrays of a CsrAdjacency.
+
+json.load builds a dict of lists of Python objects, which the analyzer
+then converts key by key, renumbers, and finally copies into CSR
+arrays, holding several copies of the network at once. Here the file
+is read in chunks of CHUNK_SIZE characters: the complete entries of
+each chunk are parsed at once with NumPy into arrays of labels and
+degrees, and only these arrays are kept; the labels are then interned
+into vertex numbers with a sort. Besides the CSR arrays, the peak
+memory is one chunk of text and a few integer arrays per edge.
+'''
+
+import re
+import numpy as np
+from csrAdjacency import CsrAdjacency
+
+CHUNK_SIZE = 1 << 20
+
+# one entry of the adjacency list: key and the text of its list
+ENTRY = re.compile(r'"([^"]*)"\s*:\s*\[([^\]]*)\]')
+
+
+def parseLabels(text, count):
+    """Array of the count integer labels in text, separated by
+    commas; quotes and whitespace are ignored."""
+    if not count:
+        return np.zeros(0, dtype=np.int64)
+    try:
+        labels = np.fromstring(text.replace('"', ""), dtype=np.int64,
+                               sep=",")
+    except ValueError:
+        labels = None
+    if labels is None or len(labels) != count:
+        raise ValueError("vertex labels must be integers")
+    return labels
+
+
+def parseEntries(entries):
+    """Return the keys, degrees and neighbor labels of a list of
+    (key, list text) pairs, as arrays."""
+    keys = parseLabels(",".join(key for key, _ in entries), len(entries))
+    lists = [text for _, text in entries if text.strip()]
+    degrees = np.array([text.count(",") + 1 if text.strip() else 0
+                        for _, text in entries], dtype=np.int64)
+    neighbors = parseLabels(",".join(lists), degrees.sum())
+    return keys, degrees, neighbors
+
+
+def loadCsrAdjacency(fileName, sparseLabels=False):
+    """Return the CsrAdjacency of the json adjacency list in fileName
+    and the label of each of its vertices (an int64 array).
+
+    With sparseLabels=False, the labels must be consecutive: vertex v
+    has label minVertex + v. Otherwise, the vertices are numbered in
+    the order of the keys in the file, as renumberKeysAndValuesFrom0
+    does."""
+    chunks = []
+    remainder = ""
+    with open(fileName, "r") as f:
+        while True:
+            text = f.read(CHUNK_SIZE)
+            buffer = remainder + text
+            entries = []
+            end = 0
+            for match in ENTRY.finditer(buffer):
+                entries.append(match.groups())
+                end = match.end()
+            remainder = buffer[end:]
+            if entries:
+                chunks.append(parseEntries(entries))
+            if not text:
+                break
+    if not chunks or remainder.strip() != "}":
+        raise ValueError(f"{fileName} is not a json adjacency list")
+    keys, degrees, neighbors = (np.concatenate(arrays)
+                                for arrays in zip(*chunks))
+    del chunks
+
+    nVertices = len(keys)
+    if sparseLabels:
+        order = np.argsort(keys)
+        sortedKeys = keys[order]
+        if np.any(sortedKeys[1:] == sortedKeys[:-1]):
+            raise ValueError(f"{fileName}: repeated vertex labels")
+        rows = np.arange(nVertices)
+        positions = np.searchsorted(sortedKeys, neighbors)
+        np.minimum(positions, nVertices - 1, out=positions)
+        found = sortedKeys[positions] == neighbors
+        heads = order[positions].astype(np.int32)
+        labels = keys
+    else:
+        minVertex = keys.min()
+        rows = keys - minVertex
+        if not np.array_equal(np.sort(rows), np.arange(nVertices)):
+            raise ValueError(f"{fileName}: vertex labels are not "
+                             "consecutive, use sparseLabels=True")
+        found = (neighbors >= minVertex) & (neighbors < minVertex + nVertices)
+        heads = (neighbors - minVertex).astype(np.int32)
+        labels = np.arange(nVertices) + minVertex
+    if not found.all():
+        raise ValueError(f"{fileName}: neighbor "
+                         f"{neighbors[~found][0]} is not a vertex")
+    del neighbors, found
+    if np.all(rows[1:] > rows[:-1]):
+        # keys in order: the lists follow each other as in the CSR arrays
+        indptr = np.zeros(nVertices + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        return CsrAdjacency(indptr, heads), labels
+    return CsrAdjacency.fromEdges(nVertices, np.repeat(rows, degrees),
+                                  heads), labels
@@ -0,0 +1,93 @@
+'''
+Algebraic formulation of Brandes' algorithm, on a block of sources.
+
+With A the adjacency matrix of the network (A[v, w] the number of
+edges from v to w) and one column per source, each BFS level is a
+sparse matrix - dense matrix product:
+
+    - forward: the path counts of the next level are A^T times the
+      path counts of the current frontier, restricted to the vertices
+      not reached yet
+
+    - backward: the dependencies of the vertices at level d - 1 are
+      sigma * (A times ((targetWeights + delta) / sigma) at level d)
+
+(J. Kepner and J. Gilbert, "Graph algorithms in the language of linear
+algebra", SIAM, 2011, ch. 6). Each product only involves the block of
+A between the vertices on the frontier of some source (the rows) and
+the vertices they reach (the columns), so that the dense operands have
+as many rows as the frontier, not as the network. Everything runs in
+scipy.sparse and NumPy, without any loop over vertices or edges.
+'''
+
+import numpy as np
+import scipy.sparse
+
+
+def adjacencyMatrix(csr):
+    """Sparse matrix A of a CsrAdjacency; repeated edges add up."""
+    return scipy.sparse.csr_matrix(
+        (np.ones(csr.nEdges), csr.indices, csr.indptr),
+        shape=(csr.nVertices, csr.nVertices))
+
+
+def levelPathCounts(matrix, sources):
+    """BFS from all sources at once, one column per source.
+
+    Return:
+        - sigma: (nVertices, nSources) array of the numbers of
+          geodesic paths
+        - depth: (nVertices, nSources) array of distances, -1 for
+          unreachable vertices
+        - levels: list of (rows, columns, block) items, one per BFS
+          level d = 1, 2, ...: the vertices at level d - 1 of some
+          source, the vertices at level d of some source, and the
+          block of A between them
+    """
+    nLanes = len(sources)
+    lanes = np.arange(nLanes)
+    sigma = np.zeros((matrix.shape[0], nLanes))
+    sigma[sources, lanes] = 1
+    depth = np.full(sigma.shape, -1, dtype=np.int32)
+    depth[sources, lanes] = 0
+    levels = []
+
+    rows = np.unique(sources)
+    frontier = sigma[rows]
+    level = 0
+    while rows.size:
+        level += 1
+        block = matrix[rows]
+        columns = np.unique(block.indices)
+        block = block[:, columns]
+        frontier = block.T @ frontier
+        frontier[depth[columns] != -1] = 0
+        reached = frontier.any(axis=1)
+        if not reached.any():
+            break
+        columns, frontier = columns[reached], frontier[reached]
+        levels.append((rows, columns, block[:, reached]))
+        depth[columns] = np.where(frontier != 0, level, depth[columns])
+        sigma[columns] += frontier
+        rows = columns
+    return sigma, depth, levels
+
+
+def levelDependencies(sigma, depth, levels, targetWeights, minTargets):
+    """Backward accumulation of the dependencies of every source, as
+    in brandesKernels.accumulateDependencies. The pair (source k, w)
+    has weight targetWeights[w] if w > minTargets[k], 0 otherwise.
+    The returned delta includes the sources, which the caller must
+    skip."""
+    delta = np.zeros(sigma.shape)
+    for level, (rows, columns, block) in reversed(list(
+            enumerate(levels, start=1))):
+        weights = targetWeights[columns, None]\
+            * (columns[:, None] > minTargets[None, :])
+        coefficient = np.zeros((len(columns), sigma.shape[1]))
+        np.divide(weights + delta[columns], sigma[columns],
+                  out=coefficient, where=depth[columns] == level)
+        contribution = block @ coefficient
+        delta[rows] += np.where(depth[rows] == level - 1,
+                                sigma[rows] * contribution, 0)
+    return delta
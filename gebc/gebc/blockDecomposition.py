@@ -0,0 +1,185 @@
+'''
+Decomposition of a network into its biconnected components (blocks),
+before gebc.
+
+Two blocks share at most one vertex, an articulation (cut) vertex, and
+the blocks and cut vertices form a tree, the block-cut tree. The
+geodesics between two vertices s and t cross the same sequence of
+blocks B_1, ..., B_k and cut vertices c_1, ..., c_(k-1), on the path
+between s and t in the block-cut tree; within B_i, they are the
+geodesics of B_i between its entry and exit vertices x_i and y_i
+(x_1 = s, y_k = t). Hence, with
+
+    W_B(x) = 1 + number of vertices cut off from B by x
+
+(1 if x is not a cut vertex), the pairs of vertices whose geodesics
+cross B from x to y go through a vertex v of B, other than x and y,
+as the geodesics of B between x and y do:
+
+    gebc(v) = cut term of v
+              + sum_(B containing v) sum_(x<y in B) W_B(x) W_B(y)
+                                     sigma_xy(v)/sigma_xy
+
+where, as for the pruned trees (see treePruning.py), the cut term
+counts the pairs of vertices separated by v. The inner sums are
+Brandes' algorithm on each block, with weighted pairs. They are
+computed on the disjoint union of the blocks, where each cut vertex
+appears once per block: the BFS from a source never leaves its
+block, and all the parallel backends work on the union as on any
+other network. Blocks with two vertices (bridges) only contribute
+cut terms, and are left out of the union.
+
+Only for symmetric networks, for the same reasons as tree pruning.
+'''
+
+import numpy as np
+from csrAdjacency import CsrAdjacency
+
+
+def biconnectedBlocks(csr):
+    """Hopcroft-Tarjan, with an explicit stack. Return the list of
+    blocks, as sorted lists of vertices; an isolated vertex is a block
+    by itself."""
+    simple = csr.simplified()
+    indptr = simple.indptr.tolist()
+    indices = simple.indices.tolist()
+    discovery = [-1] * simple.nVertices
+    low = [0] * simple.nVertices
+    blocks = []
+    time = 0
+    for root in range(simple.nVertices):
+        if discovery[root] != -1:
+            continue
+        discovery[root] = low[root] = time
+        time += 1
+        if indptr[root] == indptr[root + 1]:
+            blocks.append([root])
+            continue
+        stack = [(root, -1, indptr[root])]  # vertex, parent, next edge
+        edgeStack = []
+        while stack:
+            vertex, parent, edge = stack[-1]
+            if edge < indptr[vertex + 1]:
+                stack[-1] = (vertex, parent, edge + 1)
+                neighbor = indices[edge]
+                if discovery[neighbor] == -1:
+                    discovery[neighbor] = low[neighbor] = time
+                    time += 1
+                    edgeStack.append((vertex, neighbor))
+                    stack.append((neighbor, vertex, indptr[neighbor]))
+                elif neighbor != parent\
+                        and discovery[neighbor] < discovery[vertex]:
+                    edgeStack.append((vertex, neighbor))
+                    low[vertex] = min(low[vertex], discovery[neighbor])
+                continue
+            stack.pop()
+            if parent == -1:
+                continue
+            low[parent] = min(low[parent], low[vertex])
+            if low[vertex] >= discovery[parent]:
+                # parent cuts off the subtree of vertex: its edges
+                # on the stack form a block
+                block = set()
+                while True:
+                    tail, head = edgeStack.pop()
+                    block.update((tail, head))
+                    if tail == parent and head == vertex:
+                        break
+                blocks.append(sorted(block))
+    return blocks
+
+
+def blockCutWeights(blocks, nVertices):
+    """Return the weights W_B(x) of the vertices of each block (a
+    list of arrays, in the order of the block) and the cut term of
+    each vertex."""
+    nBlocks = len(blocks)
+    membership = np.zeros(nVertices, dtype=np.int64)
+    for block in blocks:
+        membership[block] += 1
+    isCut = membership > 1
+    # block-cut tree: nodes 0, ..., nBlocks - 1 are the blocks, node
+    # nBlocks + v is the cut vertex v; a block weighs as many vertices
+    # as it owns, a cut vertex weighs 1
+    neighbors = [[] for _ in range(nBlocks + nVertices)]
+    nodeWeight = np.zeros(nBlocks + nVertices, dtype=np.int64)
+    nodeWeight[nBlocks:][isCut] = 1
+    for b, block in enumerate(blocks):
+        for vertex in block:
+            if isCut[vertex]:
+                neighbors[b].append(nBlocks + vertex)
+                neighbors[nBlocks + vertex].append(b)
+            else:
+                nodeWeight[b] += 1
+
+    parent = np.full(nBlocks + nVertices, -1, dtype=np.int64)
+    subtree = nodeWeight.copy()
+    componentSize = np.zeros(nBlocks + nVertices, dtype=np.int64)
+    visited = np.zeros(nBlocks + nVertices, dtype=bool)
+    for root in range(nBlocks):
+        if visited[root]:
+            continue
+        visited[root] = True
+        order = [root]
+        for node in order:  # grows while iterating: BFS order
+            for neighbor in neighbors[node]:
+                if not visited[neighbor]:
+                    visited[neighbor] = True
+                    parent[neighbor] = node
+                    order.append(neighbor)
+        for node in reversed(order[1:]):
+            subtree[parent[node]] += subtree[node]
+        componentSize[order] = subtree[root]
+
+    weights = []
+    for b, block in enumerate(blocks):
+        nodes = nBlocks + np.asarray(block, dtype=np.int64)
+        blockWeights = np.ones(len(block), dtype=np.int64)
+        cut = isCut[block]
+        below = parent[nodes] == b
+        # cut vertex below the block: the subtree of the cut vertex;
+        # above it: everything but the subtree of the block
+        blockWeights[cut & below] = subtree[nodes[cut & below]]
+        blockWeights[cut & ~below] = componentSize[b] - subtree[b]
+        weights.append(blockWeights)
+
+    # the components of the network without the cut vertex v are the
+    # subtrees of its child blocks and, unless v is the root, the rest
+    cutTerms = np.zeros(nVertices, dtype=float)
+    squares = np.zeros(nBlocks + nVertices, dtype=float)
+    children = np.flatnonzero(parent >= 0)
+    np.add.at(squares, parent[children], subtree[children].astype(float)**2)
+    cutNodes = nBlocks + np.flatnonzero(isCut)
+    size = componentSize[cutNodes].astype(float)
+    rest = np.where(parent[cutNodes] >= 0, size - subtree[cutNodes], 0)
+    cutTerms[isCut] = ((size - 1)**2 - squares[cutNodes] - rest**2) / 2
+    return weights, cutTerms
+
+
+def decomposeBlocks(csr):
+    """Return:
+        - union: CsrAdjacency of the disjoint union of the blocks with
+          three vertices or more
+        - vertices: the vertex of csr of each vertex of union
+        - weights: W_B of each vertex of union
+        - cutTerms: the cut term of every vertex of csr
+    """
+    blocks = biconnectedBlocks(csr)
+    blockWeights, cutTerms = blockCutWeights(blocks, csr.nVertices)
+    indptrs = [np.zeros(1, dtype=np.int64)]
+    indices = [np.zeros(0, dtype=np.int32)]
+    vertices = [np.zeros(0, dtype=np.int64)]
+    weights = [np.zeros(0, dtype=np.int64)]
+    offset = 0
+    for block, blockWeight in zip(blocks, blockWeights):
+        if len(block) < 3:
+            continue
+        sub = csr.subgraph(np.asarray(block))
+        indptrs.append(sub.indptr[1:] + indptrs[-1][-1])
+        indices.append(sub.indices + offset)
+        vertices.append(np.asarray(block, dtype=np.int64))
+        weights.append(blockWeight)
+        offset += len(block)
+    union = CsrAdjacency(np.concatenate(indptrs), np.concatenate(indices))
+    return union, np.concatenate(vertices), np.concatenate(weights),\
+        cutTerms
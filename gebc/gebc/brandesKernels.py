@@ -0,0 +1,317 @@
+'''
+BFS kernels on a CsrAdjacency, for Brandes' algorithm.
+
+The BFS is level-synchronous: all the vertices at distance d from the
+source form the frontier, and all the edges leaving the frontier are
+processed at once with NumPy. The edges of the geodesic DAG (the edges
+(v, w) with distance(w) = distance(v) + 1) are stored level by level,
+so that the backward accumulation of dependencies can also proceed one
+level at a time. With storeDag=False, only the frontiers are stored
+(predecessor-free): the edges of each level are recomputed from them
+during the backward accumulation, which then expands every frontier a
+second time, but holds O(nVertices) instead of O(nEdges) per source,
+or per batch of sources.
+
+With edge lengths, the BFS is replaced by Dijkstra's algorithm, whose
+geodesic DAG is also split into levels (see weightedShortestPathDag),
+so that the same backward accumulation applies.
+'''
+
+from heapq import heappop, heappush
+import numpy as np
+
+# relative difference below which two path lengths are equal
+LENGTH_TOLERANCE = 1e-9
+
+
+class RecomputedDagLevels:
+    """The dagLevels of shortestPathDag, predecessor-free: only the
+    BFS frontiers are stored (O(nVertices) memory, not O(nEdges)),
+    and the edges of each level are recomputed from the distances,
+    one level at a time, when iterated over backward."""
+
+    def __init__(self, csr, distance):
+        self.csr = csr
+        self.distance = distance
+        self.frontiers = []  # the frontier at distance d - 1, level d
+
+    def __len__(self):
+        return len(self.frontiers)
+
+    def __reversed__(self):
+        for level in range(len(self.frontiers), 0, -1):
+            edgeIds, parents, children =\
+                self.csr.expand(self.frontiers[level - 1])
+            onDag = self.distance[children] == level
+            yield edgeIds[onDag], parents[onDag], children[onDag]
+
+
+def shortestPathDag(csr, source, target=None, storeDag=True):
+    """BFS from source. If target is given, stop after the level
+    containing target has been reached.
+
+    Return:
+        - distance: int32 array, -1 for unreachable vertices
+        - sigma: number of geodesic paths from source to each vertex
+        - dagLevels: list of (edgeIds, parents, children) arrays, one
+          entry per BFS level d = 1, 2, ..., with the edges of the
+          geodesic DAG going from level d-1 to level d. Repeated
+          edges appear once per edge. With storeDag=False, a
+          RecomputedDagLevels instead, which can only be iterated
+          over backward
+    """
+    distance = np.full(csr.nVertices, -1, dtype=np.int32)
+    sigma = np.zeros(csr.nVertices, dtype=float)
+    distance[source] = 0
+    sigma[source] = 1
+    dagLevels = [] if storeDag else RecomputedDagLevels(csr, distance)
+
+    frontier = np.array([source], dtype=np.int32)
+    level = 0
+    while frontier.size:
+        edgeIds, parents, children = csr.expand(frontier)
+        level += 1
+        unseen = children[distance[children] == -1]
+        distance[unseen] = level
+        onDag = distance[children] == level
+        edgeIds = edgeIds[onDag]
+        parents = parents[onDag]
+        children = children[onDag]
+        np.add.at(sigma, children, sigma[parents])
+        if storeDag:
+            dagLevels.append((edgeIds, parents, children))
+        else:
+            dagLevels.frontiers.append(frontier)
+        if target is not None and distance[target] != -1:
+            break
+        frontier = np.unique(unseen)
+    return distance, sigma, dagLevels
+
+
+def accumulateDependencies(sigma, dagLevels, targetWeights,
+                           edgeValues=None):
+    """Backward accumulation of the dependencies of the source on
+    every vertex v:
+
+        delta(v) = sum_(w: v parent of w) sigma(v)/sigma(w)
+                   * (targetWeights(w) + delta(w))
+
+    targetWeights(w) is the weight of the pair (source, w) in the
+    gebc sum, e.g. 1 if w > source and 0 otherwise. The returned
+    delta includes the source itself, which the caller must skip.
+
+    Each term of the sum is the dependency of the source on the edge
+    (v, w); if edgeValues is given, the terms are also added to it,
+    at the edge ids.
+    """
+    delta = np.zeros(len(sigma), dtype=float)
+    for edgeIds, parents, children in reversed(dagLevels):
+        coefficient = (targetWeights[children] + delta[children])\
+            / sigma[children]
+        flows = sigma[parents] * coefficient
+        np.add.at(delta, parents, flows)
+        if edgeValues is not None:
+            # an edge appears at most once per level
+            edgeValues[edgeIds] += flows
+    return delta
+
+
+def weightedShortestPathDag(csr, lengths, source,
+                            tolerance=LENGTH_TOLERANCE):
+    """Dijkstra from source, with a binary heap, on positive edge
+    lengths (lengths[e] for edge id e). Paths whose lengths differ
+    by at most tolerance times their length are equally short, so
+    that the geodesics of a symmetric network are not lost to
+    rounding errors.
+
+    Return distance (inf for unreachable vertices), sigma and
+    dagLevels, as shortestPathDag. Level d holds the edges of the
+    geodesic DAG entering the vertices whose longest chain of DAG
+    edges from the source has d edges: the parents of a vertex are
+    on lower levels than the vertex, which is all that the backward
+    accumulation needs.
+    """
+    indptr = csr.indptr.tolist()
+    indices = csr.indices.tolist()
+    lengths = lengths.tolist()
+    lower, upper = 1 - tolerance, 1 + tolerance
+    distance = [float("inf")] * csr.nVertices
+    sigma = [0.0] * csr.nVertices
+    depth = [0] * csr.nVertices
+    parentEdges = [None] * csr.nVertices
+    settled = [False] * csr.nVertices
+    distance[source] = 0.0
+    sigma[source] = 1.0
+    parentEdges[source] = []
+    heap = [(0.0, source)]
+    dagEdges = []
+    while heap:
+        d, v = heappop(heap)
+        if settled[v]:
+            continue
+        settled[v] = True
+        dagEdges += parentEdges[v]
+        for edge in range(indptr[v], indptr[v + 1]):
+            w = indices[edge]
+            if settled[w]:
+                continue
+            candidate = d + lengths[edge]
+            if candidate < distance[w] * lower:
+                distance[w] = candidate
+                sigma[w] = sigma[v]
+                depth[w] = depth[v] + 1
+                parentEdges[w] = [edge]
+                heappush(heap, (candidate, w))
+            elif candidate <= distance[w] * upper:
+                sigma[w] += sigma[v]
+                depth[w] = max(depth[w], depth[v] + 1)
+                parentEdges[w].append(edge)
+
+    edgeIds = np.array(dagEdges, dtype=np.int64)
+    parents = np.searchsorted(csr.indptr, edgeIds, side="right") - 1
+    children = csr.indices[edgeIds]
+    levels = np.array(depth)[children]
+    order = np.argsort(levels, kind="stable")
+    bounds = np.searchsorted(levels[order],
+                             np.arange(1, levels.max(initial=0) + 2))
+    dagLevels = [(edgeIds[order[start:stop]], parents[order[start:stop]],
+                  children[order[start:stop]])
+                 for start, stop in zip(bounds[:-1], bounds[1:])]
+    return np.array(distance), np.array(sigma), dagLevels
+
+
+# Multi-source BFS (MS-BFS): up to 64 sources advance together, one
+# lane per source. The frontier and visited state of each vertex are
+# uint64 bitsets, bit k standing for lane k, so that the edges leaving
+# a vertex are expanded once per level for all the lanes where it is
+# on the frontier, and the visited test of an edge covers all lanes
+# at once (M. Then et al., "The more the merrier: efficient
+# multi-source graph traversal", Proc. VLDB Endow. 8, 2014). Only
+# then are the surviving edges split into (edge, lane) pairs, for
+# sigma and the dependencies, which are stored flat: entry
+# vertex * nLanes + lane.
+
+MAX_LANES = 64
+
+
+def laneIds(bits):
+    """Return, for every set bit of the bitsets, the position of its
+    bitset and its lane."""
+    masks = np.unpackbits(bits.view(np.uint8), bitorder="little")
+    setBits = np.flatnonzero(masks)
+    return setBits >> 6, setBits & 63
+
+
+class RecomputedMultiSourceDagLevels:
+    """The dagLevels of multiSourceDag, predecessor-free: only the
+    frontiers and their lane bitsets are stored, and the edges of
+    each level are recomputed when iterated over backward. The (edge,
+    lane) pairs of level d are those whose tail is on the frontier
+    at distance d - 1 in the lane, and whose head is on the frontier
+    at distance d in the same lane."""
+
+    def __init__(self, csr, nLanes):
+        self.csr = csr
+        self.nLanes = nLanes
+        self.frontiers = []  # (frontier, lane bitsets), from distance 0
+
+    def __len__(self):
+        return max(len(self.frontiers) - 1, 0)
+
+    def __reversed__(self):
+        headBits = np.zeros(self.csr.nVertices, dtype=np.uint64)
+        for level in range(len(self), 0, -1):
+            frontier, frontierBits = self.frontiers[level - 1]
+            levelHeads, levelBits = self.frontiers[level]
+            headBits[levelHeads] = levelBits
+            counts = self.csr.indptr[frontier + 1]\
+                - self.csr.indptr[frontier]
+            edgeIds, tails, heads = self.csr.expand(frontier)
+            lanes = np.repeat(frontierBits, counts) & headBits[heads]
+            headBits[levelHeads] = 0
+            onDag = lanes != 0
+            edges, edgeLanes = laneIds(lanes[onDag])
+            yield (edgeIds[onDag][edges],
+                   tails[onDag][edges].astype(np.int64) * self.nLanes
+                   + edgeLanes,
+                   heads[onDag][edges].astype(np.int64) * self.nLanes
+                   + edgeLanes)
+
+
+def multiSourceDag(csr, sources, storeDag=True):
+    """BFS from all sources (at most MAX_LANES, distinct) at once.
+
+    Return:
+        - sigma: flat array of the numbers of geodesic paths, entry
+          v * nLanes + k for vertex v in lane k
+        - dagLevels: list of (edgeIds, parents, children) arrays, one
+          item per BFS level, with the edges of the geodesic DAGs
+          going from level d-1 to level d: parents and children are
+          flat entries, and an edge appears once per lane. Repeated
+          edges appear once per edge. With storeDag=False, a
+          RecomputedMultiSourceDagLevels instead, which can only be
+          iterated over backward
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    nLanes = len(sources)
+    sigma = np.zeros(csr.nVertices * nLanes, dtype=float)
+    sigma[sources * nLanes + np.arange(nLanes)] = 1
+    seen = np.zeros(csr.nVertices, dtype=np.uint64)
+    sourceBits = np.left_shift(np.uint64(1),
+                               np.arange(nLanes, dtype=np.uint64))
+    seen[sources] = sourceBits
+    # lanes reaching each vertex at the next level; zero between levels
+    reached = np.zeros(csr.nVertices, dtype=np.uint64)
+
+    frontier = sources.astype(np.int32)
+    frontierBits = sourceBits
+    if storeDag:
+        dagLevels = []
+    else:
+        dagLevels = RecomputedMultiSourceDagLevels(csr, nLanes)
+        dagLevels.frontiers.append((frontier, frontierBits))
+    while frontier.size:
+        counts = csr.indptr[frontier + 1] - csr.indptr[frontier]
+        edgeIds, tails, heads = csr.expand(frontier)
+        lanes = np.repeat(frontierBits, counts) & ~seen[heads]
+        onDag = lanes != 0
+        edgeIds, tails, heads, lanes = edgeIds[onDag], tails[onDag],\
+            heads[onDag], lanes[onDag]
+        if not heads.size:
+            break
+        np.bitwise_or.at(reached, heads, lanes)
+        frontier = np.flatnonzero(reached).astype(np.int32)
+        frontierBits = reached[frontier]
+        reached[frontier] = 0
+        seen[frontier] |= frontierBits
+        edges, edgeLanes = laneIds(lanes)
+        parents = tails[edges].astype(np.int64) * nLanes + edgeLanes
+        children = heads[edges].astype(np.int64) * nLanes + edgeLanes
+        np.add.at(sigma, children, sigma[parents])
+        if storeDag:
+            dagLevels.append((edgeIds[edges], parents, children))
+        else:
+            dagLevels.frontiers.append((frontier, frontierBits))
+    return sigma, dagLevels
+
+
+def accumulateMultiSourceDependencies(sigma, dagLevels, targetWeights,
+                                      minTargets, edgeValues=None):
+    """Backward accumulation of the dependencies of every lane, as
+    in accumulateDependencies, on the flat entries of multiSourceDag.
+    The pair (source of lane k, w) has weight targetWeights[w] if
+    w > minTargets[k], 0 otherwise. Return delta as a (nVertices,
+    nLanes) array, which includes the sources, which the caller must
+    skip. If edgeValues is given, the dependencies of all the lanes
+    on each edge are added to it, at the edge ids."""
+    nLanes = len(minTargets)
+    delta = np.zeros(len(sigma), dtype=float)
+    for edgeIds, parents, children in reversed(dagLevels):
+        vertices, lanes = np.divmod(children, nLanes)
+        weights = targetWeights[vertices] * (vertices > minTargets[lanes])
+        coefficient = (weights + delta[children]) / sigma[children]
+        flows = sigma[parents] * coefficient
+        np.add.at(delta, parents, flows)
+        if edgeValues is not None:
+            np.add.at(edgeValues, edgeIds, flows)
+    return delta.reshape(-1, nLanes)
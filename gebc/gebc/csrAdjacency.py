@@ -0,0 +1,157 @@
+'''
+Compressed sparse row (CSR) representation of a network.
+
+The neighbors of vertex v are
+
+    indices[indptr[v]:indptr[v+1]]
+
+so the whole adjacency list is stored in two int32 arrays, instead of a
+dict of lists of Python ints. Each entry of indices is a directed edge
+(half of an undirected edge); its position in indices is its edge id.
+Repeated neighbors (multiple edges) are kept, one entry per edge.
+
+Vertices are numbered consecutively from 0. Adjacency lists whose keys
+start from minVertex are shifted by -minVertex.
+'''
+
+import numpy as np
+
+
+class CsrAdjacency:
+
+    def __init__(self, indptr, indices):
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int32)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.nVertices = len(self.indptr) - 1
+        self.nEdges = len(self.indices)
+
+    @classmethod
+    def fromAdjList(cls, adjList, minVertex=0):
+        """adjList: dict with integer keys minVertex, ...,
+        minVertex + len(adjList) - 1 and lists of integer
+        neighbors as values."""
+        nVertices = len(adjList)
+        degrees = np.zeros(nVertices, dtype=np.int64)
+        for vertex, neighbors in adjList.items():
+            degrees[int(vertex) - minVertex] = len(neighbors)
+        indptr = np.zeros(nVertices + 1, dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        for vertex, neighbors in adjList.items():
+            row = int(vertex) - minVertex
+            indices[indptr[row]:indptr[row + 1]] = neighbors
+        if minVertex:
+            indices -= minVertex
+        return cls(indptr, indices)
+
+    @classmethod
+    def fromEdges(cls, nVertices, tails, heads):
+        """One directed edge (tails[k], heads[k]) per entry; the
+        edges leaving each vertex keep their order."""
+        tails = np.asarray(tails, dtype=np.int64)
+        order = np.argsort(tails, kind="stable")
+        indptr = np.zeros(nVertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tails, minlength=nVertices), out=indptr[1:])
+        return cls(indptr, np.asarray(heads)[order])
+
+    def simplified(self):
+        """The same network without repeated edges and self-loops."""
+        tails = np.repeat(np.arange(self.nVertices, dtype=np.int64),
+                          self.degrees())
+        heads = self.indices.astype(np.int64)
+        keys = np.unique((tails * self.nVertices + heads)[tails != heads])
+        return CsrAdjacency.fromEdges(self.nVertices,
+                                      keys // self.nVertices,
+                                      keys % self.nVertices)
+
+    def subgraph(self, vertices):
+        """The subnetwork induced by vertices (a sorted array), whose
+        k-th vertex becomes vertex k."""
+        newLabels = np.full(self.nVertices, -1, dtype=np.int64)
+        newLabels[vertices] = np.arange(len(vertices))
+        _, tails, heads = self.expand(np.asarray(vertices, dtype=np.int32))
+        inside = newLabels[heads] >= 0
+        return CsrAdjacency.fromEdges(len(vertices),
+                                      newLabels[tails[inside]],
+                                      newLabels[heads[inside]])
+
+    def transposed(self):
+        """The same network with all edges reversed."""
+        tails = np.repeat(np.arange(self.nVertices, dtype=np.int64),
+                          self.degrees())
+        return CsrAdjacency.fromEdges(self.nVertices, self.indices, tails)
+
+    def withoutEdges(self, edgeIds):
+        """The same network without the given edges. The other edges
+        keep their order: an array indexed by edge ids carries over
+        as array[kept], with kept the boolean mask of the edges
+        left."""
+        kept = np.ones(self.nEdges, dtype=bool)
+        kept[edgeIds] = False
+        tails = np.repeat(np.arange(self.nVertices, dtype=np.int64),
+                          self.degrees())
+        return CsrAdjacency.fromEdges(self.nVertices, tails[kept],
+                                      self.indices[kept])
+
+    def euclideanLengths(self, positions, boxLengths=None):
+        """Length of every edge, by edge id, from the (nVertices,
+        dimension) array of the vertex positions. With boxLengths
+        (one per dimension, None for a non-periodic one), the
+        positions are in a periodic box, and edges are as long as
+        the nearest image of their head."""
+        tails = np.repeat(np.arange(self.nVertices), self.degrees())
+        separations = positions[self.indices] - positions[tails]
+        if boxLengths is not None:
+            box = np.array([np.inf if length is None else length
+                            for length in boxLengths])
+            periodic = np.isfinite(box)
+            separations[:, periodic] -= box[periodic] * np.round(
+                separations[:, periodic] / box[periodic])
+        return np.sqrt((separations**2).sum(axis=1))
+
+    def neighbors(self, vertex):
+        return self.indices[self.indptr[vertex]:self.indptr[vertex + 1]]
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def expand(self, frontier):
+        """Return all the edges leaving the vertices in frontier,
+        as three arrays: edge ids, tail vertices, head vertices."""
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        # position of each edge within the concatenation of the rows
+        offsets = np.cumsum(counts) - counts
+        edgeIds = np.repeat(starts - offsets, counts)\
+            + np.arange(counts.sum(), dtype=np.int32)
+        tails = np.repeat(frontier, counts)
+        return edgeIds, tails, self.indices[edgeIds]
+
+    def isSymmetric(self):
+        """True if every edge (v, w) is matched by an edge (w, v),
+        with the same multiplicity."""
+        tails = np.repeat(np.arange(self.nVertices, dtype=np.int64),
+                          self.degrees())
+        heads = self.indices.astype(np.int64)
+        forward = np.sort(tails * self.nVertices + heads)
+        backward = np.sort(heads * self.nVertices + tails)
+        return np.array_equal(forward, backward)
+
+    def connectedComponents(self):
+        """Label the (weakly) connected components by min-label
+        propagation along the edges, in both directions, with pointer
+        jumping. Return the number of components and the label of each
+        vertex; components are numbered by their smallest vertex."""
+        tails = np.repeat(np.arange(self.nVertices, dtype=np.int32),
+                          self.degrees())
+        heads = self.indices
+        labels = np.arange(self.nVertices)
+        while True:
+            previous = labels.copy()
+            np.minimum.at(labels, tails, labels[heads])
+            np.minimum.at(labels, heads, labels[tails])
+            labels = labels[labels]
+            if np.array_equal(labels, previous):
+                break
+        roots, labels = np.unique(labels, return_inverse=True)
+        return len(roots), labels
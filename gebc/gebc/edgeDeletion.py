@@ -0,0 +1,175 @@
+'''
+Incremental update of gebc when edges are removed from a network.
+
+The distances and numbers of geodesics between all pairs of vertices
+are kept in two (nVertices, nVertices) arrays, distance and sigma, row
+s for the paths from s; unreachable pairs have distance nVertices + 1.
+The pair (s, t) is affected by the removal of the edge (u, w) if one
+of its geodesics goes through the edge:
+
+    distance(s, u) + 1 + distance(w, t) = distance(s, t)
+
+The geodesics of the other pairs do not change, and neither do their
+contributions to gebc. Removing an edge usually affects a small
+fraction of the pairs, even though it affects almost every source
+(all the sources whose distances to u and w differ). Only the affected
+pairs are updated:
+
+    - their new distances by Bellman-Ford relaxation from the pairs
+      that are not affected, through the edges left
+
+    - their new numbers of geodesics, in order of new distance,
+      as in a BFS
+
+and their contributions are taken out of gebc with the old arrays and
+put back with the new ones, by Brandes' backward accumulation from
+the affected targets only, for all sources at once: it visits the
+vertices of their geodesics, not the whole network.
+'''
+
+import numpy as np
+from brandesKernels import multiSourceDag, MAX_LANES
+
+
+def allPairsPaths(csr):
+    """Return the distance (int32) and sigma arrays of csr, from
+    multi-source BFS."""
+    nVertices = csr.nVertices
+    distance = np.full((nVertices, nVertices), nVertices + 1,
+                       dtype=np.int32)
+    sigma = np.zeros((nVertices, nVertices), dtype=float)
+    for start in range(0, nVertices, MAX_LANES):
+        sources = np.arange(start, min(start + MAX_LANES, nVertices))
+        nLanes = len(sources)
+        batchSigma, dagLevels = multiSourceDag(csr, sources)
+        batchDistance = np.full(nVertices * nLanes, nVertices + 1,
+                                dtype=np.int32)
+        batchDistance[sources * nLanes + np.arange(nLanes)] = 0
+        for level, (_, _, children) in enumerate(dagLevels, start=1):
+            batchDistance[children] = level
+        distance[sources] = batchDistance.reshape(nVertices, nLanes).T
+        sigma[sources] = batchSigma.reshape(nVertices, nLanes).T
+    return distance, sigma
+
+
+def inEdges(csr):
+    """The edges entering each vertex: CSR arrays (indptr, tails,
+    edgeIds), with the edge ids of csr."""
+    edgeIds = np.argsort(csr.indices, kind="stable")
+    indptr = np.zeros(csr.nVertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(csr.indices, minlength=csr.nVertices),
+              out=indptr[1:])
+    tails = np.repeat(np.arange(csr.nVertices), csr.degrees())
+    return indptr, tails[edgeIds], edgeIds
+
+
+def expandInEdges(edgesIn, vertices):
+    """All the edges entering vertices: return, for each edge, the
+    position of its head in vertices, its tail and its edge id."""
+    indptr, tails, edgeIds = edgesIn
+    starts = indptr[vertices]
+    counts = indptr[vertices + 1] - starts
+    offsets = np.cumsum(counts) - counts
+    positions = np.repeat(starts - offsets, counts)\
+        + np.arange(counts.sum())
+    heads = np.repeat(np.arange(len(vertices)), counts)
+    return heads, tails[positions], edgeIds[positions]
+
+
+def affectedPairs(distance, tails, heads):
+    """Boolean (nVertices, nVertices) array of the pairs with a
+    geodesic through one of the edges (tails[k], heads[k])."""
+    affected = np.zeros(distance.shape, dtype=bool)
+    for u, w in zip(tails.tolist(), heads.tolist()):
+        affected |= distance[:, u, None] + 1 + distance[None, w, :]\
+            == distance
+    return affected
+
+
+def updatePaths(csr, distance, sigma, sources, targets):
+    """New distance and sigma arrays, after the pairs (sources[k],
+    targets[k]) were affected by a change of the network into csr."""
+    unreachable = csr.nVertices + 1
+    distance = distance.copy()
+    sigma = sigma.copy()
+    distance[sources, targets] = unreachable
+    sigma[sources, targets] = 0
+    pairs, tails, _ = expandInEdges(inEdges(csr), targets)
+    pairSources = sources[pairs]
+    while True:
+        shortest = np.full(len(sources), unreachable, dtype=np.int64)
+        np.minimum.at(shortest, pairs,
+                      distance[pairSources, tails].astype(np.int64) + 1)
+        shortest = np.minimum(shortest, unreachable)
+        if np.array_equal(shortest, distance[sources, targets]):
+            break
+        distance[sources, targets] = shortest
+
+    levels = distance[sources, targets]
+    order = np.argsort(levels[pairs], kind="stable")
+    pairs, pairSources, tails = pairs[order], pairSources[order],\
+        tails[order]
+    reachable = np.unique(levels[levels < unreachable])
+    bounds = np.searchsorted(levels[pairs], np.append(reachable,
+                                                      unreachable))
+    for level, start, stop in zip(reachable.tolist(), bounds[:-1],
+                                  bounds[1:]):
+        edgePairs, edgeSources, edgeTails = pairs[start:stop],\
+            pairSources[start:stop], tails[start:stop]
+        onDag = distance[edgeSources, edgeTails] == level - 1
+        counts = np.zeros(len(sources), dtype=float)
+        np.add.at(counts, edgePairs[onDag],
+                  sigma[edgeSources[onDag], edgeTails[onDag]])
+        atLevel = levels == level
+        sigma[sources[atLevel], targets[atLevel]] = counts[atLevel]
+    return distance, sigma
+
+
+def pairDependencies(csr, distance, sigma, sources, targets,
+                     edgeValues=None):
+    """Sum of the dependencies of the pairs (sources[k], targets[k])
+    on every vertex, other than their ends:
+
+        sigma(s, v) sigma(v, t) / sigma(s, t)
+
+    for the vertices v of the geodesics from s to t. If edgeValues is
+    given, the dependencies on each edge of csr are added to it.
+
+    Brandes' backward accumulation, restricted to the targets of the
+    pairs, for all their sources at once: the entries (s, v), keyed
+    s * nVertices + v, are processed in decreasing order of
+    distance(s, v)."""
+    nVertices = csr.nVertices
+    levels = distance[sources, targets]
+    reachable = levels < nVertices + 1
+    sources, targets, levels = sources[reachable], targets[reachable],\
+        levels[reachable]
+    edgesIn = inEdges(csr)
+    dependencies = np.zeros(nVertices, dtype=float)
+    keys = np.zeros(0, dtype=np.int64)
+    delta = np.zeros(0, dtype=float)
+    for level in range(levels.max(initial=0), 0, -1):
+        # targets at this level weigh 1, on top of their dependencies
+        atLevel = levels == level
+        keys, entries = np.unique(np.concatenate((
+            keys, sources[atLevel] * nVertices + targets[atLevel])),
+            return_inverse=True)
+        weights = np.bincount(entries, minlength=len(keys),
+                              weights=np.concatenate((
+                                  delta, np.ones(atLevel.sum()))))
+        entrySources, children = np.divmod(keys, nVertices)
+        coefficient = weights / sigma[entrySources, children]
+        heads, parents, edgeIds = expandInEdges(edgesIn, children)
+        parentSources = entrySources[heads]
+        onDag = distance[parentSources, parents] == level - 1
+        heads, parents, edgeIds, parentSources = heads[onDag],\
+            parents[onDag], edgeIds[onDag], parentSources[onDag]
+        flows = sigma[parentSources, parents] * coefficient[heads]
+        if edgeValues is not None:
+            np.add.at(edgeValues, edgeIds, flows)
+        keys, entries = np.unique(parentSources * nVertices + parents,
+                                  return_inverse=True)
+        delta = np.bincount(entries, weights=flows, minlength=len(keys))
+        inside = keys // nVertices != keys % nVertices
+        np.add.at(dependencies, keys[inside] % nVertices, delta[inside])
+    return dependencies
@@ -0,0 +1,94 @@
+'''
+Checkpoint files of a gebc run, so that a killed job can be resumed.
+
+Each rank periodically saves the source vertices it has completed and
+its partial gebc sums (which hold the contributions of exactly those
+sources), and its partial edge gebc sums if any, to its own file, prefix_rank<rank>.npz, replaced atomically.
+
+Every run is a new generation of files. At the start of a run, rank 0
+merges the files of the latest generation found on disk (the previous
+run) and saves the result as its own file of the new generation,
+before any other rank saves anything; the files of older generations
+are then stale, and are removed. Whenever a run is killed, the files
+of its generation (or, if it was killed before rank 0 saved, of the
+previous one) hold disjoint sets of completed sources, and the
+number of ranks may change from one run to the next.
+'''
+
+import glob
+import os
+import numpy as np
+
+
+def checkpointFileName(prefix, rank):
+    return f"{prefix}_rank{rank}.npz"
+
+
+def saveCheckpoint(prefix, rank, generation, completed, gebc, metadata,
+                   edgeGebc=None):
+    """Write to a temporary file first, so that a job killed while
+    writing leaves the previous checkpoint intact."""
+    fileName = checkpointFileName(prefix, rank)
+    temporaryFileName = checkpointFileName(prefix + "_tmp", rank)
+    sums = {"gebc": gebc}
+    if edgeGebc is not None:
+        sums["edgeGebc"] = edgeGebc
+    np.savez_compressed(temporaryFileName, generation=generation,
+                        completed=np.packbits(completed), **sums,
+                        **metadata)
+    os.replace(temporaryFileName, fileName)
+
+
+def latestGeneration(prefix):
+    """-1 if no files are found."""
+    generation = -1
+    for fileName in glob.glob(checkpointFileName(prefix, "*")):
+        with np.load(fileName) as checkpoint:
+            generation = max(generation, int(checkpoint["generation"]))
+    return generation
+
+
+def loadCheckpoints(prefix, nVertices, metadata, nEdges=None):
+    """Merge the files of the latest generation. Return the
+    generation (-1 if no files were found), the completed sources (a
+    boolean array), the sum of the partial gebc arrays and, if nEdges
+    is given, the sum of the partial edge gebc arrays (else None)."""
+    checkpoints = []
+    for fileName in glob.glob(checkpointFileName(prefix, "*")):
+        with np.load(fileName) as checkpoint:
+            checkpoints.append({key: checkpoint[key]
+                                for key in checkpoint.files})
+    completed = np.zeros(nVertices, dtype=bool)
+    gebc = np.zeros(nVertices, dtype=float)
+    edgeGebc = None if nEdges is None else np.zeros(nEdges, dtype=float)
+    if not checkpoints:
+        return -1, completed, gebc, edgeGebc
+    generation = max(int(checkpoint["generation"])
+                     for checkpoint in checkpoints)
+    for checkpoint in checkpoints:
+        if int(checkpoint["generation"]) != generation:
+            continue
+        for key, value in metadata.items():
+            if checkpoint.get(key) != value:
+                raise ValueError(f"checkpoint {prefix} does not match "
+                                 f"this run: {key} = "
+                                 f"{checkpoint.get(key)}, not {value}")
+        sources = np.unpackbits(checkpoint["completed"],
+                                count=nVertices).astype(bool)
+        if np.any(completed & sources):
+            raise ValueError(f"checkpoint {prefix}: sources completed "
+                             "twice")
+        completed |= sources
+        gebc += checkpoint["gebc"]
+        if edgeGebc is not None:
+            edgeGebc += checkpoint["edgeGebc"]
+    return generation, completed, gebc, edgeGebc
+
+
+def removeStaleCheckpoints(prefix, generation):
+    """Remove the files older than generation."""
+    for fileName in glob.glob(checkpointFileName(prefix, "*")):
+        with np.load(fileName) as checkpoint:
+            stale = int(checkpoint["generation"]) < generation
+        if stale:
+            os.remove(fileName)
@@ -11,6 +11,124 @@ where
 so each path has a weight equal to the inverse of the
 number of paths.
 
+The following engines are available:
+
+    - "paths": for every pair (i, j), run a BFS from i and explicitly
+      enumerate all the geodesic paths ending in j. Exponential in the
+      worst case; kept for cross-checking on small networks
+
+    - "brandes" (default): one BFS per source vertex i, keeping the
+      number of geodesics (sigma) reaching each vertex and the list of
+      its predecessors, followed by a backward accumulation of the
+      dependencies of i on all other vertices (U. Brandes, "A faster
+      algorithm for betweenness centrality", J. Math. Sociol. 25, 2001).
+      Only targets j > i are accumulated, so that both engines sum over
+      the same pairs and give the same gebc values
+
+    - "msbfs": same as "brandes", with up to 64 sources at a time, whose
+      BFS advance together (multi-source BFS with bitsets, see
+      brandesKernels.py); the edges leaving a vertex are expanded once
+      per level for all the sources that reach it at that level
+
+    - "spmv": same as "msbfs", with each BFS level, forward and
+      backward, written as a product of the sparse adjacency matrix
+      with a dense block of 64 columns, one per source (see
+      algebraicKernels.py). Requires scipy
+
+    - "dijkstra": same as "brandes", on weighted geodesics: edges are
+      as long as the Euclidean distance between their ends, given by
+      coordinates (a dict from vertex labels to positions, e.g.
+      vertexIdToCoords.json) and, in a periodic box, boxLengths (the
+      nearest image of each neighbor is used). One Dijkstra search per
+      source replaces the BFS (see brandesKernels.py), and paths whose
+      lengths agree to a relative tolerance count as equally short.
+      Not available with network reductions or edge deletion
+
+Parallel backends (parallel=True):
+
+    - "mpi" (default): ranks of an MPI job, e.g. mpirun -np 20 python3 ...
+
+    - "multiprocessing": a pool of processes on a single machine, sharing
+      the network through shared memory (see sharedMemoryPool.py). Does
+      not need mpi4py, which is then optional
+
+Approximate gebc (nSamples=k): only k source vertices, drawn at random
+(sampling="uniform") or from each degree class in proportion to its
+size (sampling="degree"), are processed (with any engine but "paths"),
+and the accumulated scores are rescaled; gebcError holds the half
+widths of the confidence intervals (see sourceSampler.py). With
+stableTop=m, the sources are drawn in batches, and the sampling stops
+early once the m top-ranked vertices have not changed over the last few
+batches. With certifiedTop=k (nSamples, if given, caps the number of
+sources), the sampling stops as soon as the k top-ranked vertices are
+certified: their confidence intervals, widened so that the intervals
+of all the vertices hold at once, lie above those of all the other
+vertices (see sourceSampler.py); topCertified tells whether they were,
+and topRanking returns their labels and gebc, in decreasing order.
+
+Tree pruning (prune=True, symmetric networks only, any engine but
+"paths"): the trees hanging from the network are removed before the
+computation, which then runs on the remaining core only, with weighted
+pairs; the exact gebc of the removed vertices, and their contributions
+to the core vertices, are added back in closed form (see
+treePruning.py). Chains of vertices of degree 2 are left in the core.
+
+Block decomposition (decompose=True, same restrictions, includes tree
+pruning): the computation runs on each biconnected block of the
+network separately, with weighted pairs, and the blocks are combined
+exactly through their cut vertices (see blockDecomposition.py).
+
+Checkpoints (checkpoint=prefix, serial and mpi backend only): every
+checkpointInterval seconds, each rank saves its completed sources and
+partial gebc sums to prefix_rank<rank>.npz. With resume=True, a new
+run merges the files of the previous one, starts from their sums and
+skips their completed sources; otherwise, the files are discarded (see
+gebcCheckpoint.py).
+
+Symmetry classes (symmetry="twins" or "orbits", exact vertex gebc of
+symmetric networks, brandes, msbfs and spmv engines, without network
+reductions): vertices with the same neighbors (twins) or, on small
+networks, in the same orbit of the automorphism group have the same
+gebc, and their BFS trees are images of each other. One source per
+class is processed, for all its targets, with the size of its class as
+weight, and gebc is averaged over each class (see vertexSymmetry.py).
+
+Edge betweenness (edgeBetweenness=True, brandes and msbfs engines,
+exact gebc without network reductions): the same backward accumulation
+also gives the dependency of each source on each edge of the geodesic
+DAG, so that edgeGebc, the sum over the pairs (i, j > i) of the
+fraction of the geodesics from i to j going through each edge, comes
+at no extra traversal. It is indexed by the edge ids of the CSR
+arrays, with one entry per direction of an edge; pairEdgeGebc folds
+it into one value per pair of adjacent vertices.
+
+Edge deletion (removeEdges, or gebcWithoutEdges for what-if scans,
+such as bond breakage scans, that leave the analyzer unchanged): when a
+few edges are removed, gebc is updated, not recomputed; only the pairs
+of vertices whose geodesics went through the edges are processed (see
+edgeDeletion.py).
+
+Memory-bounded runs, for very large networks (lowMemory=True, brandes
+and msbfs engines): the BFS keeps its frontiers only, not the edges of
+the geodesic DAG, which are recomputed from the distances during the
+backward accumulation (predecessor-free, see brandesKernels.py); each
+worker then holds O(nVertices + nEdges), however many geodesics there
+are. With accumulatorFiles=prefix (exact gebc only), the accumulators
+of each worker are np.memmap files, prefix_rank<rank>.dat and, for the
+multiprocessing backend, prefix_pool.dat, of type accumulatorType
+("float64" or "float32"), whose pages the system can write back and
+evict; gebc is read back into memory at the end, and the files are
+removed.
+
+Output: printJson and printEdgesJson write dicts from vertex labels
+(or pairs of labels) to gebc; printNpz and printEdgesNpz write the same
+results as columns of NumPy arrays, much faster to write and read on
+large networks, and which can be memory-mapped (see helper_npz.py).
+
+After pre-processing, the network is stored in compressed sparse row
+(CSR) format (see csrAdjacency.py) and all BFS traversals run on it,
+level by level, with NumPy (see brandesKernels.py).
+
 Useful resources on BFS and reconstructing all (not just one)
 geodesic paths from it:
 https://www.youtube.com/watch?v=09_LlHjoEiY (minute 39)
@@ -25,42 +143,261 @@ Input: a dictionary
     - each value is a list carrying the labels of the vertices neighboring 
       the key vertex; can be either strings or integers
 
+or the name of a json file holding such a dictionary, which is then read
+straight into CSR arrays, without building the dictionary (see
+adjacencyLoader.py): faster, and with a fraction of the memory, on large
+networks.
+
 '''
 
+import os
+import time
 import numpy as np
-from mpi4py import MPI
+try:
+    from mpi4py import MPI
+except ImportError:
+    # only the serial and multiprocessing backends are available
+    MPI = None
+try:
+    from algebraicKernels import adjacencyMatrix, levelPathCounts
+    from algebraicKernels import levelDependencies
+except ImportError:
+    # the spmv engine is not available
+    adjacencyMatrix = None
+from csrAdjacency import CsrAdjacency
+from adjacencyLoader import loadCsrAdjacency
+from brandesKernels import shortestPathDag, accumulateDependencies
+from brandesKernels import weightedShortestPathDag
+from brandesKernels import multiSourceDag, accumulateMultiSourceDependencies
+from brandesKernels import MAX_LANES
+from sourceScheduler import SourceScheduler
+from sharedMemoryPool import computeGebcInPool
+from sourceSampler import SourceSampler, simultaneousConfidence
+from sourceSampler import separatesTop
+from treePruning import pruneTrees
+from blockDecomposition import decomposeBlocks
+from gebcCheckpoint import latestGeneration, loadCheckpoints
+from gebcCheckpoint import saveCheckpoint, removeStaleCheckpoints
+from edgeDeletion import allPairsPaths, affectedPairs, updatePaths
+from edgeDeletion import pairDependencies
+from vertexSymmetry import twinClasses, automorphismOrbits
 from helper_dict import changeTypeOfDictKeys
+from helper_dict import dictWithLists
 from helper_dict import renumberKeysAndValuesFrom0
 from helper_json import printJson
+from helper_npz import printNpz
+
+# message tags of the MPI scheduler
+REQUEST_TAG = 1
+WORK_TAG = 2
+
+# adaptive sampling stops when the top-ranked vertices have not
+# changed over this many consecutive batches
+STABLE_BATCHES_TO_STOP = 3
+
+# engines that process the sources MAX_LANES at a time
+BATCH_ENGINES = ("msbfs", "spmv")
+
+# largest network for which edge deletion keeps the distances and
+# numbers of geodesics between all pairs (12 bytes per pair)
+ALL_PAIRS_MAX_VERTICES = 5000
 
 
 class GeodesicEdgeBetweennessCentrality:
 
-    def __init__(self, adjacencyList, parallel=True, sparseLabels=False):
+    def __init__(self, adjacencyList, parallel=True, sparseLabels=False,
+                 engine="brandes", backend="mpi", nProcesses=None,
+                 nSamples=None, sampling="uniform", batchSize=None,
+                 stableTop=None, certifiedTop=None, confidence=0.95,
+                 seed=None, prune=False, decompose=False, checkpoint=None,
+                 checkpointInterval=600, resume=False,
+                 edgeBetweenness=False, coordinates=None, boxLengths=None,
+                 symmetry=None, lowMemory=False, accumulatorFiles=None,
+                 accumulatorType="float64"):
 
-        self.comm = MPI.COMM_WORLD
-        self.me = self.comm.Get_rank()
-        self.nRanks = self.comm.Get_size()
+        if MPI is not None:
+            self.comm = MPI.COMM_WORLD
+            self.me = self.comm.Get_rank()
+            self.nRanks = self.comm.Get_size()
+        elif parallel and backend == "mpi":
+            raise ImportError("the mpi backend requires mpi4py")
+        else:
+            self.comm = None
+            self.me = 0
+            self.nRanks = 1
         # print("me: ", self.me, "; num procs: ", self.nRanks)
 
-        # pre-processing of adjList 
-        self.adjList = changeTypeOfDictKeys(adjacencyList,
-                                            str, int)
         self.sparseLabels = sparseLabels
-        self.checkForSparseLabels()
+        if isinstance(adjacencyList, str):
+            # json file name: read straight into the CSR arrays
+            self.csr, labels = loadCsrAdjacency(adjacencyList,
+                                                sparseLabels)
+            self.minVertex = 0 if sparseLabels else int(labels[0])
+            self.consecutiveLabelsToSparseLabels =\
+                labels.tolist() if sparseLabels else None
+        else:
+            # pre-processing of adjList
+            self.adjList = changeTypeOfDictKeys(adjacencyList,
+                                                str, int)
+            self.checkForSparseLabels()
+            self.minVertex = min(list(self.adjList.keys()))
+            # from here on, vertices are the rows of the CSR arrays,
+            # numbered from 0; the dict of lists is no longer needed
+            self.csr = CsrAdjacency.fromAdjList(self.adjList,
+                                                self.minVertex)
+            del self.adjList
 
-        self.nVertices = len(self.adjList)
-        self.minVertex = min(list(self.adjList.keys()))
+        self.nVertices = self.csr.nVertices
         self.gebc = np.zeros(self.nVertices, dtype=float)
+        self.gebcError = None  # only for sampled gebc
+        if certifiedTop is not None and nSamples is None:
+            # sample until the top is certified, at most all the sources
+            nSamples = self.nVertices
+        self.allPairs = None  # only for edge deletion
+
+        self.edgeLengths = None  # only for the dijkstra engine
+        if coordinates is not None:
+            if engine != "dijkstra":
+                raise ValueError("coordinates are only used by the "
+                                 "dijkstra engine")
+            self.edgeLengths = self.csr.euclideanLengths(
+                self.vertexPositions(coordinates), boxLengths)
+            if np.any(self.edgeLengths <= 0):
+                raise ValueError("edges of zero length: some adjacent "
+                                 "vertices have the same coordinates")
+        self.selectEngine(engine)
+        if lowMemory and engine not in ("brandes", "msbfs"):
+            raise ValueError("lowMemory requires the brandes or msbfs "
+                             "engine")
+        self.storeDag = not lowMemory
 
         if self.me == 0:
             print(f"number of vertices: {self.nVertices}")
             print(f"min vertex: {self.minVertex}")
 
-        if parallel:
+        self.vertexWeights = None
+        reduction = "blocks" if decompose else "trees" if prune else None
+        self.edgeGebc = None
+        if edgeBetweenness:
+            if engine not in ("brandes", "msbfs", "dijkstra"):
+                raise ValueError("edge betweenness requires the brandes, "
+                                 "msbfs or dijkstra engine")
+            if nSamples is not None or reduction is not None:
+                raise ValueError("edge betweenness is only available for "
+                                 "exact gebc, without network reductions")
+            self.edgeGebc = np.zeros(self.csr.nEdges, dtype=float)
+        if reduction is not None:
+            self.reduceNetwork(reduction)
+        self.labelComponents()
+
+        self.symmetry = symmetry
+        self.sourceWeights = None
+        if symmetry is not None:
+            if nSamples is not None or reduction is not None\
+                    or edgeBetweenness:
+                raise ValueError("symmetry classes are only used for exact "
+                                 "vertex gebc, without network reductions")
+            self.findSymmetryClasses(symmetry)
+
+        self.accumulatorFiles = accumulatorFiles
+        self.accumulatorType = np.dtype(accumulatorType)
+        if accumulatorFiles is not None:
+            if nSamples is not None:
+                raise ValueError("accumulator files are only used for "
+                                 "exact gebc")
+            if self.accumulatorType not in (np.float32, np.float64):
+                raise ValueError("accumulatorType must be float32 or "
+                                 "float64")
+            self.mapAccumulators()
+
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            if nSamples is not None or parallel and backend != "mpi":
+                raise ValueError("checkpoints are only available for "
+                                 "exact gebc, serially or on the mpi "
+                                 "backend")
+            self.startCheckpoints(checkpointInterval, resume, reduction)
+
+        if nSamples is not None:
+            if parallel and backend != "mpi":
+                raise ValueError("source sampling runs serially or "
+                                 "on the mpi backend")
+            self.computeGebc_sampled(nSamples, sampling, batchSize,
+                                     stableTop, confidence, seed, parallel,
+                                     certifiedTop)
+        elif not parallel:
+            self.computeGebc_serial()
+        elif backend == "mpi":
             self.computeGebc_parallel()
+        elif backend == "multiprocessing":
+            self.computeGebc_multiprocessing(nProcesses)
         else:
-            self.computeGebc_serial()
+            raise ValueError(f"unknown parallel backend: {backend}")
+
+        if accumulatorFiles is not None:
+            self.unmapAccumulators()
+        if reduction is not None:
+            self.restoreNetwork()
+        if symmetry is not None:
+            self.averageOverClasses()
+
+    @classmethod
+    def bareAnalyzer(cls, csr, gebc, engine, vertexWeights=None,
+                     edgeGebc=None, edgeLengths=None, sourceWeights=None,
+                     storeDag=True):
+        """Analyzer of csr that adds the contributions of the sources
+        it is given to the accumulators gebc and edgeGebc, and
+        computes nothing on construction: for the workers of the
+        multiprocessing backend, where csr and the accumulators are
+        views of shared memory, and for edge deletion."""
+        analyzer = cls.__new__(cls)
+        analyzer.csr = csr
+        analyzer.nVertices = csr.nVertices
+        analyzer.gebc = gebc
+        analyzer.edgeGebc = edgeGebc
+        analyzer.vertexWeights = vertexWeights
+        analyzer.edgeLengths = edgeLengths
+        analyzer.sourceWeights = sourceWeights
+        analyzer.storeDag = storeDag
+        analyzer.selectEngine(engine)
+        analyzer.labelComponents()
+        return analyzer
+
+    def selectEngine(self, engine):
+        self.engine = engine
+        self.spmvMatrix = None  # (csr, sparse matrix), see csrMatrix
+        if engine == "brandes":
+            self.computeGebcFromSource = self.computeGebcFromSource_brandes
+        elif engine == "paths":
+            self.computeGebcFromSource = self.computeGebcFromSource_paths
+        elif engine == "dijkstra":
+            if self.edgeLengths is None:
+                raise ValueError("the dijkstra engine requires coordinates")
+            self.computeGebcFromSource = self.computeGebcFromSource_brandes
+        elif engine in BATCH_ENGINES:
+            if engine == "spmv" and adjacencyMatrix is None:
+                raise ImportError("the spmv engine requires scipy")
+            self.computeGebcFromSource = self.computeGebcFromSource_batch
+        else:
+            raise ValueError(f"unknown gebc engine: {engine}")
+
+    def computeGebcFromSources(self, sources):
+        """Add the contributions of a list of sources to gebc; the
+        msbfs and spmv engines process them MAX_LANES at a time."""
+        if self.sourceWeights is not None:
+            # one source per symmetry class, for all the pairs of the
+            # sources of its class
+            for i, contribution in self.sourceContributions(
+                    sources, halfPairs=True):
+                self.gebc += self.sourceWeights[i] * contribution
+        elif self.engine in BATCH_ENGINES:
+            for start in range(0, len(sources), MAX_LANES):
+                self.gebc += self.batchDependencies(
+                    sources[start:start + MAX_LANES],
+                    edgeValues=self.edgeGebc).sum(axis=1)
+        else:
+            for i in sources:
+                self.computeGebcFromSource(i)
 
 
     def checkForSparseLabels(self):
@@ -72,56 +409,628 @@ class GeodesicEdgeBetweennessCentrality:
         if self.sparseLabels:
             self.adjList, self.consecutiveLabelsToSparseLabels =\
                 renumberKeysAndValuesFrom0(self.adjList)
+        else:
+            self.consecutiveLabelsToSparseLabels = None
+
+
+    def reduceNetwork(self, reduction):
+        """From here on, until restoreNetwork, the analyzer works on a
+        reduced network: the core left by tree pruning
+        (reduction="trees") or the disjoint union of the biconnected
+        blocks (reduction="blocks"). Each of its vertices stands for
+        a vertex of the network, weighted by the number of vertices
+        it represents."""
+        if self.engine in ("paths", "dijkstra"):
+            raise ValueError(f"network reduction ({reduction}) requires the "
+                             "brandes, msbfs or spmv engine")
+        if not self.csr.isSymmetric():
+            raise ValueError(f"network reduction ({reduction}) requires a "
+                             "symmetric network")
+        self.fullCsr = self.csr
+        if reduction == "trees":
+            self.reducedVertices, self.vertexWeights, self.cutTerms =\
+                pruneTrees(self.csr)
+            self.csr = self.csr.subgraph(self.reducedVertices)
+        elif reduction == "blocks":
+            self.csr, self.reducedVertices, self.vertexWeights,\
+                self.cutTerms = decomposeBlocks(self.csr)
+        else:
+            raise ValueError(f"unknown network reduction: {reduction}")
+        self.nVertices = self.csr.nVertices
+        self.gebc = np.zeros(self.nVertices, dtype=float)
+        if self.me == 0:
+            print(f"vertices in the reduced network: {self.nVertices}")
 
+    def restoreNetwork(self):
+        """Add the gebc of the reduced network to the cut terms; a
+        cut vertex may appear several times in the union of the
+        blocks."""
+        self.gebc, self.gebcError = self.restoredValues(self.gebc,
+                                                        self.gebcError)
+        self.csr = self.fullCsr
+        self.nVertices = self.csr.nVertices
+        self.vertexWeights = None
+        del self.fullCsr, self.reducedVertices, self.cutTerms
+        self.labelComponents()
+
+    def restoredValues(self, gebc, gebcError=None):
+        """gebc of the network, and the half widths of its confidence
+        intervals if given, from those of the reduced network."""
+        restored = self.cutTerms.copy()
+        np.add.at(restored, self.reducedVertices, gebc)
+        if gebcError is None:
+            return restored, None
+        # the cut terms are exact; the errors of the copies of a vertex
+        # are combined in quadrature
+        variance = np.zeros_like(restored)
+        np.add.at(variance, self.reducedVertices, gebcError**2)
+        return restored, np.sqrt(variance)
+
+    def findSymmetryClasses(self, symmetry):
+        """Classes of equivalent vertices, symmetry="twins" or
+        "orbits" (see vertexSymmetry.py); only the first vertex of
+        each class is used as a source, with the size of its class as
+        weight."""
+        if self.engine in ("paths", "dijkstra"):
+            raise ValueError("symmetry classes require the brandes, msbfs "
+                             "or spmv engine")
+        if not self.csr.isSymmetric():
+            raise ValueError("symmetry classes require a symmetric network")
+        if symmetry == "twins":
+            self.symmetryClasses = twinClasses(self.csr)
+        elif symmetry == "orbits":
+            self.symmetryClasses = automorphismOrbits(self.csr)
+        else:
+            raise ValueError(f"unknown symmetry classes: {symmetry}")
+        self.classSizes = np.bincount(self.symmetryClasses)
+        _, firstVertices = np.unique(self.symmetryClasses,
+                                     return_index=True)
+        self.sourceWeights = np.zeros(self.nVertices)
+        self.sourceWeights[firstVertices] = self.classSizes
+        if self.me == 0:
+            print(f"sources left by {symmetry}: {len(firstVertices)}")
+
+    def averageOverClasses(self):
+        """gebc is the same on all the vertices of a symmetry class:
+        the mean of the sums of the sources over the class."""
+        sums = np.bincount(self.symmetryClasses, weights=self.gebc)
+        self.gebc = (sums / self.classSizes)[self.symmetryClasses]
+
+    def mapAccumulators(self):
+        """From here on, until unmapAccumulators, gebc and edge gebc
+        are views of the np.memmap file accumulatorFiles_rank<rank>.dat
+        of this rank."""
+        width = self.nVertices
+        if self.edgeGebc is not None:
+            width += self.csr.nEdges
+        self.accumulatorMap = np.memmap(
+            f"{self.accumulatorFiles}_rank{self.me}.dat",
+            dtype=self.accumulatorType, mode="w+", shape=width)
+        self.accumulatorMap[:self.nVertices] = self.gebc
+        self.gebc = self.accumulatorMap[:self.nVertices]
+        if self.edgeGebc is not None:
+            self.accumulatorMap[self.nVertices:] = self.edgeGebc
+            self.edgeGebc = self.accumulatorMap[self.nVertices:]
+
+    def unmapAccumulators(self):
+        """Read gebc and edge gebc back into memory, and remove the
+        file of mapAccumulators."""
+        self.gebc = np.array(self.gebc, dtype=float)
+        if self.edgeGebc is not None:
+            self.edgeGebc = np.array(self.edgeGebc, dtype=float)
+        fileName = self.accumulatorMap.filename
+        del self.accumulatorMap
+        os.remove(fileName)
+
+    def labelComponents(self):
+        """Label the connected components up front, so that only
+        the pairs of vertices within the same component are
+        processed. componentMembers lists the vertices of each
+        component in increasing order, component c taking the slice
+        componentStarts[c]:componentStarts[c+1]."""
+        self.nComponents, self.componentLabels =\
+            self.csr.connectedComponents()
+        self.componentSizes = np.bincount(self.componentLabels,
+                                          minlength=self.nComponents)
+        self.componentStarts = np.zeros(self.nComponents + 1,
+                                        dtype=np.int64)
+        np.cumsum(self.componentSizes, out=self.componentStarts[1:])
+        self.componentMembers = np.argsort(self.componentLabels,
+                                           kind="stable")
+
+    def targetsInComponent(self, i):
+        """The vertices j > i in the component of i."""
+        label = self.componentLabels[i]
+        members = self.componentMembers[self.componentStarts[label]:
+                                        self.componentStarts[label + 1]]
+        return members[np.searchsorted(members, i, side="right"):]
+
+    def startCheckpoints(self, interval, resume, reduction):
+        """Rank 0 merges the files of the previous run, if resuming,
+        and saves them as its file of the new generation, before the
+        other ranks can save theirs."""
+        self.checkpointInterval = interval
+        edges = self.edgeGebc is not None
+        self.checkpointMetadata = {"nVertices": self.nVertices,
+                                   "engine": self.engine,
+                                   "reduction": reduction or "",
+                                   "symmetry": self.symmetry or "",
+                                   "edgeBetweenness": edges}
+        self.completedSources = np.zeros(self.nVertices, dtype=bool)
+        self.checkpointGeneration = None
+        if self.me == 0:
+            if resume:
+                nEdges = self.csr.nEdges if edges else None
+                generation, self.completedSources, gebc, edgeGebc =\
+                    loadCheckpoints(self.checkpoint, self.nVertices,
+                                    self.checkpointMetadata, nEdges)
+                self.gebc += gebc
+                if edgeGebc is not None:
+                    self.edgeGebc += edgeGebc
+                print(f"resuming from {self.checkpoint}: "
+                      f"{self.completedSources.sum()} sources completed")
+            else:
+                generation = latestGeneration(self.checkpoint)
+            self.checkpointGeneration = generation + 1
+            self.writeCheckpoint()
+            removeStaleCheckpoints(self.checkpoint,
+                                   self.checkpointGeneration)
+        if self.comm is not None:
+            self.checkpointGeneration = self.comm.bcast(
+                self.checkpointGeneration, root=0)
+        self.lastCheckpoint = time.monotonic()
+
+    def writeCheckpoint(self):
+        saveCheckpoint(self.checkpoint, self.me, self.checkpointGeneration,
+                       self.completedSources, self.gebc,
+                       self.checkpointMetadata, self.edgeGebc)
+        self.lastCheckpoint = time.monotonic()
+
+    def pendingSources(self):
+        if self.sourceWeights is None:
+            sources = np.arange(self.nVertices)
+        else:
+            sources = np.flatnonzero(self.sourceWeights)
+        if self.checkpoint is None:
+            return sources
+        return sources[~self.completedSources[sources]]
+
+    def processSources(self, sources):
+        """Add the contributions of sources, MAX_LANES at a time,
+        and every checkpointInterval seconds, save a checkpoint."""
+        for start in range(0, len(sources), MAX_LANES):
+            batch = sources[start:start + MAX_LANES]
+            self.computeGebcFromSources(batch)
+            if self.checkpoint is None:
+                continue
+            self.completedSources[batch] = True
+            if time.monotonic() - self.lastCheckpoint\
+                    > self.checkpointInterval:
+                self.writeCheckpoint()
 
     def computeGebc_serial(self):
         if self.me == 0:
-            for i in range(self.minVertex, self.minVertex+self.nVertices):
-                for j in range(i+1, self.minVertex+self.nVertices):
-                    # this condition avoids double computations
-                    self.computeGebcOfVerticesBetweenIandJ(i, j)
+            self.processSources(self.pendingSources().tolist())
+            if self.checkpoint is not None:
+                self.writeCheckpoint()
 
     def computeGebc_parallel(self):
-        """use blocking communication!
+        """Dynamic scheduling: rank 0 owns a SourceScheduler and
+        answers the requests of the other ranks with chunks of
+        source vertices, most expensive first. Between two rounds
+        of requests, rank 0 computes the cheapest remaining source
+        itself. Each worker asks for its next chunk before starting
+        the current one, so that a reply is usually waiting for it.
+        Use blocking communication!
         non-blocking comm leaks memory severely"""
-        max = self.minVertex + self.nVertices
         if self.me == 0:
-            count = 0
-            n = self.nRanks - 1
-            maxVertex = max-1
-            for i in range(self.minVertex, max):
-                if i == maxVertex:
-                    # the condition i < j is no longer
-                    # realized after this point
-                    self.sendPoisonPill()
-                    break
-                destRank = count % n + 1
-                self.comm.send(i, dest=destRank)
-                count += 1
-        else:
-            i = self.comm.recv(source=0)
+            sources = self.pendingSources()
+            scheduler = SourceScheduler(sources,
+                                        self.estimateSourceCosts()[sources],
+                                        self.nRanks)
+            activeWorkers = self.nRanks - 1
+            status = MPI.Status()
+            i = 0
             while i is not None:
-                for j in range(i+1, max):
-                    # this condition avoids double computations
-                    self.computeGebcOfVerticesBetweenIandJ(i, j)
-                    # print(f"{i}, {j}", flush=True)
-                i = self.comm.recv(source=0)
-            print(f"rank: {self.me}, completed vertex: {i}", flush=True)
+                while self.comm.Iprobe(source=MPI.ANY_SOURCE,
+                                       tag=REQUEST_TAG, status=status):
+                    activeWorkers -= self.serveRequest(
+                        status.Get_source(), scheduler)
+                i = scheduler.nextCheapSource()
+                if i is not None:
+                    self.processSources([i])
+            # no sources left: stop the workers as they ask for more
+            while activeWorkers:
+                self.comm.recv(source=MPI.ANY_SOURCE, tag=REQUEST_TAG,
+                               status=status)
+                self.comm.send(None, dest=status.Get_source(), tag=WORK_TAG)
+                activeWorkers -= 1
+        else:
+            self.comm.send(None, dest=0, tag=REQUEST_TAG)
+            chunk = self.comm.recv(source=0, tag=WORK_TAG)
+            while chunk is not None:
+                self.comm.send(None, dest=0, tag=REQUEST_TAG)
+                self.processSources(chunk)
+                chunk = self.comm.recv(source=0, tag=WORK_TAG)
+            print(f"rank: {self.me}, no sources left", flush=True)
+        if self.checkpoint is not None:
+            self.writeCheckpoint()
         self.aggregateGebc()
 
-    def sendPoisonPill(self):
-        for rank in range(1, self.nRanks):
-            print("sending poison to: ", rank)
-            self.comm.send(None, dest=rank)
+    def computeGebc_multiprocessing(self, nProcesses=None):
+        """Local pool of processes (all cores by default); within an
+        MPI job, only rank 0 runs the pool."""
+        if self.me == 0:
+            sums = computeGebcInPool(self, nProcesses)
+            self.gebc += sums[:self.nVertices]
+            if self.edgeGebc is not None:
+                self.edgeGebc += sums[self.nVertices:]
+
+    def computeGebc_sampled(self, nSamples, sampling="uniform",
+                            batchSize=None, stableTop=None,
+                            confidence=0.95, seed=None, parallel=True,
+                            certifiedTop=None):
+        """Estimate gebc from (at most) nSamples sources. In MPI runs,
+        all ranks draw the same batches and share out their sources;
+        the per-stratum sums are then added up on all ranks, so that
+        every rank holds the current estimate, and stop at the same
+        batch."""
+        if self.engine == "paths":
+            raise ValueError("source sampling requires the brandes, "
+                             "msbfs, spmv or dijkstra engine")
+        if sampling == "uniform":
+            strata = np.zeros(self.nVertices, dtype=np.int64)
+        elif sampling == "degree":
+            _, strata = np.unique(self.csr.degrees(), return_inverse=True)
+        else:
+            raise ValueError(f"unknown sampling scheme: {sampling}")
+
+        if parallel and self.comm is not None:
+            if seed is None:
+                seed = np.random.SeedSequence().entropy
+            seed = self.comm.bcast(seed, root=0)
+            me, nRanks = self.me, self.nRanks
+        elif self.me == 0:
+            me, nRanks = 0, 1
+        else:
+            return
+
+        # on symmetric networks, every pair is counted from both ends
+        # with weight 1/2, which spreads the pair sum evenly over the
+        # sources; otherwise, the pair (i, j) is counted from i < j
+        halfPairs = self.csr.isSymmetric()
+
+        sampler = SourceSampler(strata, self.nVertices,
+                                np.random.default_rng(seed))
+        if batchSize is None:
+            batchSize = nSamples if stableTop is None\
+                and certifiedTop is None else max(nSamples // 10, 1)
+        topVertices = None
+        stableBatches = 0
+        self.topCertified = False
+        while sampler.nSampled() < nSamples and not sampler.exhausted():
+            batch = sampler.nextBatch(
+                min(batchSize, nSamples - sampler.nSampled()))
+            sums = np.zeros((sampler.nStrata, self.nVertices))
+            squares = np.zeros((sampler.nStrata, self.nVertices))
+            for i, contribution in self.sourceContributions(
+                    batch[me::nRanks], halfPairs):
+                sums[strata[i]] += contribution
+                squares[strata[i]] += contribution**2
+            if nRanks > 1:
+                self.comm.Allreduce(MPI.IN_PLACE, sums, op=MPI.SUM)
+                self.comm.Allreduce(MPI.IN_PLACE, squares, op=MPI.SUM)
+            sampler.addBatch(sums, squares)
+            self.gebc, self.gebcError = sampler.estimate(confidence)
+            if stableTop is not None:
+                previousTop = topVertices
+                topVertices = set(np.argsort(-self.gebc, kind="stable")
+                                  [:stableTop].tolist())
+                stableBatches = stableBatches + 1\
+                    if topVertices == previousTop else 0
+                if stableBatches == STABLE_BATCHES_TO_STOP:
+                    break
+            if certifiedTop is not None:
+                self.topCertified = self.certifiesTop(sampler, confidence,
+                                                      certifiedTop)
+                if self.topCertified:
+                    break
+        self.nSampledSources = sampler.nSampled()
+        if self.me == 0:
+            print(f"sampled sources: {self.nSampledSources}")
+            if certifiedTop is not None:
+                print(f"top {certifiedTop} certified: {self.topCertified}")
+
+    def certifiesTop(self, sampler, confidence, k):
+        """True if the current sample separates the k top-ranked
+        vertices of the network from the others, with intervals that
+        hold simultaneously at the given confidence; after a network
+        reduction, the vertices of the whole network are ranked."""
+        if sampler.exhausted():
+            return True
+        reduced = self.vertexWeights is not None
+        nVertices = self.fullCsr.nVertices if reduced else self.nVertices
+        gebc, gebcError = sampler.estimate(
+            simultaneousConfidence(confidence, nVertices))
+        if reduced:
+            gebc, gebcError = self.restoredValues(gebc, gebcError)
+        return separatesTop(gebc, gebcError, k)
+
+    def serveRequest(self, rank, scheduler):
+        """Answer a request for work from rank. Return 1 if the rank
+        was told to stop, 0 otherwise."""
+        self.comm.recv(source=rank, tag=REQUEST_TAG)
+        chunk = scheduler.nextChunk()
+        self.comm.send(chunk, dest=rank, tag=WORK_TAG)
+        return chunk is None
+
+    def estimateSourceCosts(self):
+        """A BFS from i visits the edges of the connected
+        component of i: the Brandes engine runs one BFS per source,
+        the paths engine one BFS per pair (i, j > i), restricted to
+        the j in the same component as i."""
+        labels = self.componentLabels
+        edgesInComponent = np.bincount(
+            labels, weights=self.csr.degrees(), minlength=self.nComponents)
+        costs = edgesInComponent[labels] + 1.0
+        if self.engine == "paths":
+            # number of vertices j > i in the component of i
+            rank = np.empty(self.nVertices, dtype=np.int64)
+            rank[self.componentMembers] = np.arange(self.nVertices)\
+                - np.repeat(self.componentStarts[:-1], self.componentSizes)
+            remainingPairs = self.componentSizes[labels] - 1 - rank
+            costs *= remainingPairs + 1.0
+        return costs
 
     def aggregateGebc(self):
         for rank in range(1, self.nRanks):
-            if self.me == 0:
-                gebcFromRank = np.empty(self.nVertices, dtype=float)
-                self.comm.Recv(gebcFromRank, source=rank)
-                self.gebc += gebcFromRank
+            for sums in (self.gebc, self.edgeGebc):
+                if sums is None:
+                    continue
+                if self.me == 0:
+                    sumsFromRank = np.empty(len(sums), dtype=sums.dtype)
+                    self.comm.Recv(sumsFromRank, source=rank)
+                    sums += sumsFromRank
+                else:
+                    self.comm.Send(sums, dest=0)
+
+    def computeGebcFromSource_paths(self, i):
+        # j > i avoids double computations; vertices in other
+        # components are unreachable and skipped without a BFS
+        for j in self.targetsInComponent(i).tolist():
+            self.computeGebcOfVerticesBetweenIandJ(i, j)
+            # print(f"{i}, {j}", flush=True)
+
+    def computeGebcFromSource_brandes(self, i):
+        """Add the contribution of all pairs (i, j > i) to gebc,
+        without enumerating the geodesic paths. The dependency of i
+        on vertex v is accumulated backward, from the farthest
+        vertices to i:
+
+            delta(v) = sum_(w: v parent of w) sigma(v)/sigma(w)
+                       * ([w > i] + delta(w))
+
+        where [w > i] is 1 if w is a target of the pair sum, 0
+        otherwise."""
+        self.gebc += self.sourceDependencies(i, edgeValues=self.edgeGebc)
+
+    def computeGebcFromSource_batch(self, i):
+        self.computeGebcFromSources([i])
+
+    def sourceContributions(self, sources, halfPairs=False):
+        """Yield each source with its contribution to gebc."""
+        if self.engine in BATCH_ENGINES:
+            for start in range(0, len(sources), MAX_LANES):
+                batch = sources[start:start + MAX_LANES]
+                delta = self.batchDependencies(batch, halfPairs)
+                for k, i in enumerate(batch):
+                    yield i, delta[:, k]
+        else:
+            for i in sources:
+                yield i, self.sourceDependencies(i, halfPairs)
+
+    def sourceDependencies(self, i, halfPairs=False, edgeValues=None):
+        """Contribution of source i to gebc, from the pairs (i, j > i)
+        or, with halfPairs, from all the pairs (i, j) with weight 1/2.
+        After a network reduction, the pair is also weighted by the
+        vertex weights of i and j. The contribution to edge gebc is
+        added to edgeValues, if given (without reductions only)."""
+        if halfPairs:
+            pairWeights = np.full(self.nVertices, 0.5)
+        else:
+            pairWeights = np.arange(self.nVertices) > i
+        if self.vertexWeights is not None:
+            pairWeights = pairWeights * self.vertexWeights
+        if self.edgeLengths is None:
+            distance, sigma, dagLevels = shortestPathDag(
+                self.csr, i, storeDag=self.storeDag)
+        else:
+            distance, sigma, dagLevels = weightedShortestPathDag(
+                self.csr, self.edgeLengths, i)
+        delta = accumulateDependencies(sigma, dagLevels, pairWeights,
+                                       edgeValues)
+        delta[i] = 0
+        if self.vertexWeights is not None:
+            delta *= self.vertexWeights[i]
+        return delta
+
+    def batchDependencies(self, sources, halfPairs=False, edgeValues=None):
+        """Same as sourceDependencies, for up to MAX_LANES sources
+        at once: column k is the contribution of sources[k]."""
+        sources = np.asarray(sources, dtype=np.int64)
+        lanes = np.arange(len(sources))
+        if halfPairs:
+            targetWeights = np.full(self.nVertices, 0.5)
+            minTargets = np.full(len(sources), -1)
+        else:
+            targetWeights = np.ones(self.nVertices)
+            minTargets = sources
+        if self.vertexWeights is not None:
+            targetWeights = targetWeights * self.vertexWeights
+        if self.engine == "spmv":
+            sigma, depth, levels = levelPathCounts(self.csrMatrix(), sources)
+            delta = levelDependencies(sigma, depth, levels,
+                                      targetWeights, minTargets)
+        else:
+            sigma, dagLevels = multiSourceDag(self.csr, sources,
+                                              self.storeDag)
+            delta = accumulateMultiSourceDependencies(
+                sigma, dagLevels, targetWeights, minTargets, edgeValues)
+        delta[sources, lanes] = 0
+        if self.vertexWeights is not None:
+            delta *= self.vertexWeights[sources]
+        return delta
+
+    def csrMatrix(self):
+        """Sparse matrix of csr for the spmv engine, built once per
+        network: it is only rebuilt after csr was replaced (network
+        reduction and restoration, edge removal)."""
+        if self.spmvMatrix is None or self.spmvMatrix[0] is not self.csr:
+            self.spmvMatrix = (self.csr, adjacencyMatrix(self.csr))
+        return self.spmvMatrix[1]
+
+    def removeEdges(self, edges):
+        """Remove edges from the network and update gebc, and edge
+        gebc if computed (see edgeDeletion)."""
+        self.csr, self.gebc, self.edgeGebc, self.allPairs =\
+            self.edgeDeletion(edges)
+        self.labelComponents()
+
+    def gebcWithoutEdges(self, edges):
+        """What-if version of removeEdges: return gebc and edge gebc
+        (None if not computed) of the network without edges, and
+        leave the analyzer unchanged."""
+        _, gebc, edgeGebc, _ = self.edgeDeletion(edges)
+        return gebc, edgeGebc
+
+    def edgeDeletion(self, edges):
+        """edges is a list of (v, w) pairs of vertex labels; for each
+        pair, one edge from v to w and, if there is one, one edge from
+        w to v (the other half of a bond) are removed. The current
+        values of gebc must be exact and complete (rank 0 of MPI
+        runs).
+
+        On networks of up to ALL_PAIRS_MAX_VERTICES vertices, only the
+        pairs of vertices with a geodesic through a removed edge are
+        updated, from the distances and numbers of geodesics between
+        all pairs, computed on the first call and kept up to date by
+        removeEdges (see edgeDeletion.py). On larger networks, the
+        affected sources are recomputed instead (see updateSources).
+
+        Return the new CsrAdjacency, gebc, edgeGebc and all-pairs
+        arrays (None on large networks)."""
+        if self.gebcError is not None:
+            raise ValueError("edge deletion requires exact gebc")
+        if self.edgeLengths is not None:
+            raise ValueError("edge deletion is not available for the "
+                             "dijkstra engine")
+        edgeIds = self.edgeIdsBetween(edges)
+        csr = self.csr.withoutEdges(edgeIds)
+        kept = np.ones(self.csr.nEdges, dtype=bool)
+        kept[edgeIds] = False
+        if self.nVertices > ALL_PAIRS_MAX_VERTICES:
+            gebc, edgeGebc = self.updateSources(csr, edgeIds, kept)
+            return csr, gebc, edgeGebc, None
+
+        if self.allPairs is None:
+            self.allPairs = allPairsPaths(self.csr)
+        distance, sigma = self.allPairs
+        tails = np.searchsorted(self.csr.indptr, edgeIds, side="right") - 1
+        sources, targets = np.nonzero(affectedPairs(
+            distance, tails, self.csr.indices[edgeIds]))
+        newDistance, newSigma = updatePaths(csr, distance, sigma,
+                                            sources, targets)
+        # the gebc sum runs on the pairs (i, j > i)
+        upper = sources < targets
+        sources, targets = sources[upper], targets[upper]
+        oldEdges = newEdges = edgeGebc = None
+        if self.edgeGebc is not None:
+            oldEdges = np.zeros(self.csr.nEdges, dtype=float)
+            newEdges = np.zeros(csr.nEdges, dtype=float)
+        gebc = self.gebc\
+            - pairDependencies(self.csr, distance, sigma, sources,
+                               targets, oldEdges)\
+            + pairDependencies(csr, newDistance, newSigma, sources,
+                               targets, newEdges)
+        if self.edgeGebc is not None:
+            edgeGebc = (self.edgeGebc - oldEdges)[kept] + newEdges
+        return csr, gebc, edgeGebc, (newDistance, newSigma)
+
+    def updateSources(self, csr, edgeIds, kept):
+        """Edge deletion on large networks. A source is affected only
+        if a removed edge lies on its geodesic DAG; the geodesics from
+        the other sources, and their contributions, do not change.
+        The contributions of the affected sources are computed before
+        and after the removal, and their difference is applied. If
+        more than half of the sources are affected, all the sources
+        are computed on the new network instead, which is cheaper.
+        Return gebc and edgeGebc of csr, the network without the
+        edges."""
+        affected = self.sourcesThroughEdges(edgeIds).tolist()
+        if 2 * len(affected) > self.nVertices:
+            gebc = np.zeros(self.nVertices, dtype=float)
+            edgeGebc = None if self.edgeGebc is None\
+                else np.zeros(csr.nEdges, dtype=float)
+            self.bareAnalyzer(csr, gebc, self.engine, edgeGebc=edgeGebc,
+                              storeDag=self.storeDag)\
+                .computeGebcFromSources(list(range(self.nVertices)))
+            return gebc, edgeGebc
+
+        gebc = self.gebc.copy()
+        edgeGebc = None
+        for network, sign in ((self.csr, -1), (csr, 1)):
+            contributions = np.zeros(self.nVertices, dtype=float)
+            edgeContributions = None if self.edgeGebc is None\
+                else np.zeros(network.nEdges, dtype=float)
+            self.bareAnalyzer(network, contributions, self.engine,
+                              edgeGebc=edgeContributions,
+                              storeDag=self.storeDag)\
+                .computeGebcFromSources(affected)
+            gebc += sign * contributions
+            if self.edgeGebc is None:
+                continue
+            if edgeGebc is None:
+                edgeGebc = (self.edgeGebc - edgeContributions)[kept]
             else:
-                self.comm.Send(self.gebc, dest=0)
+                edgeGebc += edgeContributions
+        return gebc, edgeGebc
+
+    def edgeIdsBetween(self, edges):
+        """Edge ids of the edges removed by edgeDeletion."""
+        vertexIndex = self.vertexIndices()
+        edgeIds = []
+        for labelV, labelW in edges:
+            v, w = vertexIndex[labelV], vertexIndex[labelW]
+            for tail, head, required in ((v, w, True), (w, v, False)):
+                candidates = self.csr.indptr[tail]\
+                    + np.flatnonzero(self.csr.neighbors(tail) == head)
+                candidates = [edgeId for edgeId in candidates.tolist()
+                              if edgeId not in edgeIds]
+                if candidates:
+                    edgeIds.append(candidates[0])
+                elif required:
+                    raise ValueError(f"no edge left between {labelV} "
+                                     f"and {labelW}")
+                if tail == head:
+                    break
+        return np.array(edgeIds, dtype=np.int64)
+
+    def sourcesThroughEdges(self, edgeIds):
+        """The sources s whose geodesic DAG contains one of the edges:
+        the edge (u, w) does if distance(s, w) = distance(s, u) + 1.
+        The distances to u and w come from two BFS on the reversed
+        network."""
+        tails = np.searchsorted(self.csr.indptr, edgeIds, side="right") - 1
+        heads = self.csr.indices[edgeIds]
+        transposed = self.csr.transposed()
+        distancesTo = {}
+        for vertex in set(tails.tolist()) | set(heads.tolist()):
+            distancesTo[vertex], _, _ = shortestPathDag(transposed, vertex)
+        affected = np.zeros(self.nVertices, dtype=bool)
+        for u, w in zip(tails.tolist(), heads.tolist()):
+            affected |= (distancesTo[u] != -1)\
+                & (distancesTo[w] == distancesTo[u] + 1)
+        return np.flatnonzero(affected)
 
     def computeGebcOfVerticesBetweenIandJ(self, i, j):
         parents, visitedParents = self.BFS(i, j)
@@ -184,7 +1093,11 @@ class GeodesicEdgeBetweennessCentrality:
                     # print("Parent is a leaf (startVertex)."
                     #       + "\n\t************ Print path:", path)
                     # print("\tPop ", vertex)
-                    self.updateGebcOfVerticesInGeodesicPath(path, endVertex)
+                    # All parents of vertex are startVertex, one for
+                    # each edge between them: one path per edge
+                    for _ in parents[vertex]:
+                        self.updateGebcOfVerticesInGeodesicPath(
+                            path, endVertex)
                     visited[vertex][index] = True
                     path.pop()
                     break
@@ -193,7 +1106,7 @@ class GeodesicEdgeBetweennessCentrality:
                     visited[vertex][index] = True
                     # print(f"{parent} pushed on the path")
                     break
-                if parent == parents[vertex][-1]:
+                if index == len(parents[vertex]) - 1:
                     path.pop()
                     visited[vertex] = [
                         False for _ in range(len(visited[vertex]))
@@ -228,36 +1141,19 @@ class GeodesicEdgeBetweennessCentrality:
         # At this stage, encode this information in a list containing
         # the parent vertices of each vertex on each path.
 
-        parents = {}
-        visitedParents = {}  # for geodesic path reconstruction later
-        distance = {}  # from startVertex
-        queue = []
-        visited = np.zeros(self.nVertices, dtype=int)
-
-        queue.append(startVertex)
-        visited[startVertex] = 1
-        distance[startVertex] = 0
-        parents[startVertex] = [startVertex]
-        visitedParents[startVertex] = [False]
-
-        while queue:
-            currentVertex = queue.pop(0)
-            if currentVertex == endVertex:
-                break
-            for adjVertex in self.adjList[currentVertex]:
-                if not visited[adjVertex]:
-                    queue.append(adjVertex)
-                    distance[adjVertex] = distance[currentVertex] + 1
-                    parents[adjVertex] = [currentVertex]
-                    visitedParents[adjVertex] = [False]
-                    visited[adjVertex] = 1
-                # If the neighbor adjVertex has been visited already,
-                # then it has a parent. If this parent has the same distance
-                # from startVertex as currentVertex, then currentVertex is also
-                # a parent of adjVertex
-                elif distance[parents[adjVertex][0]] == distance[currentVertex]:
-                    parents[adjVertex].append(currentVertex)
-                    visitedParents[adjVertex].append(False)
+        # The BFS itself runs on the CSR arrays and stops at the
+        # level of endVertex; the geodesic DAG is then converted
+        # to lists of parents.
+
+        parents = {startVertex: [startVertex]}
+        visitedParents = {startVertex: [False]}  # for path reconstruction
+
+        _, _, dagLevels = shortestPathDag(self.csr, startVertex, endVertex)
+        for _, levelParents, levelChildren in dagLevels:
+            for parent, child in zip(levelParents.tolist(),
+                                     levelChildren.tolist()):
+                dictWithLists(parents, child, parent)
+                dictWithLists(visitedParents, child, False)
         return parents, visitedParents
 
     def printJson(self, fileName, normalize=True):
@@ -269,16 +1165,108 @@ class GeodesicEdgeBetweennessCentrality:
         """
         if self.me == 0:
             if normalize:
-                self.gebc /= max(self.gebc)
-            gebc = {}
-            if self.consecutiveLabelsToSparseLabels:
-                for index, value in enumerate(self.gebc):
-                    gebc[self.consecutiveLabelsToSparseLabels[index]] = value
-            else:
-                for index, value in enumerate(self.gebc):
-                    gebc[index] = value
-            printJson(gebc, fileName)
+                maxGebc = max(self.gebc)
+                self.gebc /= maxGebc
+                if self.gebcError is not None:
+                    self.gebcError /= maxGebc
+            printJson(self.labelValues(self.gebc), fileName)
+
+    def printErrorsJson(self, fileName):
+        """Same as printJson, for the half widths of the confidence
+        intervals of sampled gebc (normalized if gebc was)."""
+        if self.me == 0:
+            printJson(self.labelValues(self.gebcError), fileName)
+
+    def pairEdgeGebc(self):
+        """Edge gebc summed over the repeated edges between two
+        vertices and, on symmetric networks, over both directions of
+        an edge. Return three arrays: tails, heads (tails < heads on
+        symmetric networks) and values."""
+        tails = np.repeat(np.arange(self.nVertices, dtype=np.int64),
+                          self.csr.degrees())
+        heads = self.csr.indices.astype(np.int64)
+        if self.csr.isSymmetric():
+            tails, heads = np.minimum(tails, heads), np.maximum(tails, heads)
+        pairs, edgePairs = np.unique(tails * self.nVertices + heads,
+                                     return_inverse=True)
+        values = np.bincount(edgePairs, weights=self.edgeGebc,
+                             minlength=len(pairs))
+        return pairs // self.nVertices, pairs % self.nVertices, values
+
+    def printEdgesJson(self, fileName, normalize=True):
+        """Print pairEdgeGebc in json format, as a dict from
+        "tail label-head label" to edge gebc."""
+        if self.me == 0:
+            tails, heads, values = self.pairEdgeGebc()
+            if normalize:
+                values = values / values.max()
+            printJson({f"{tail}-{head}": value for tail, head, value in zip(
+                self.vertexLabels(tails), self.vertexLabels(heads),
+                values.tolist())}, fileName)
+
+    def printNpz(self, fileName, normalize=True):
+        """Columnar binary alternative to printJson (see helper_npz.py):
+        arrays ids (the original vertex labels) and gebc, and gebcError
+        for sampled gebc; self.gebc is left unchanged."""
+        if self.me == 0:
+            scale = max(self.gebc) if normalize else 1
+            columns = {"ids": np.asarray(self.vertexLabels(
+                np.arange(self.nVertices))), "gebc": self.gebc / scale}
+            if self.gebcError is not None:
+                columns["gebcError"] = self.gebcError / scale
+            printNpz(columns, fileName)
+
+    def printEdgesNpz(self, fileName, normalize=True):
+        """Same as printEdgesJson: arrays tails, heads (the labels of
+        the ends of each edge) and edgeGebc."""
+        if self.me == 0:
+            tails, heads, values = self.pairEdgeGebc()
+            if normalize:
+                values = values / values.max()
+            printNpz({"tails": np.asarray(self.vertexLabels(tails)),
+                      "heads": np.asarray(self.vertexLabels(heads)),
+                      "edgeGebc": values}, fileName)
+
+    def topRanking(self, k):
+        """Labels of the k vertices of highest gebc, in decreasing
+        order of gebc, and their gebc values (an array)."""
+        top = np.argsort(-self.gebc, kind="stable")[:k]
+        return self.vertexLabels(top), self.gebc[top]
+
+    def vertexPositions(self, coordinates):
+        """(nVertices, dimension) array of positions, from a dict from
+        the original vertex labels (int or str) to coordinates (lists
+        of numbers or of strings)."""
+        coordinates = {int(label): position
+                       for label, position in coordinates.items()}
+        return np.array([coordinates[label] for label in
+                         self.vertexLabels(np.arange(self.nVertices))],
+                        dtype=float)
+
+    def vertexLabels(self, vertices):
+        """list of the original labels of an array of vertices"""
+        if self.consecutiveLabelsToSparseLabels:
+            return [self.consecutiveLabelsToSparseLabels[vertex]
+                    for vertex in vertices.tolist()]
+        return (vertices + self.minVertex).tolist()
+
+    def vertexIndices(self):
+        """dict from the original vertex labels to vertices"""
+        vertices = np.arange(self.nVertices)
+        return dict(zip(self.vertexLabels(vertices), vertices.tolist()))
+
+    def labelValues(self, values):
+        """dict from the original vertex labels to values"""
+        labelled = {}
+        if self.consecutiveLabelsToSparseLabels:
+            for index, value in enumerate(values):
+                labelled[self.consecutiveLabelsToSparseLabels[index]] = value
+        else:
+            for index, value in enumerate(values):
+                labelled[index + self.minVertex] = value
+        return labelled
 
 
     def closeMPI(self):
-        MPI.Finalize()
+        if MPI is not None:
+            MPI.Finalize()
@@ -0,0 +1,57 @@
+'''
+Columnar binary result files: each column (vertex ids, gebc, ...) is a
+NumPy array, stored in an uncompressed .npz archive. Writing or
+reading them does not build a Python object per vertex, as json does,
+and since the archive is not compressed, its arrays can be
+memory-mapped where they lie in the file.
+'''
+
+import json
+import zipfile
+import numpy as np
+
+# size of the fixed part of a zip local file header
+ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def printNpz(columns, fileName):
+    """columns is a dict from column names to arrays of equal length"""
+    np.savez(fileName, **columns)
+
+
+def loadNpz(fileName, mmap=False):
+    """dict from column names to arrays; with mmap=True, read-only
+    memory maps of the file instead of arrays in memory"""
+    if not mmap:
+        with np.load(fileName) as archive:
+            return {key: archive[key] for key in archive.files}
+    columns = {}
+    with zipfile.ZipFile(fileName) as archive, open(fileName, "rb") as f:
+        for member in archive.infolist():
+            f.seek(member.header_offset + 26)
+            nameLength, extraLength = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(member.header_offset + ZIP_LOCAL_HEADER_SIZE
+                   + int(nameLength) + int(extraLength))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            else:
+                header = np.lib.format.read_array_header_2_0(f)
+            shape, fortranOrder, dtype = header
+            columns[member.filename[:-len(".npy")]] = np.memmap(
+                fileName, dtype=dtype, mode="r", offset=f.tell(),
+                shape=shape, order="F" if fortranOrder else "C")
+    return columns
+
+
+def loadGebc(fileName, mmap=False):
+    """Read the ids and gebc values of fileName.npz, as written by
+    GeodesicEdgeBetweennessCentrality.printNpz, or of fileName.json for
+    the results written before, as arrays."""
+    try:
+        columns = loadNpz(fileName + ".npz", mmap)
+    except FileNotFoundError:
+        with open(fileName + ".json", "r") as f:
+            gebc = json.load(f)
+        return np.array(list(gebc.keys())), np.array(list(gebc.values()))
+    return columns["ids"], columns["gebc"]
@@ -0,0 +1,141 @@
+'''
+Local parallel backend for the gebc computation, without MPI.
+
+The CSR arrays are copied once into multiprocessing.shared_memory
+blocks, which all the workers of a multiprocessing pool map without
+copying. Each worker also owns one row of a shared (nProcesses,
+nVertices) block of accumulators, where it adds the contributions of
+the sources it processes; the rows are summed at the end. With edge
+betweenness, each row has nEdges more entries, for edge gebc. If the
+analyzer has accumulatorFiles, the block of accumulators is a np.memmap
+file instead (see MemmapArray), of the analyzer's accumulatorType.
+
+Chunks of sources come from a SourceScheduler and are handed out by
+the pool on demand, so faster workers take more chunks.
+'''
+
+import os
+import numpy as np
+from multiprocessing import Pool, Value, shared_memory
+from csrAdjacency import CsrAdjacency
+from sourceScheduler import SourceScheduler
+
+# state of a worker process, set by initWorker
+worker = {}
+
+
+class SharedArray:
+    """A NumPy array in a shared memory block. Pickled as its
+    descriptor (name, shape, dtype), so that workers can attach to
+    it."""
+
+    def __init__(self, shape, dtype, name=None):
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        nBytes = max(int(np.prod(shape)) * self.dtype.itemsize, 1)
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True,
+                                                     size=nBytes)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(shape, dtype=self.dtype,
+                                buffer=self.memory.buf)
+
+    @classmethod
+    def copyOf(cls, array):
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    def __reduce__(self):
+        return (SharedArray, (self.shape, self.dtype.str, self.memory.name))
+
+    def release(self, unlink=False):
+        self.array = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+class MemmapArray:
+    """A NumPy array in a np.memmap file, used as a SharedArray:
+    pickled as (fileName, shape, dtype), so that workers can map it.
+    Its pages can be written back to the file and evicted, instead
+    of staying in memory."""
+
+    def __init__(self, fileName, shape, dtype, create=True):
+        self.fileName = fileName
+        self.shape = shape
+        self.dtype = np.dtype(dtype)
+        self.array = np.memmap(fileName, dtype=self.dtype,
+                               mode="w+" if create else "r+", shape=shape)
+
+    def __reduce__(self):
+        return (MemmapArray, (self.fileName, self.shape, self.dtype.str,
+                              False))
+
+    def release(self, unlink=False):
+        self.array = None
+        if unlink:
+            os.remove(self.fileName)
+
+
+def initWorker(analyzerClass, engine, vertexWeights, edgeLengths,
+               sourceWeights, storeDag, indptr, indices, accumulators,
+               nextSlot):
+    with nextSlot.get_lock():
+        slot = nextSlot.value
+        nextSlot.value += 1
+    # keep the shared blocks referenced for the lifetime of the worker
+    worker["shared"] = (indptr, indices, accumulators)
+    csr = CsrAdjacency(indptr.array, indices.array)
+    row = accumulators.array[slot]
+    edgeGebc = row[csr.nVertices:] if len(row) > csr.nVertices else None
+    worker["analyzer"] = analyzerClass.bareAnalyzer(
+        csr, row[:csr.nVertices], engine, vertexWeights, edgeGebc,
+        edgeLengths, sourceWeights, storeDag)
+
+
+def computeChunk(chunk):
+    worker["analyzer"].computeGebcFromSources(chunk)
+    return len(chunk)
+
+
+def computeGebcInPool(analyzer, nProcesses=None):
+    """Compute the contributions of all sources of analyzer in a
+    pool of nProcesses (default: all cores) and return their sum:
+    gebc, followed by edge gebc if analyzer computes it."""
+    if nProcesses is None:
+        nProcesses = os.cpu_count()
+    csr = analyzer.csr
+    sources = analyzer.pendingSources()
+    scheduler = SourceScheduler(sources,
+                                analyzer.estimateSourceCosts()[sources],
+                                nProcesses)
+    chunks = list(iter(scheduler.nextChunk, None))
+
+    indptr = SharedArray.copyOf(csr.indptr)
+    indices = SharedArray.copyOf(csr.indices)
+    width = csr.nVertices
+    if analyzer.edgeGebc is not None:
+        width += csr.nEdges
+    if analyzer.accumulatorFiles is None:
+        accumulators = SharedArray((nProcesses, width), float)
+    else:
+        accumulators = MemmapArray(f"{analyzer.accumulatorFiles}_pool.dat",
+                                   (nProcesses, width),
+                                   analyzer.accumulatorType)
+    accumulators.array[...] = 0
+    try:
+        with Pool(nProcesses, initializer=initWorker,
+                  initargs=(type(analyzer), analyzer.engine,
+                            analyzer.vertexWeights, analyzer.edgeLengths,
+                            analyzer.sourceWeights, analyzer.storeDag,
+                            indptr, indices, accumulators,
+                            Value("i", 0))) as pool:
+            for _ in pool.imap_unordered(computeChunk, chunks):
+                pass
+        return accumulators.array.sum(axis=0, dtype=float)
+    finally:
+        for shared in (indptr, indices, accumulators):
+            shared.release(unlink=True)
@@ -0,0 +1,119 @@
+'''
+Approximate gebc from a random sample of source vertices.
+
+The exact gebc is a sum over source vertices s of their contributions
+x_s(v) (see GeodesicEdgeBetweennessCentrality.sourceDependencies), so
+it can be estimated from a sample of sources, drawn without replacement.
+The vertices are split into strata (a single stratum for uniform
+sampling, or one stratum per vertex degree), and with N_h vertices in
+stratum h, of which n_h sampled, the estimate is
+
+    gebc(v) ~ sum_h N_h * mean_h(x_s(v))
+
+with variance
+
+    sum_h N_h^2 * (1 - n_h/N_h) * var_h(x_s(v)) / n_h
+
+where mean_h and var_h are the sample mean and variance in stratum h.
+The confidence intervals use the normal approximation, which holds
+well for the vertices with high gebc. Peripheral vertices are reached
+by the geodesics of few sources, so their x_s(v) are very skewed and,
+with small samples, their intervals are too narrow. Once all the
+sources of a stratum are drawn, its term is exact and its variance
+vanishes.
+
+To find the k top-ranked vertices only, sampling can stop as soon as
+the intervals separate them from the others (separatesTop): the
+lowest lower bound in the top k is above the highest upper bound
+outside. For the top k to be certified at a given confidence, the
+intervals of all the nVertices vertices must hold at once; by the
+union (Bonferroni) bound, it is enough that each of them holds at
+confidence 1 - (1 - confidence) / nVertices (simultaneousConfidence).
+
+Sources are drawn in batches, allocated to the strata in proportion to
+their sizes, with at least two sources per stratum (when available)
+so that all the variances can be estimated.
+'''
+
+import numpy as np
+from statistics import NormalDist
+
+
+class SourceSampler:
+
+    def __init__(self, strata, nVertices, rng):
+        """strata: stratum index (0, 1, ...) of each vertex."""
+        self.strata = np.asarray(strata)
+        self.populations = np.bincount(self.strata)
+        self.nStrata = len(self.populations)
+        # the sources of each stratum, in the order they will be drawn
+        self.queues = [rng.permutation(np.flatnonzero(self.strata == h))
+                       for h in range(self.nStrata)]
+        self.drawn = np.zeros(self.nStrata, dtype=np.int64)
+        self.sums = np.zeros((self.nStrata, nVertices), dtype=float)
+        self.squares = np.zeros((self.nStrata, nVertices), dtype=float)
+
+    def nSampled(self):
+        return int(self.drawn.sum())
+
+    def exhausted(self):
+        return np.array_equal(self.drawn, self.populations)
+
+    def nextBatch(self, batchSize):
+        """Return the next (at most batchSize, except for the first
+        batch) sources to be sampled, as an array."""
+        total = min(self.nSampled() + batchSize, self.populations.sum())
+        # largest remainder allocation of the total to the strata
+        quotas = total * self.populations / self.populations.sum()
+        targets = np.floor(quotas).astype(np.int64)
+        shortfall = max(total - int(targets.sum()), 0)
+        targets[np.argsort(targets - quotas, kind="stable")[:shortfall]] += 1
+        # at least two sources per stratum, and none given back; the
+        # excess this creates is taken from the most favoured strata
+        floors = np.maximum(np.minimum(self.populations, 2), self.drawn)
+        targets = np.maximum(targets, floors)
+        while targets.sum() > total and (targets > floors).any():
+            excess = np.where(targets > floors, targets - quotas, -np.inf)
+            targets[np.argmax(excess)] -= 1
+        batch = [self.queues[h][self.drawn[h]:targets[h]]
+                 for h in range(self.nStrata)]
+        self.drawn = targets
+        return np.concatenate(batch)
+
+    def addBatch(self, sums, squares):
+        """Add the per-stratum sums of x_s and x_s^2 over the sources
+        of the last batch."""
+        self.sums += sums
+        self.squares += squares
+
+    def estimate(self, confidence=0.95):
+        """Return the gebc estimate and the half width of its
+        confidence interval, for each vertex."""
+        sampled = self.drawn > 0
+        n = self.drawn[sampled, None].astype(float)
+        populations = self.populations[sampled, None]
+        means = self.sums[sampled] / n
+        gebc = (populations * means).sum(axis=0)
+        # unbiased sample variance; zero with a single sample
+        deviations = np.maximum(self.squares[sampled] - n * means**2, 0)
+        variances = deviations / np.maximum(n - 1, 1)
+        variance = (populations**2 * (1 - n / populations)
+                    * variances / n).sum(axis=0)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return gebc, z * np.sqrt(variance)
+
+
+def simultaneousConfidence(confidence, nIntervals):
+    """Confidence of each of nIntervals intervals, for all of them to
+    hold at once with (at least) the given confidence."""
+    return 1 - (1 - confidence) / nIntervals
+
+
+def separatesTop(gebc, gebcError, k):
+    """True if the intervals gebc +- gebcError separate the k
+    top-ranked vertices from all the others."""
+    if k >= len(gebc):
+        return True
+    order = np.argsort(-gebc, kind="stable")
+    return (gebc - gebcError)[order[:k]].min()\
+        > (gebc + gebcError)[order[k:]].max()
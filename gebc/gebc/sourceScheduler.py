@@ -0,0 +1,58 @@
+'''
+Dynamic scheduling of the source vertices of a gebc computation.
+
+The cost of a source vertex depends on the engine and on the size of
+its connected component (see
+GeodesicEdgeBetweennessCentrality.estimateSourceCosts). Sources are
+sorted by decreasing estimated cost. Chunks are handed out from the
+expensive end, on request, and their size shrinks as the remaining
+work runs out (guided self-scheduling): each chunk carries about
+
+    remaining cost / (chunksPerWorker * nWorkers)
+
+so that the last chunks are small and all workers finish at about the
+same time. The coordinating rank, which must stay responsive to
+requests, takes single sources from the cheap end of the queue.
+'''
+
+import numpy as np
+
+
+class SourceScheduler:
+
+    def __init__(self, sources, costs, nWorkers, chunksPerWorker=2):
+        order = np.argsort(-np.asarray(costs, dtype=float), kind="stable")
+        self.sources = np.asarray(sources)[order]
+        # cumulativeCosts[k] is the total cost of the k most
+        # expensive sources
+        self.cumulativeCosts = np.zeros(len(order) + 1, dtype=float)
+        np.cumsum(np.asarray(costs, dtype=float)[order],
+                  out=self.cumulativeCosts[1:])
+        self.head = 0  # next expensive source
+        self.tail = len(order)  # one past the next cheap source
+        self.nWorkers = max(nWorkers, 1)
+        self.chunksPerWorker = chunksPerWorker
+
+    def remainingCost(self):
+        return self.cumulativeCosts[self.tail]\
+            - self.cumulativeCosts[self.head]
+
+    def nextChunk(self):
+        """Return a list of the most expensive remaining sources,
+        or None when no sources are left."""
+        if self.head >= self.tail:
+            return None
+        target = self.cumulativeCosts[self.head] + self.remainingCost()\
+            / (self.chunksPerWorker * self.nWorkers)
+        end = np.searchsorted(self.cumulativeCosts, target, side="left")
+        end = min(max(end, self.head + 1), self.tail)
+        chunk = self.sources[self.head:end].tolist()
+        self.head = end
+        return chunk
+
+    def nextCheapSource(self):
+        """Return the cheapest remaining source, or None."""
+        if self.head >= self.tail:
+            return None
+        self.tail -= 1
+        return self.sources[self.tail].item()
@@ -0,0 +1,89 @@
+'''
+Exact pruning of the trees hanging from a network, before gebc.
+
+Vertices with a single neighbor (leaves) are removed repeatedly, level
+by level, until only the core of the network is left: the 2-core, plus
+one root vertex for each component that is a tree. Each core vertex r
+stands for itself and the trees hanging from it, w(r) vertices in all.
+
+Every removed vertex u is a cut vertex: all the geodesics between two
+vertices of different components of the network without u go through
+u, and no other geodesic does. With n_c the size of the connected
+component of u, b_i the sizes of the trees hanging from u, and
+rest = n_c - 1 - sum_i b_i the size of the remaining component,
+
+    gebc(u) = ((n_c - 1)^2 - sum_i b_i^2 - rest^2) / 2
+
+The same expression gives the pairs of vertices that have at least
+one endpoint in the trees of a core vertex r, and whose geodesics go
+through r. The remaining pairs of the sum have endpoints in the trees
+of two other core vertices a and b, and they go through r as the
+geodesics between a and b do, so that
+
+    gebc(r) = cut term of r + sum_(a<b) w(a) w(b) sigma_ab(r)/sigma_ab
+
+where the sum runs on the core only: this is Brandes' algorithm with
+the pair (a, b) weighted by w(a) w(b) (see
+GeodesicEdgeBetweennessCentrality.sourceDependencies).
+
+Only for symmetric networks: on asymmetric ones, a geodesic from i to
+j may differ from the reversed geodesic from j to i, and the pendant
+trees are not cut off by single vertices.
+
+Repeated edges do not matter to the cut terms: every geodesic between
+the two sides of a cut vertex crosses the same edges to and from it,
+so their multiplicities cancel out of sigma_ij(u)/sigma_ij.
+
+Chains of vertices of degree 2 in the core are not contracted. A chain
+between a and b could be replaced by one edge as long as the chain, but
+its interior vertices are sources and targets as well: a pair with an
+endpoint inside the chain leaves it through a or b, whichever is
+closer to the other endpoint, and a pair with endpoints inside two
+chains has four such routes. This needs the distances from both ends
+of every chain at once, i.e. a weighted search (see
+weightedShortestPathDag) from each end of each chain, on top of the
+searches from the other core vertices. On the epoxy monomer networks,
+whose cores are mostly chains of a single vertex between two branch
+vertices, that is more searches than the core has vertices, each on a
+smaller network but without the level-synchronous BFS.
+'''
+
+import numpy as np
+
+
+def pruneTrees(csr):
+    """Return:
+        - core: sorted array of the vertices left after pruning
+        - weights: number of vertices represented by each core vertex
+        - cutTerms: contribution of the pruned trees to the gebc of
+          every vertex (complete for the removed vertices)
+    """
+    simple = csr.simplified()
+    degree = simple.degrees().copy()
+    alive = np.ones(csr.nVertices, dtype=bool)
+    size = np.ones(csr.nVertices, dtype=np.int64)
+    branchSquares = np.zeros(csr.nVertices, dtype=float)
+
+    leaves = np.flatnonzero(degree == 1).astype(np.int32)
+    while leaves.size:
+        _, leaves, neighbors = simple.expand(leaves)
+        onCore = alive[neighbors]
+        leaves, parents = leaves[onCore], neighbors[onCore]
+        # two leaves attached to each other are the last two vertices
+        # of a tree: keep the smaller one as its root
+        keep = (degree[parents] == 1) & (leaves < parents)
+        leaves, parents = leaves[~keep], parents[~keep]
+        alive[leaves] = False
+        degree[leaves] = 0
+        np.add.at(size, parents, size[leaves])
+        np.add.at(branchSquares, parents, size[leaves].astype(float)**2)
+        np.subtract.at(degree, parents, 1)
+        parents = np.unique(parents)
+        leaves = parents[degree[parents] == 1]
+
+    _, labels = csr.connectedComponents()
+    componentSize = np.bincount(labels)[labels].astype(float)
+    rest = componentSize - size
+    cutTerms = ((componentSize - 1)**2 - branchSquares - rest**2) / 2
+    core = np.flatnonzero(alive)
+    return core, size[core], cutTerms
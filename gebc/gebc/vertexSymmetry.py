@@ -0,0 +1,195 @@
+'''
+Classes of structurally equivalent vertices, so that gebc needs only
+one source per class.
+
+If a group of automorphisms of a symmetric network has the classes as
+its orbits, then every automorphism of the group maps the dependencies
+of a source s to those of its image, and
+
+    sum_(x in C') gebc(x) = 1/2 sum_C |C| sum_(x in C') delta_(s_C)(x)
+
+where delta_s is the dependency of s on every vertex, summed over all
+the targets, and s_C is any vertex of class C. gebc is the same on all
+the vertices of a class, which is therefore the mean over the class of
+
+    1/2 sum_C |C| delta_(s_C)
+
+with one single-source computation per class. Two kinds of classes are
+available:
+
+    - twins: vertices with the same neighbors (false twins, not
+      adjacent) or the same neighbors and each other (true twins,
+      adjacent). Exchanging two twins is an automorphism, so the twin
+      classes are the orbits of the group generated by these
+      exchanges. Found in O(nEdges) by hashing the neighborhoods
+
+    - orbits: the orbits of the whole automorphism group, the coarsest
+      classes, found by individualization and color refinement with
+      backtracking; exponential in the worst case, for small (test)
+      networks only
+
+Repeated edges count as in the network: twins have the same number of
+edges to each of their neighbors. Self-loops, which no geodesic uses,
+are left out.
+'''
+
+import numpy as np
+
+# largest network on which automorphism orbits are searched for
+ORBITS_MAX_VERTICES = 2000
+
+
+def sortedRows(csr):
+    """tails and heads of the edges other than self-loops, sorted by
+    tail, then head"""
+    tails = np.repeat(np.arange(csr.nVertices, dtype=np.int64),
+                      csr.degrees())
+    heads = csr.indices.astype(np.int64)
+    loopFree = tails != heads
+    tails, heads = tails[loopFree], heads[loopFree]
+    order = np.lexsort((heads, tails))
+    return tails[order], heads[order]
+
+
+def classLabels(keys):
+    """Number the classes of equal keys (rows of an array) by their
+    smallest vertex."""
+    _, first, labels = np.unique(keys, axis=0, return_index=True,
+                                 return_inverse=True)
+    ranks = np.empty(len(first), dtype=np.int64)
+    ranks[np.argsort(first)] = np.arange(len(first))
+    return ranks[labels.ravel()]
+
+
+def twinClasses(csr):
+    """Label of the twin class of each vertex, classes numbered by
+    their smallest vertex."""
+    tails, heads = sortedRows(csr)
+    starts = np.searchsorted(tails, np.arange(csr.nVertices + 1))
+    # multiset hash of the neighbors: sum of random 64-bit codes
+    codes = np.random.default_rng(0).integers(
+        0, 2**63, size=csr.nVertices, dtype=np.int64).astype(np.uint64)
+    openHashes = np.zeros(csr.nVertices, dtype=np.uint64)
+    np.add.at(openHashes, tails, codes[heads])
+    degrees = np.diff(starts)
+    falseTwins = classLabels(np.stack((degrees.astype(np.uint64),
+                                       openHashes), axis=1))
+    trueTwins = classLabels(np.stack((degrees.astype(np.uint64),
+                                      openHashes + codes), axis=1))
+
+    # check the candidate classes exactly, against their first vertex
+    labels = np.arange(csr.nVertices)
+    for candidates, closed in ((falseTwins, False), (trueTwins, True)):
+        order = np.argsort(candidates, kind="stable")
+        bounds = np.flatnonzero(np.diff(candidates[order])) + 1
+        for members in np.split(order, bounds):
+            if len(members) < 2:
+                continue
+            first = members[0]
+            for v in members[1:].tolist():
+                if labels[v] != v:
+                    continue
+                if closed:
+                    same = np.array_equal(
+                        np.sort(np.append(heads[starts[v]:starts[v + 1]],
+                                          v)),
+                        np.sort(np.append(heads[starts[first]:
+                                                starts[first + 1]], first)))
+                else:
+                    same = np.array_equal(heads[starts[v]:starts[v + 1]],
+                                          heads[starts[first]:
+                                                starts[first + 1]])
+                if same:
+                    labels[v] = first
+    return classLabels(labels[:, None])
+
+
+def refineColors(tails, heads, colors):
+    """Color refinement: split the color classes by the multisets of
+    the colors of the neighbors, until stable. Colors are numbered
+    canonically (from the sorted signatures), so that refining the
+    disjoint union of two copies of a network gives comparable colors
+    in both."""
+    nColors = len(np.unique(colors))
+    while True:
+        neighbors = [[] for _ in colors]
+        for tail, head in zip(tails.tolist(), heads.tolist()):
+            neighbors[tail].append(colors[head])
+        signatures = [(color, tuple(sorted(colorList)))
+                      for color, colorList in zip(colors.tolist(),
+                                                    neighbors)]
+        canonical = {signature: k for k, signature in
+                     enumerate(sorted(set(signatures)))}
+        colors = np.array([canonical[signature]
+                            for signature in signatures])
+        if len(canonical) == nColors:
+            return colors
+        nColors = len(canonical)
+
+
+def findAutomorphism(tails, heads, nVertices, colors):
+    """Search for an automorphism of the network (edges tails ->
+    heads) mapping each vertex to a vertex of the same color, where
+    colors (2 nVertices) colors two copies of the network. Return the
+    image of every vertex, or None."""
+    unionTails = np.concatenate((tails, tails + nVertices))
+    unionHeads = np.concatenate((heads, heads + nVertices))
+    colors = refineColors(unionTails, unionHeads, colors)
+    if not np.array_equal(np.sort(colors[:nVertices]),
+                          np.sort(colors[nVertices:])):
+        return None
+    counts = np.bincount(colors[:nVertices])
+    if counts.max() == 1:
+        image = np.empty(nVertices, dtype=np.int64)
+        image[np.argsort(colors[:nVertices])] =\
+            np.argsort(colors[nVertices:])
+        # tails, heads are sorted: compare the mapped edges as keys
+        keys = tails * nVertices + heads
+        if np.array_equal(np.sort(image[tails] * nVertices + image[heads]),
+                          keys):
+            return image
+        return None
+    # individualize a vertex of the smallest split class of the first
+    # copy, and try every vertex of the same color in the second copy
+    color = np.flatnonzero(counts == counts[counts > 1].min())[0]
+    x = np.flatnonzero(colors[:nVertices] == color)[0]
+    for y in np.flatnonzero(colors[nVertices:] == color).tolist():
+        individualized = colors.copy()
+        individualized[[x, nVertices + y]] = colors.max() + 1
+        image = findAutomorphism(tails, heads, nVertices, individualized)
+        if image is not None:
+            return image
+    return None
+
+
+def automorphismOrbits(csr):
+    """Label of the automorphism orbit of each vertex, orbits numbered
+    by their smallest vertex."""
+    if csr.nVertices > ORBITS_MAX_VERTICES:
+        raise ValueError("automorphism orbits are only searched for on "
+                         f"networks of at most {ORBITS_MAX_VERTICES} "
+                         "vertices")
+    tails, heads = sortedRows(csr)
+    nVertices = csr.nVertices
+    cells = refineColors(tails, heads, np.zeros(nVertices, dtype=np.int64))
+    orbits = np.arange(nVertices)
+
+    def root(v):
+        while orbits[v] != v:
+            v = orbits[v]
+        return v
+
+    for u in range(nVertices):
+        for v in range(u + 1, nVertices):
+            if cells[v] != cells[u] or root(u) == root(v):
+                continue
+            colors = np.concatenate((cells, cells))
+            colors[[u, nVertices + v]] = cells.max() + 1
+            image = findAutomorphism(tails, heads, nVertices, colors)
+            if image is None:
+                continue
+            # every vertex is in the orbit of its image
+            for x, y in enumerate(image.tolist()):
+                rx, ry = root(x), root(y)
+                orbits[max(rx, ry)] = min(rx, ry)
+    return classLabels(np.array([root(v) for v in range(nVertices)])[:, None])
@@ -1,7 +1,7 @@
-from geodesicEdgeBetweenneessCentrality\
+from geodesicEdgeBetweennessCentrality\
     import GeodesicEdgeBetweennessCentrality as gebc
-from helper_json import loadJson, printJson
-from helper_dict import renumberKeysAndValuesFrom0
+from sys import maxsize
+from helper_json import loadJson
 
 """Calculate gebc values for the Voronoi vertices of the cell
    growth simulation. This network was reconstructed by
@@ -11,18 +11,50 @@ from helper_dict import renumberKeysAndValuesFrom0
 dataPath = "../../data/cellGrowth/simulation3/"
 resultsPath = "../../results/cellGrowth/simulation3/"
 
-radius = "24"
-adjList_fileName = dataPath + "vertexAdjList_withinRadius"\
-    + radius + ".json"
-adjList = loadJson(adjList_fileName)
+# Exact gebc is only affordable for subnetworks within some radius
+# from the center of the colony (see extractVoronoiSubNetwork.py).
+# The whole colony is analysed approximately instead, by sampling
+# source vertices until the top-ranked vertices are stable.
+radius = None  # e.g. "24" for an exact analysis of a subnetwork
 
-gebcAnalyzer = gebc(adjList, parallel=True, sparseLabels=True)
+# geodesics weighted by the Euclidean lengths of the edges, from the
+# coordinates of the Voronoi vertices, instead of hop counts
+weighted = False
+
+suffix = "" if radius is None else "_withinRadius" + radius
+engineOptions = {}
+if weighted:
+    engineOptions = {"engine": "dijkstra", "coordinates": loadJson(
+        dataPath + "vertexIdToCoords" + suffix + ".json")}
+
+if radius is None:
+    adjList_fileName = dataPath + "vertexAdjList.json"
+    # no limit on the number of samples: sampling stops when the top
+    # is stable (or when all the sources are done)
+    gebcAnalyzer = gebc(adjList_fileName, parallel=True, nSamples=maxsize,
+                        sampling="degree", batchSize=400, stableTop=100,
+                        **engineOptions)
+    fileName = "voronoiVertices_sampled_unnormalized_gebc"
+else:
+    adjList_fileName = dataPath + "vertexAdjList" + suffix + ".json"
+    gebcAnalyzer = gebc(adjList_fileName, parallel=True, sparseLabels=True,
+                        **engineOptions)
+    fileName = "voronoiVertices_withinRadius" \
+        + radius + "_unnormalized_gebc"
+if weighted:
+    fileName += "_weighted"
 
 print("Printing gebc results")
-fileName = "voronoiVertices_withinRadius" \
-    + radius + "_unnormalized_gebc"
 
-#gebcAnalyzer.printJson(resultsPath + fileName + ".json", normalize=True)
-gebcAnalyzer.printJson(resultsPath + fileName + ".json", normalize=False)
+# "npz": ids, gebc and errors as numpy arrays, in one file (see
+# helper_npz.py); "json": one dict per file, as before
+resultsFormat = "npz"
+if resultsFormat == "npz":
+    gebcAnalyzer.printNpz(resultsPath + fileName + ".npz", normalize=False)
+else:
+    #gebcAnalyzer.printJson(resultsPath + fileName + ".json", normalize=True)
+    gebcAnalyzer.printJson(resultsPath + fileName + ".json", normalize=False)
+    if radius is None:
+        gebcAnalyzer.printErrorsJson(resultsPath + fileName + "_errors.json")
 
 print("The end")
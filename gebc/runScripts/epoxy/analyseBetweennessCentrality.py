@@ -1,20 +1,7 @@
-from geodesicEdgeBetweenneessCentrality\
+from geodesicEdgeBetweennessCentrality\
     import GeodesicEdgeBetweennessCentrality as gebc
-from os import chdir, path
-from helper_json import loadJson, printJson
-from helper_dict import renumberKeysAndValuesFrom0
-
-
-def printGebc(gebcRaw, conversion, fileName):
-    """
-    gebcRaw is a 1d numpy array
-    apply conversion map to the indices of gebcRaw
-    create a dict and print it in json format
-    """
-    gebc = {}
-    for index, value in enumerate(gebcRaw):
-        gebc[conversion[index]] = value
-    printJson(gebc, fileName)
+from helper_json import printJson
+from os import chdir, path, makedirs
 
 
 # change working directory to script location
@@ -28,24 +15,47 @@ chdir(path.dirname(path.realpath(__file__)))
 # The gebc class expects vertices to be labeled incrementally and
 # consecutively (this was a short-sighted decision).
 # Because the monomer-only adjancency list is no-longer consecutive,
-# some renumbering is necessary
+# some renumbering is necessary: sparseLabels=True does it while the
+# file is read (see adjacencyLoader.py)
 
 adjLists_fileNames = ["largestGroup_monomers_large" + str(i)
                       for i in range(1, 6)]
 
+# each run takes hours: partial results are saved every 10 minutes,
+# and a killed job picks up from there when restarted
+checkpointPath = "../../results/epoxy/checkpoints/"
+makedirs(checkpointPath, exist_ok=True)
+
+# set to k to find only the k most central monomers of each system
+# (the bottlenecks): sources are sampled in batches, and the run stops
+# as soon as the top k are certified, i.e. stand out from the others
+nTopMonomers = None
+
 for fileName in adjLists_fileNames:
-    adjList = loadJson("../../data/epoxy/largestMolecularGroups_monomersOnly/"
-                       + fileName + ".json")
+    adjList_fileName = "../../data/epoxy/largestMolecularGroups_monomersOnly/"\
+        + fileName + ".json"
     print("Analizying "+fileName)
-    adjList, consecutiveLabelsToSparseLabels =\
-        renumberKeysAndValuesFrom0(adjList)
-    gebcAnalyzer = gebc(adjList, parallel=True)
+    if nTopMonomers is not None:
+        gebcAnalyzer = gebc(adjList_fileName, parallel=True,
+                            sparseLabels=True, certifiedTop=nTopMonomers)
+        labels, scores = gebcAnalyzer.topRanking(nTopMonomers)
+        if gebcAnalyzer.me == 0:
+            print(f"top {nTopMonomers} certified: "
+                  f"{gebcAnalyzer.topCertified}")
+            printJson(dict(zip(labels, scores.tolist())),
+                      "../../results/epoxy/" + fileName + "_topGebc.json")
+        continue
+    gebcAnalyzer = gebc(adjList_fileName, parallel=True, sparseLabels=True,
+                        edgeBetweenness=True,
+                        checkpoint=checkpointPath + fileName, resume=True)
 
     print("Printing "+fileName)
     # gebcAnalyzer.print("../results/" + fileName + "_gebc_safety.dat")
-    # print in json format: monomer id, monomer gebc
-    printGebc(gebcAnalyzer.gebc,
-              consecutiveLabelsToSparseLabels,
-              "../../results/epoxy" + fileName + "_gebc.json")
+    # print monomer ids and monomer gebc
+    gebcAnalyzer.printNpz("../../results/epoxy/" + fileName + "_gebc.npz",
+                          normalize=False)
+    # bond breakage happens at cross-links: gebc of each cross-link
+    gebcAnalyzer.printEdgesNpz("../../results/epoxy/" + fileName
+                               + "_edgeGebc.npz", normalize=False)
 
 print("The end")
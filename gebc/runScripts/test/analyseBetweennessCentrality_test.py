@@ -1,12 +1,145 @@
-from geodesicEdgeBetweenneessCentrality\
+from geodesicEdgeBetweennessCentrality\
     import GeodesicEdgeBetweennessCentrality as gebc
+import geodesicEdgeBetweennessCentrality
 from os import chdir, path
+import numpy as np
 
 # change working directory to script location
 chdir(path.dirname(path.realpath(__file__)))
 
 outFolder = "../../results/test/"
 
+engines = ["paths", "brandes", "msbfs", "spmv"]
+
+# hand-checked graphs: every engine must reproduce the expected gebc
+handChecked = []
+g = {}
+g[0] = [1, 2]
+g[1] = [0, 3, 4]
+g[2] = [0, 3, 4]
+g[3] = [2, 1, 5]
+g[4] = [2, 1, 5]
+g[5] = [3, 4]
+handChecked.append((g, [1/3, 11/6, 11/6, 11/6, 11/6, 1/3]))
+g = {}
+g[0] = [1, 4, 6]
+g[1] = [0, 2]
+g[2] = [1, 3]
+g[3] = [2, 4]
+g[4] = [3, 5, 0]
+g[5] = [4, 6]
+g[6] = [5, 0]
+handChecked.append((g, [5, 2, 1, 2, 5, 1, 1]))
+for g, expectedGebc in handChecked:
+    for engine in engines:
+        gebcAnalyzer = gebc(g, parallel=False, engine=engine)
+        assert np.allclose(gebcAnalyzer.gebc, expectedGebc), engine
+    # one source per class of twins (1 and 2, 3 and 4 in the first
+    # graph) or of automorphism orbit
+    for symmetry in ["twins", "orbits"]:
+        gebcAnalyzer = gebc(g, parallel=False, symmetry=symmetry)
+        assert np.allclose(gebcAnalyzer.gebc, expectedGebc), symmetry
+
+# edge deletion: the gebc and edge gebc left by removeEdges and
+# gebcWithoutEdges must be those of a fresh run on the network without
+# the edges, both on small networks (update of the pairs from all-pairs
+# paths) and on large ones (recomputed sources), here forced by an
+# all-pairs limit of 0 vertices
+def withoutEdges(g, edges):
+    h = {v: list(neighbors) for v, neighbors in g.items()}
+    for v, w in edges:
+        h[v].remove(w)
+        h[w].remove(v)
+    return h
+
+hexagon = {}
+hexagon[0] = [1, 5]
+hexagon[1] = [0, 2]
+hexagon[2] = [1, 3]
+hexagon[3] = [2, 4]
+hexagon[4] = [3, 5]
+hexagon[5] = [4, 0]
+twoHexagons = withoutEdges(hexagon, [])
+twoHexagons[2].append(6)
+twoHexagons[3].append(9)
+twoHexagons[6] = [2, 7]
+twoHexagons[7] = [6, 8]
+twoHexagons[8] = [7, 9]
+twoHexagons[9] = [8, 3]
+# triangle 0, 1, 2 with leaves on 0: removing (1, 2) only affects the
+# sources 1 and 2, so that the other sources are not recomputed
+triangleWithLeaves = {0: [1, 2, 3, 4, 5, 6, 7], 1: [0, 2], 2: [0, 1]}
+for leaf in range(3, 8):
+    triangleWithLeaves[leaf] = [0]
+# expected gebc by hand: the hexagon is a path 1-2-3-4-5-0 without
+# (0, 1), two paths 1-2-3 and 4-5-0 without (3, 4) as well; the
+# triangle with leaves is a star around 0 without (1, 2)
+handChecked = [(hexagon, [(0, 1)], [0, 0, 4, 6, 6, 4]),
+               (hexagon, [(0, 1), (3, 4)], [0, 0, 1, 0, 0, 1]),
+               (twoHexagons, [(2, 3)], None),
+               (twoHexagons, [(0, 1), (7, 8)], None),
+               (triangleWithLeaves, [(1, 2)], [21, 0, 0, 0, 0, 0, 0, 0])]
+allPairsMaxVertices = geodesicEdgeBetweennessCentrality.ALL_PAIRS_MAX_VERTICES
+for limit in [allPairsMaxVertices, 0]:
+    geodesicEdgeBetweennessCentrality.ALL_PAIRS_MAX_VERTICES = limit
+    for g, edges, expectedGebc in handChecked:
+        for engine in ["brandes", "msbfs"]:
+            fresh = gebc(withoutEdges(g, edges), parallel=False,
+                         engine=engine, edgeBetweenness=True)
+            if expectedGebc is not None:
+                assert np.allclose(fresh.gebc, expectedGebc), edges
+            gebcAnalyzer = gebc(g, parallel=False, engine=engine,
+                                edgeBetweenness=True)
+            newGebc, newEdgeGebc = gebcAnalyzer.gebcWithoutEdges(edges)
+            assert np.allclose(newGebc, fresh.gebc), (limit, edges)
+            assert np.allclose(newEdgeGebc, fresh.edgeGebc), (limit, edges)
+            # one edge at a time, each removal updating the analyzer
+            for edge in edges:
+                gebcAnalyzer.removeEdges([edge])
+            assert np.allclose(gebcAnalyzer.gebc, fresh.gebc), (limit, edges)
+            assert np.allclose(gebcAnalyzer.edgeGebc, fresh.edgeGebc),\
+                (limit, edges)
+geodesicEdgeBetweennessCentrality.ALL_PAIRS_MAX_VERTICES = allPairsMaxVertices
+
+# dijkstra engine: with edges of unit length (regular hexagons of side 1,
+# whose lengths differ by rounding errors within the tie tolerance), it
+# must reproduce the unweighted gebc and edge gebc
+hexagonPositions = {k: [np.cos(np.pi * k / 3), np.sin(np.pi * k / 3)]
+                    for k in range(6)}
+# second hexagon: point reflection of the first one through the middle
+# of the shared edge (2, 3)
+middle = np.add(hexagonPositions[2], hexagonPositions[3])
+twoHexagonsPositions = dict(hexagonPositions)
+for vertex, mirrored in [(6, 4), (7, 5), (8, 0), (9, 1)]:
+    twoHexagonsPositions[vertex] =\
+        (middle - hexagonPositions[mirrored]).tolist()
+for g, coordinates in [(hexagon, hexagonPositions),
+                       (twoHexagons, twoHexagonsPositions)]:
+    unweighted = gebc(g, parallel=False, edgeBetweenness=True)
+    weighted = gebc(g, parallel=False, engine="dijkstra",
+                    coordinates=coordinates, edgeBetweenness=True)
+    assert np.allclose(weighted.edgeLengths, 1)
+    assert np.allclose(weighted.gebc, unweighted.gebc)
+    assert np.allclose(weighted.edgeGebc, unweighted.edgeGebc)
+# non-uniform lengths: path 0-1-2-3 along the x axis, and 0-4-3 over 4 at
+# (1.5, 1). The geodesics take the path (length 3 < 2 * 1.80 from 0 to 3,
+# 2.80 < 3.80 from 1 to 4, ...), not 4 as without lengths
+g = {0: [1, 4], 1: [0, 2], 2: [1, 3], 3: [2, 4], 4: [0, 3]}
+coordinates = {0: [0, 0], 1: [1, 0], 2: [2, 0], 3: [3, 0], 4: [1.5, 1]}
+gebcAnalyzer = gebc(g, parallel=False, engine="dijkstra",
+                    coordinates=coordinates)
+assert np.allclose(gebcAnalyzer.gebc, [1, 2, 2, 1, 0])
+gebcAnalyzer = gebc(g, parallel=False)
+assert np.allclose(gebcAnalyzer.gebc, [1, 1, 1, 1, 1])
+
+# degree-stratified sampling draws exactly nSamples sources: on the two
+# hexagons (8 vertices of degree 2, 2 of degree 3), with 5 samples the
+# proportional shares 4 and 1 become 3 and 2 by the two-source minimum
+for nSamples in range(4, 11):
+    gebcAnalyzer = gebc(twoHexagons, parallel=False, nSamples=nSamples,
+                        sampling="degree")
+    assert gebcAnalyzer.nSampledSources == nSamples, nSamples
+
 # test graphs
 # g = {}
 # g[0] = [1, 2]
@@ -163,4 +296,4 @@ g[14] = [11, 15]
 g[15] = [14, 16]
 g[16] = [9, 15]
 gebcAnalyzer = gebc(g, parallel=False)
-gebcAnalyzer.print(outFolder + "fourHexagons_7pointDefect_gebc.txt")
+gebcAnalyzer.printJson(outFolder + "fourHexagons_7pointDefect_gebc.json")
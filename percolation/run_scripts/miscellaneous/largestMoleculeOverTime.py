@@ -1,5 +1,4 @@
 import argparse
-import resource
 import sys
 
 if __name__ == "__main__":
@@ -74,10 +73,6 @@ if __name__ == "__main__":
     dumpTrajectory = args.trajectory
     outputFiles = (args.outputLargest, args.outputOthers)
 
-    # tena2 only
-    resource.setrlimit(resource.RLIMIT_STACK, (2 ** 29, -1))
-    sys.setrecursionlimit(10 ** 6)
-
     data = LammpsData(dataFile, ["atoms"])
 
     connectivity_reader = SingleRecordReader(data)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-import sys, resource
+import sys
 import argparse
 
 if __name__ == "__main__":
@@ -3,7 +3,14 @@ from copy import deepcopy
 
 from enum import Enum
 import numpy as np
-from fractions import gcd
+from math import gcd
+
+from graph.traversal import Frontier
+from graph.union_find import UnionFind, PeriodicUnionFind
+
+# Largest number of crossings per dimension of a CompactMetaGraph edge tag,
+# stored as int8 (symmetric, so that inverted tags fit as well)
+MAX_TAG_CROSSINGS = 127
 
 
 class EdgeTag:
@@ -217,58 +224,6 @@ class NodeState(Enum):
     ISOLATED = 4
 
 
-# Function to check linear independence and create a normalized basis set
-def make_basis(basis, new_entry):
-    """
-    Check if a new_entry is linearly independent of previous entries to a basis and extend the basis set if necessary/possible.
-    Returns the resulting basis set with a possible normalized version of the new entry candidate appended
-
-    Args:
-        basis (set): Previous/current basis set (may be empty)
-        new_entry (EdgeTag): The EdgeTag whose independence is to be checked
-
-    """
-    zero_tag = EdgeTag(0, 0, 0)
-    # Zero vector is not independent:
-    if new_entry == zero_tag:
-        return basis
-
-    # normalize vectors. May be bad?
-    # TODO: FIXME if required
-    new_entry = new_entry.normalized()
-
-    is_independent = len(basis) < 3
-
-    if is_independent:
-        # Build matrix for rank check:
-
-        # Obtain numpy representation
-        data = []
-        for old in basis:
-            data.append(old.get_vec())
-        data.append(new_entry.get_vec())
-
-        # Transform to matrix
-        A = np.row_stack(data)
-        # print(A)
-
-        # get SVD
-        U, s, V = np.linalg.svd(A)
-
-        TOLERANCE = 1e-14
-
-        # get number of non-zero eigenvalues
-        rank = int(np.sum(s > TOLERANCE))
-        # print(rank, len(basis) + 1)
-
-        is_independent = rank == len(basis) + 1
-
-    if is_independent:
-        basis.append(new_entry)
-
-    return basis
-
-
 class MetaGraph:
     """Class encapsulating the meta-graph of a system
     As far as graph theory is concerned, it is an undirected graph denoted by a directed representation using adjacency lists for each node
@@ -357,6 +312,50 @@ class MetaGraph:
             EdgeEntry(new_edge_index, from_index, tag.invert())
         )
 
+    def add_edges(self, from_indices, to_indices, tags):
+        """
+        Add whole arrays of edges: the graph is the same as after calling
+        add_edge(from_indices[i], to_indices[i], EdgeTag(*tags[i])) for every i in turn, and all edges with
+        the same tag share one EdgeTag object per orientation (most edges do not cross the periodicity at all).
+        Large graphs built from edge arrays are better held in a CompactMetaGraph
+
+        Args:
+            self (MetaGraph): The current graph
+            from_indices (np.ndarray): Index of the base node of each edge
+            to_indices (np.ndarray): Index of the target node of each edge
+            tags (np.ndarray): The tag of the base to target orientation of each edge, one row (dx, dy, dz) per edge
+
+        """
+        from_indices = np.asarray(from_indices, dtype=np.int64).ravel()
+        to_indices = np.asarray(to_indices, dtype=np.int64).ravel()
+        tags = np.asarray(tags, dtype=np.int64).reshape(-1, 3)
+        if len(from_indices) == 0:
+            return
+
+        self.reserve(int(max(from_indices.max(), to_indices.max())) + 1)
+
+        # Tag objects of both orientations, indexed by distinct tag
+        distinct_tags, tag_ids = np.unique(tags, axis=0, return_inverse=True)
+        forward_tags = [EdgeTag(*raw_tag) for raw_tag in distinct_tags.tolist()]
+        reverse_tags = [EdgeTag(*raw_tag) for raw_tag in (-distinct_tags).tolist()]
+
+        first_edge_index = self._next_edge_index
+        self._next_edge_index += len(from_indices)
+
+        adjacency = self._adjacency
+        for new_edge_index, from_index, to_index, tag_id in zip(
+            range(first_edge_index, self._next_edge_index),
+            from_indices.tolist(),
+            to_indices.tolist(),
+            tag_ids.ravel().tolist(),
+        ):
+            adjacency[from_index].add(
+                EdgeEntry(new_edge_index, to_index, forward_tags[tag_id])
+            )
+            adjacency[to_index].add(
+                EdgeEntry(new_edge_index, from_index, reverse_tags[tag_id])
+            )
+
     def add_metadata(self, node_index, data):
         """
         Method to add metadata to a node of the graph
@@ -464,7 +463,7 @@ class MetaGraph:
             return
 
         neighbor_count = [0] * self._next_vertex_index
-        queue = []
+        queue = Frontier()
 
         # Detect leaves or singled-out nodes
         for i in range(self._next_vertex_index):
@@ -479,15 +478,22 @@ class MetaGraph:
                 elif neighbor_count[i] == 1:
                     self._vertex_states[i] = NodeState.LEAF
                     # Get neighbor of leaf, reduce neighbor count and add to queue
-                    neighbor = None
-                    for entry in self._adjacency[i]:
-                        neighbor = entry.neighbor
-                    queue.append(neighbor)
+                    # (earlier leaves may have left a single neighbor, not a leaf)
+                    neighbors = [entry.neighbor for entry in self._adjacency[i]]
+                    neighbor = next(
+                        (
+                            entry
+                            for entry in neighbors
+                            if self._vertex_states[entry] != NodeState.LEAF
+                        ),
+                        neighbors[-1],
+                    )
+                    queue.push(neighbor)
                     neighbor_count[neighbor] -= 1
 
         # Iterate over new potential twigs
         while queue:
-            node = queue.pop(0)
+            node = queue.pop()
             # Check if node not yet ignored or
             if self._vertex_states[node] == NodeState.DEFAULT:
                 if neighbor_count[node] < 2:
@@ -495,7 +501,7 @@ class MetaGraph:
                     for edge in self._adjacency[node]:
                         if self._vertex_states[edge.neighbor] == NodeState.DEFAULT:
                             neighbor_count[edge.neighbor] -= 1
-                            queue.append(edge.neighbor)
+                            queue.push(edge.neighbor)
 
     def reduce(self):
         """
@@ -572,7 +578,7 @@ class MetaGraph:
 
         num_components, members = self.get_components()
 
-        queue = []
+        queue = Frontier()
         # Detect leaves or singled-out nodes
         for i in range(self._next_vertex_index):
             if self._vertex_states[i] == NodeState.DISABLED:
@@ -590,7 +596,7 @@ class MetaGraph:
                     curr_index += 1
                     is_branching.append(True)
                     encountered_components.add(self._vertex_component[i])
-                    queue.append((i, i, -1, neutral_tag))
+                    queue.push((i, i, -1, neutral_tag))
                 else:
                     new_index.append(-1)
                     is_branching.append(False)
@@ -608,14 +614,14 @@ class MetaGraph:
                 new_index[member_index] = curr_index
                 curr_index += 1
                 is_branching[member_index] = True
-                queue.append((member_index, member_index, -1, neutral_tag))
+                queue.push((member_index, member_index, -1, neutral_tag))
 
         new_graph = MetaGraph()
         new_graph.reserve(curr_index)
 
         # Iterate over graph
         while queue:
-            current, origin, previous, curr_distance = queue.pop(0)
+            current, origin, previous, curr_distance = queue.pop()
             for edge in self._adjacency[current]:
                 neighbor = edge.neighbor
                 neighbor_tag = edge.tag
@@ -630,96 +636,104 @@ class MetaGraph:
                         new_index[origin], new_index[neighbor], neighbor_dist
                     )
                 else:
-                    queue.append((neighbor, origin, current, neighbor_dist))
+                    queue.push((neighbor, origin, current, neighbor_dist))
         return new_graph
 
-    def get_component_graph(self):
+    def _edge_arrays(self, with_tags=True):
         """
-        Unify all nodes within the same copy of the periodicity cell
+        Return both orientations of all edges as arrays (tails, heads, tags), in the iteration order of the
+        adjacency sets, with one row (dx, dy, dz) of tags per orientation (None without with_tags)
 
         Args:
             self (MetaGraph): The current graph
+            with_tags (bool): Whether to gather the tags as well
 
         """
+        adjacency = self._adjacency[: self._next_vertex_index]
+        tails = np.repeat(
+            np.arange(self._next_vertex_index), [len(entries) for entries in adjacency]
+        )
+        heads = np.fromiter(
+            (entry.neighbor for entries in adjacency for entry in entries),
+            dtype=np.int64,
+            count=len(tails),
+        )
+        tags = None
+        if with_tags:
+            tags = np.fromiter(
+                (
+                    crossings
+                    for entries in adjacency
+                    for entry in entries
+                    for crossings in (entry.tag.dx, entry.tag.dy, entry.tag.dz)
+                ),
+                dtype=np.int64,
+                count=3 * len(tails),
+            ).reshape(-1, 3)
+        return tails, heads, tags
+
+    def _enabled(self):
+        """
+        Return a boolean mask of the nodes that are not disabled
 
-        periodic_comp = []
+        Args:
+            self (MetaGraph): The current graph
 
-        for i in range(self._next_vertex_index):
-            periodic_comp.append(-1)
+        """
+        return np.array(
+            [
+                state != NodeState.DISABLED
+                for state in self._vertex_states[: self._next_vertex_index]
+            ],
+            dtype=bool,
+        )
 
-        curr_comp = 0
-        no_skip_tag = EdgeTag(0, 0, 0)
-        for i in range(self._next_vertex_index):
-            if periodic_comp[i] == -1 and self._vertex_states[i] != NodeState.DISABLED:
-                # Explore the entire component
-                queue = [i]
-                while queue:
-                    curr = queue.pop(0)
-                    # Only process nodes not yet visited
-                    if periodic_comp[curr] == -1:
-                        periodic_comp[curr] = curr_comp
-                        # Look into neighboring vertices
-                        for edge in self._adjacency[curr]:
-                            if (
-                                edge.tag == no_skip_tag
-                                and periodic_comp[edge.neighbor] == -1
-                                and self._vertex_states[edge.neighbor] != NodeState.DISABLED
-                            ):
-                                queue.append(edge.neighbor)
-
-                # Iterate to next component
-                curr_comp += 1
+    def get_component_graph(self):
+        """
+        Unify all nodes within the same copy of the periodicity cell
+        The nodes joined by untagged edges are merged by a union-find (see graph.union_find)
+
+        Args:
+            self (MetaGraph): The current graph
+
+        """
+        tails, heads, tags = self._edge_arrays()
+        enabled = self._enabled()
+        live = enabled[tails] & enabled[heads]
+        no_skip = live & ~np.any(tags, axis=1)
+
+        components = UnionFind(self._next_vertex_index)
+        components.union_edges(tails[no_skip], heads[no_skip])
+        curr_comp, periodic_comp = components.labels(enabled)
 
         new_graph = MetaGraph()
         new_graph.reserve(curr_comp)
 
-        for curr in range(self._next_vertex_index):
-            if self._vertex_states[curr] != NodeState.DISABLED:
-                base_comp = periodic_comp[curr]
-                for edge in self._adjacency[curr]:
-                    neighbor = edge.neighbor
-                    tag = edge.tag
-
-                    if (
-                        tag != no_skip_tag
-                        and self._vertex_states[neighbor] != NodeState.DISABLED
-                    ):
-                        neighbor_comp = periodic_comp[neighbor]
-                        new_graph.add_edge(base_comp, neighbor_comp, tag)
+        skip = live & ~no_skip
+        new_graph.add_edges(
+            periodic_comp[tails[skip]], periodic_comp[heads[skip]], tags[skip]
+        )
 
         return new_graph
 
     def find_components(self):
         """
-        This simply detects connected components within the graph by doing a flood-fill algorithm.
+        This simply detects connected components within the graph by a union-find over the edges (see
+        graph.union_find), leaving out disabled nodes. Components are numbered in order of their first node,
+        as a flood fill would
 
         Args:
             self (MetaGraph): The current graph
 
         """
-        for i in range(self._next_vertex_index):
-            self._vertex_component[i] = -1
+        tails, heads, _ = self._edge_arrays(with_tags=False)
+        enabled = self._enabled()
+        live = enabled[tails] & enabled[heads]
 
-        curr_comp = 0
-        for i in range(self._next_vertex_index):
-            if (
-                self._vertex_component[i] == -1
-                and self._vertex_states[i] != NodeState.DISABLED
-            ):
-                # Explore the entire component
-                queue = [i]
-                while queue:
-                    curr = queue.pop(0)
-                    # Only process nodes not yet visited
-                    if self._vertex_component[curr] == -1:
-                        self._vertex_component[curr] = curr_comp
-                        # Look into neighboring vertices
-                        for edge in self._adjacency[curr]:
-                            if self._vertex_component[edge.neighbor] == -1:
-                                queue.append(edge.neighbor)
-
-                # Iterate to next component
-                curr_comp += 1
+        components = UnionFind(self._next_vertex_index)
+        components.union_edges(tails[live], heads[live])
+        curr_comp, vertex_component = components.labels(enabled)
+        self._vertex_component[: self._next_vertex_index] = vertex_component.tolist()
 
         return curr_comp
 
@@ -749,8 +763,9 @@ class MetaGraph:
     def find_stable_loops(self):
         """
         Function to detect rotationally invariant loops for each individual component.
-        It uses a BFS to explore the components for periodicity percolation.
-        For the periodicity vectors, it then checks the dimensionality of the basis.
+        A periodic union-find (see graph.union_find) merges the components over all edges in one pass, keeping
+        track of the periodicity cell of every node; every edge within a component closes a loop, whose
+        crossing vector is added to the basis of periodicity vectors of that component.
         The return value is the number of components and an array with the dimension of the percolation pattern.
         (0: no percolation, 1: line, 2: sheet, 3: rigid grid)
 
@@ -758,108 +773,594 @@ class MetaGraph:
             self (MetaGraph): The current graph
 
         """
-        num_components = self.find_components()
+        tails, heads, tags = self._edge_arrays()
+        enabled = self._enabled()
+        live = enabled[tails] & enabled[heads]
 
-        # Array to keep track, which component contains a loop in this dimension
-        component_percolation_dimension = []
-        # Bitlist, which component has been explored already
-        component_explored = []
-        for i in range(num_components):
-            component_percolation_dimension.append(0)
-            component_explored.append(False)
+        components = PeriodicUnionFind(self._next_vertex_index)
+        components.union_edges(tails[live], heads[live], tags[live])
+        num_components, vertex_component = components.labels(enabled)
+        self._vertex_component[: self._next_vertex_index] = vertex_component.tolist()
 
-        # Array to keep track, which node has already been visited
-        visited = []
-        # Array holding the required dimension-crossing distance for a node
-        distance = []
+        component_percolation_dimension = np.zeros(num_components, dtype=int)
+        component_percolation_dimension[
+            vertex_component[enabled]
+        ] = components.set_dimensions()[enabled]
 
-        # Filter out disabled nodes from visitation list
-        for i in range(self._next_vertex_index):
-            distance.append(-1)
-            if self._vertex_states[i] == NodeState.DISABLED:
-                visited.append(True)
+        return num_components, component_percolation_dimension.tolist()
+
+    def copy(self):
+        """
+        Create a copy of this graph with no shared data
+
+        Args:
+            self (MetaGraph): The current graph
+
+        """
+        new_graph = MetaGraph()
+        new_graph._adjacency = deepcopy(self._adjacency)
+        new_graph._vertex_states = deepcopy(self._vertex_states)
+        new_graph._vertex_component = deepcopy(self._vertex_component)
+        new_graph._meta_data = deepcopy(self._meta_data)
+        new_graph._next_vertex_index = self._next_vertex_index
+        new_graph._next_edge_index = self._next_edge_index
+        return new_graph
+
+
+def _grown(array, size, fill):
+    """
+    Return array enlarged to at least size rows, doubling its capacity, with
+    the new rows set to fill (array itself if it is large enough already)
+
+    Args:
+        array (np.ndarray): The array to enlarge
+        size (int): The required number of rows
+        fill (int): Value of the new rows
+
+    """
+    if len(array) >= size:
+        return array
+    new_array = np.full(
+        (max(size, 2 * len(array)),) + array.shape[1:], fill, dtype=array.dtype
+    )
+    new_array[: len(array)] = array
+    return new_array
+
+
+class CompactMetaGraph:
+    """Array-backed variant of MetaGraph with the same interface, for large systems.
+    Each edge is stored once, in NumPy arrays: its base and target nodes (int32) and its tag, a row of an
+    (E, 3) int8 array. The adjacency (both orientations of every edge, as in MetaGraph) is a compressed sparse
+    row (CSR) index, built from these arrays when a traversal first needs it and rebuilt after edges were
+    added. Like the adjacency sets of MetaGraph, it holds each (neighbor, tag) pair of a node only once.
+
+    An edge takes 11 bytes, and 14 more per orientation in the CSR index, instead of the hundreds of bytes
+    of the EdgeEntry and EdgeTag objects of MetaGraph; the components and their percolation dimensions are
+    found by merging whole edge arrays at once (see graph.union_find).
+    Tags may cross each periodicity at most MAX_TAG_CROSSINGS times.
+
+    Attributes:
+        _sources (np.ndarray): Base node of each edge; only the first _num_edges entries are in use
+        _targets (np.ndarray): Target node of each edge
+        _tags (np.ndarray): Tag of the base to target orientation of each edge, one row per edge
+        _num_edges (int): Number of stored edges
+        _csr (tuple): The CSR adjacency (indptr, neighbors, tags), or None until (re)built
+        _vertex_states (np.ndarray): NodeState value of each node; only the first _next_vertex_index are in use
+        _meta_data (list): Array to keep track of node-specific metadata
+        _vertex_component (np.ndarray): Graph component of each node
+        _next_vertex_index (int): Number of currently managed vertices
+    """
+
+    def __init__(self):
+        # Edge arrays, enlarged by doubling their capacity
+        self._sources = np.zeros(0, dtype=np.int32)
+        self._targets = np.zeros(0, dtype=np.int32)
+        self._tags = np.zeros((0, 3), dtype=np.int8)
+        self._num_edges = 0
+
+        # Adjacency index, built lazily
+        self._csr = None
+
+        # Node arrays, enlarged by doubling their capacity
+        self._vertex_states = np.zeros(0, dtype=np.int8)
+        self._vertex_component = np.zeros(0, dtype=np.int64)
+        self._meta_data = []
+        self._next_vertex_index = 0
+
+    def reserve(self, new_size):
+        """
+        Function to reserve memory for nodes
+
+        Args:
+            self (CompactMetaGraph): The current graph
+            new_size (int): The desired minimum number of managed nodes (indexing starts at 0)
+
+        """
+        if self._next_vertex_index < new_size:
+            self._vertex_states = _grown(
+                self._vertex_states, new_size, NodeState.DEFAULT.value
+            )
+            self._vertex_component = _grown(self._vertex_component, new_size, -1)
+            self._meta_data.extend([None] * (new_size - self._next_vertex_index))
+            self._next_vertex_index = new_size
+            self._csr = None
+
+    def add_edge(self, from_index, to_index, tag):
+        """
+        Same as MetaGraph.add_edge: creates a new edge from the first (from_index) to the second argument
+        (to_index), whose tag specifies which dimensions are crossed, adding nodes as required
+
+        Args:
+            self (CompactMetaGraph): The current graph
+            from_index (int): Index of the base node of the edge
+            to_index (int): Index of the target node of the edge
+            tag (EdgeTag): The tag associated with the base to target orientation of the edge
+
+        """
+        crossings = (tag[0], tag[1], tag[2])
+        if max(abs(crossing) for crossing in crossings) > MAX_TAG_CROSSINGS:
+            raise ValueError("edge tag {0} out of range".format(tag))
+
+        self.reserve(max(from_index, to_index) + 1)
+
+        new_edge_index = self._num_edges
+        self._sources = _grown(self._sources, new_edge_index + 1, 0)
+        self._targets = _grown(self._targets, new_edge_index + 1, 0)
+        self._tags = _grown(self._tags, new_edge_index + 1, 0)
+        self._sources[new_edge_index] = from_index
+        self._targets[new_edge_index] = to_index
+        self._tags[new_edge_index] = crossings
+        self._num_edges += 1
+        self._csr = None
+
+    def add_edges(self, from_indices, to_indices, tags):
+        """
+        Append whole arrays of edges at once, adding nodes as required; the graph is the same as after
+        calling add_edge for every edge in turn
+
+        Args:
+            self (CompactMetaGraph): The current graph
+            from_indices (np.ndarray): Index of the base node of each edge
+            to_indices (np.ndarray): Index of the target node of each edge
+            tags (np.ndarray): The tag of the base to target orientation of each edge, one row (dx, dy, dz) per edge
+
+        """
+        from_indices = np.asarray(from_indices).ravel()
+        to_indices = np.asarray(to_indices).ravel()
+        tags = np.asarray(tags).reshape(-1, 3)
+        if len(from_indices) == 0:
+            return
+        if np.abs(tags).max() > MAX_TAG_CROSSINGS:
+            raise ValueError(
+                "edge tags out of range: at most {0} crossings".format(
+                    MAX_TAG_CROSSINGS
+                )
+            )
+
+        self.reserve(int(max(from_indices.max(), to_indices.max())) + 1)
+        self._append_edges(from_indices, to_indices, tags)
+
+    def _append_edges(self, sources, targets, tags):
+        """
+        Append whole arrays of edges, whose nodes must already be managed
+
+        Args:
+            self (CompactMetaGraph): The current graph
+            sources (np.ndarray): Base node of each edge
+            targets (np.ndarray): Target node of each edge
+            tags (np.ndarray): Tag of each edge, one row per edge
+
+        """
+        start = self._num_edges
+        stop = start + len(sources)
+        self._sources = _grown(self._sources, stop, 0)
+        self._targets = _grown(self._targets, stop, 0)
+        self._tags = _grown(self._tags, stop, 0)
+        self._sources[start:stop] = sources
+        self._targets[start:stop] = targets
+        self._tags[start:stop] = tags
+        self._num_edges = stop
+        self._csr = None
+
+    def add_metadata(self, node_index, data):
+        """
+        Method to add metadata to a node of the graph
+        Can be retrieved by the get_components() method
+
+        Args:
+            self (CompactMetaGraph): The current graph
+            node_index (int): Index of the node whose metadata is supposed to change
+            data (undefined): The data to assign to the node
+
+        """
+        self.reserve(node_index + 1)
+        self._meta_data[node_index] = data
+
+    def adjacency(self):
+        """
+        Return the CSR adjacency as three arrays (indptr, neighbors, tags): the entries of node v, sorted by
+        neighbor, are indptr[v]:indptr[v + 1], and tags holds the tag of each entry, one row per entry
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        if self._csr is None:
+            num_edges = self._num_edges
+            sources = self._sources[:num_edges]
+            targets = self._targets[:num_edges]
+            tails = np.concatenate([sources, targets])
+            heads = np.concatenate([targets, sources])
+            tags = np.concatenate([self._tags[:num_edges], -self._tags[:num_edges]])
+            order = np.lexsort((tags[:, 2], tags[:, 1], tags[:, 0], heads, tails))
+            tails, heads, tags = tails[order], heads[order], tags[order]
+
+            # Drop repeated (neighbor, tag) entries, as the sets of MetaGraph do
+            unique = np.ones(len(tails), dtype=bool)
+            unique[1:] = (
+                (tails[1:] != tails[:-1])
+                | (heads[1:] != heads[:-1])
+                | np.any(tags[1:] != tags[:-1], axis=1)
+            )
+            tails, heads, tags = tails[unique], heads[unique], tags[unique]
+
+            indptr = np.zeros(self._next_vertex_index + 1, dtype=np.int64)
+            np.cumsum(
+                np.bincount(tails, minlength=self._next_vertex_index), out=indptr[1:]
+            )
+            self._csr = (indptr, heads, tags)
+        return self._csr
+
+    def dump(self, path, show_edge_labels=False):
+        """
+        Outputs the graph to a file in the DOT format, as MetaGraph.dump does
+
+        Args:
+            self (CompactMetaGraph): The current graph
+            path (string): The path to the desired output file
+            show_edge_labels=False (boolean): A boolean flag which will enable the outputting of edge tags as labels in the graph
+
+        """
+        colors = {
+            NodeState.DEFAULT.value: "black",
+            NodeState.LEAF.value: "green",
+            NodeState.TWIG.value: "brown",
+            NodeState.ISOLATED.value: "blue",
+            NodeState.DISABLED.value: "red",
+        }
+        indptr, neighbors, tags = self.adjacency()
+        starts = indptr.tolist()
+        neighbors = neighbors.tolist()
+        tags = tags.tolist()
+        states = self._vertex_states[: self._next_vertex_index].tolist()
+        components = self._vertex_component[: self._next_vertex_index].tolist()
+
+        with open(path, "w") as out:
+            if show_edge_labels:
+                out.write("digraph MetaGraph {\n")
             else:
-                visited.append(False)
+                out.write("graph MetaGraph {\n")
+            # Print all vertices
+            for i in range(self._next_vertex_index):
+                comp_postfix = ""
+                if components[i] != -1:
+                    comp_postfix = " - C#{0}".format(components[i])
+                out.write(
+                    'P{0} [label="P{0}{1}" color={2}];\n'.format(
+                        i, comp_postfix, colors[states[i]]
+                    )
+                )
+
+            # Print all edges, once (both orientations are in the adjacency)
+            for i in range(self._next_vertex_index):
+                if states[i] != NodeState.DISABLED.value:
+                    for k in range(starts[i], starts[i + 1]):
+                        if neighbors[k] >= i:
+                            if show_edge_labels:
+                                out.write(
+                                    'P{0} -> P{1} [label="{2}; {3}; {4}"];\n'.format(
+                                        i, neighbors[k], *tags[k]
+                                    )
+                                )
+                            else:
+                                out.write("P{0} -- P{1};\n".format(i, neighbors[k]))
+
+            out.write("}\n")
+
+    def mark_states(self):
+        """
+        Detect leaf, twig and isolated nodes, as MetaGraph.mark_states does
+        Only marks the nodes as those types. Does not restructure the graph
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        indptr, neighbors, _ = self.adjacency()
+        starts = indptr.tolist()
+        neighbors = neighbors.tolist()
+        neighbor_count = np.diff(indptr).tolist()
+
+        disabled = NodeState.DISABLED.value
+        default = NodeState.DEFAULT.value
+        leaf = NodeState.LEAF.value
+        states = self._vertex_states[: self._next_vertex_index].tolist()
+        states = [state if state == disabled else default for state in states]
+        queue = Frontier()
+
+        # Detect leaves or singled-out nodes
+        for i in range(self._next_vertex_index):
+            if states[i] != disabled:
+                if neighbor_count[i] == 0:
+                    states[i] = NodeState.ISOLATED.value
+                elif neighbor_count[i] == 1:
+                    states[i] = leaf
+                    # Get neighbor of leaf, reduce neighbor count and add to queue
+                    # (earlier leaves may have left a single neighbor, not a leaf)
+                    entries = neighbors[starts[i]: starts[i + 1]]
+                    neighbor = next(
+                        (entry for entry in entries if states[entry] != leaf),
+                        entries[-1],
+                    )
+                    queue.push(neighbor)
+                    neighbor_count[neighbor] -= 1
+
+        # Iterate over new potential twigs
+        while queue:
+            node = queue.pop()
+            if states[node] == default and neighbor_count[node] < 2:
+                states[node] = NodeState.TWIG.value
+                for neighbor in neighbors[starts[node]: starts[node + 1]]:
+                    if states[neighbor] == default:
+                        neighbor_count[neighbor] -= 1
+                        queue.push(neighbor)
+
+        self._vertex_states[: self._next_vertex_index] = states
+
+    def reduce(self):
+        """
+        Mark all twig, leaf and isolated nodes as disabled and remove connecting edges
+        This simplifies the graph structure but also changes the graph overall
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        self.mark_states()
+        states = self._vertex_states[: self._next_vertex_index]
+        states[states != NodeState.DEFAULT.value] = NodeState.DISABLED.value
+
+        enabled = states != NodeState.DISABLED.value
+        num_edges = self._num_edges
+        kept = enabled[self._sources[:num_edges]] & enabled[self._targets[:num_edges]]
+        self._sources = self._sources[:num_edges][kept]
+        self._targets = self._targets[:num_edges][kept]
+        self._tags = self._tags[:num_edges][kept]
+        self._num_edges = len(self._sources)
+        self._csr = None
+
+    def get_purged_graph(self):
+        """
+        Remove all disabled nodes to simplify the overall graph, as MetaGraph.get_purged_graph does
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        enabled = (
+            self._vertex_states[: self._next_vertex_index] != NodeState.DISABLED.value
+        )
+        new_index = np.cumsum(enabled) - 1
+        sources = self._sources[: self._num_edges]
+        targets = self._targets[: self._num_edges]
+        kept = enabled[sources] & enabled[targets]
+
+        new_graph = CompactMetaGraph()
+        new_graph.reserve(int(enabled.sum()))
+        new_graph._append_edges(
+            new_index[sources[kept]],
+            new_index[targets[kept]],
+            self._tags[: self._num_edges][kept],
+        )
+        return new_graph
+
+    def get_simplified_graph(self):
+        """
+        Replace the chains of nodes with two neighbors by single edges between the nodes they join, whose tags
+        are the sums of the tags along the chains, as MetaGraph.get_simplified_graph does
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        num_components, members = self.get_components()
+        indptr, neighbors, tags = self.adjacency()
+        starts = indptr.tolist()
+        neighbors = neighbors.tolist()
+        tags = [tuple(tag) for tag in tags.tolist()]
+        states = self._vertex_states[: self._next_vertex_index].tolist()
 
-        # Explore graph
+        # Nodes kept: those with a loop or with other than two neighbors
+        is_branching = []
         for i in range(self._next_vertex_index):
-            if (
-                visited[i]
-                or self._vertex_component[i] == -1
-                or component_explored[self._vertex_component[i]]
-            ):
+            entries = neighbors[starts[i]: starts[i + 1]]
+            is_branching.append(
+                states[i] != NodeState.DISABLED.value
+                and (i in entries or len(entries) != 2)
+            )
+        origins = [i for i in range(self._next_vertex_index) if is_branching[i]]
+        encountered_components = set(
+            self._vertex_component[origins].tolist() if origins else []
+        )
+        for i in range(num_components):
+            if i in encountered_components:
+                continue
+            member_index, data = members[i][0]
+
+            # Do not consider disabled components
+            if states[i] == NodeState.DISABLED.value:
                 continue
 
-            # Mark component as being explored
-            curr_component = self._vertex_component[i]
-            component_explored[curr_component] = True
-
-            # Basis of percolation vectors
-            basis = []
-
-            # Do a BFS on the component. If we encounter two different distances for a node, we have a loop
-            start_tag = EdgeTag(0, 0, 0)
-            queue = [(i, start_tag)]
-            distance[i] = start_tag
-
-            while queue:
-                curr, curr_dist = queue.pop(0)
-
-                if visited[curr]:
-                    # Found two different crossing numbers to this node, Loop detected
-                    if distance[curr] != curr_dist:
-                        basis = make_basis(
-                            basis, curr_dist.calculate_connecting(
-                                distance[curr])
-                        )
-                        if len(basis) >= 3:
-                            queue.clear()
-                            break
-                    # Otherwise just skip this one
+            is_branching[member_index] = True
+            origins.append(member_index)
+
+        new_index = [-1] * self._next_vertex_index
+        for curr_index, origin in enumerate(origins):
+            new_index[origin] = curr_index
+
+        # Walk along the chains from every kept node
+        new_sources = []
+        new_targets = []
+        new_tags = []
+        queue = Frontier()
+        for origin in origins:
+            queue.push((origin, origin, -1, (0, 0, 0)))
+        while queue:
+            current, origin, previous, curr_distance = queue.pop()
+            for k in range(starts[current], starts[current + 1]):
+                neighbor = neighbors[k]
+
+                # do not allow for loopbacks
+                if neighbor == previous:
+                    continue
+
+                neighbor_dist = tuple(
+                    distance + crossing
+                    for distance, crossing in zip(curr_distance, tags[k])
+                )
+                if is_branching[neighbor]:
+                    new_sources.append(new_index[origin])
+                    new_targets.append(new_index[neighbor])
+                    new_tags.append(neighbor_dist)
                 else:
-                    visited[curr] = True
-                    distance[curr] = curr_dist
-                    # print(curr_dist)
-
-                    for edge in self._adjacency[curr]:
-                        next_node = edge.neighbor
-                        # Calculate next distance
-                        next_dist = curr_dist.append(edge.tag)
-
-                        if visited[next_node]:
-                            # Found a different length path => loop
-                            if distance[next_node] != next_dist:
-                                dist = next_dist.calculate_connecting(
-                                    distance[next_node])
-                                basis = make_basis(
-                                    basis,
-                                    dist
-                                )
-                                if len(basis) >= 3:
-                                    queue.clear()
-                                    break
-                            else:
-                                # Don't bother finding another path of the same length
-                                continue
-                        else:
-                            queue.append((next_node, next_dist))
-            component_percolation_dimension[curr_component] = len(basis)
+                    queue.push((neighbor, origin, current, neighbor_dist))
+
+        new_graph = CompactMetaGraph()
+        new_graph.reserve(len(origins))
+        new_graph.add_edges(
+            np.array(new_sources, dtype=np.int64),
+            np.array(new_targets, dtype=np.int64),
+            np.array(new_tags, dtype=np.int64),
+        )
+        return new_graph
+
+    def find_components(self):
+        """
+        This detects connected components within the graph by a union-find over the edge arrays (see
+        graph.union_find), leaving out disabled nodes. Components are numbered in order of their first node,
+        as in MetaGraph
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        enabled = (
+            self._vertex_states[: self._next_vertex_index] != NodeState.DISABLED.value
+        )
+        sources = self._sources[: self._num_edges]
+        targets = self._targets[: self._num_edges]
+        live = enabled[sources] & enabled[targets]
+
+        components = UnionFind(self._next_vertex_index)
+        components.union_edges(sources[live], targets[live])
+        num_components, component = components.labels(enabled)
+        self._vertex_component[: self._next_vertex_index] = component
+        return num_components
+
+    def get_components(self):
+        """
+        Function to retrieve the number of components and the nodes constituting them; together with their metadata
+
+        Args:
+            self (CompactMetaGraph): The current graph
 
-        return num_components, component_percolation_dimension
+        """
+        num_components = self.find_components()
+        component_data = [[] for _ in range(num_components)]
+
+        components = self._vertex_component[: self._next_vertex_index].tolist()
+        for curr, component in enumerate(components):
+            # Check for presence in component
+            if component != -1:
+                component_data[component].append((curr, self._meta_data[curr]))
+
+        return num_components, component_data
+
+    def find_stable_loops(self):
+        """
+        Same result as MetaGraph.find_stable_loops: the number of components and an array with the dimension
+        of the percolation pattern of each (0: no percolation, 1: line, 2: sheet, 3: rigid grid), from a
+        periodic union-find over the edge arrays (see graph.union_find)
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        enabled = (
+            self._vertex_states[: self._next_vertex_index] != NodeState.DISABLED.value
+        )
+        sources = self._sources[: self._num_edges]
+        targets = self._targets[: self._num_edges]
+        live = enabled[sources] & enabled[targets]
+
+        components = PeriodicUnionFind(self._next_vertex_index)
+        components.union_edges(
+            sources[live], targets[live], self._tags[: self._num_edges][live]
+        )
+        num_components, component = components.labels(enabled)
+        self._vertex_component[: self._next_vertex_index] = component
+
+        component_percolation_dimension = np.zeros(num_components, dtype=int)
+        component_percolation_dimension[
+            component[enabled]
+        ] = components.set_dimensions()[enabled]
+
+        return num_components, component_percolation_dimension.tolist()
+
+    def get_component_graph(self):
+        """
+        Unify all nodes within the same copy of the periodicity cell, as MetaGraph.get_component_graph does
+
+        Args:
+            self (CompactMetaGraph): The current graph
+
+        """
+        indptr, neighbors, tags = self.adjacency()
+        enabled = (
+            self._vertex_states[: self._next_vertex_index] != NodeState.DISABLED.value
+        )
+        tails = np.repeat(np.arange(self._next_vertex_index), np.diff(indptr))
+        live = enabled[tails] & enabled[neighbors]
+        no_skip = live & ~np.any(tags, axis=1)
+
+        # Components of the edges within the periodicity cell
+        components = UnionFind(self._next_vertex_index)
+        components.union_edges(tails[no_skip], neighbors[no_skip])
+        curr_comp, periodic_comp = components.labels(enabled)
+
+        new_graph = CompactMetaGraph()
+        new_graph.reserve(curr_comp)
+        skip = live & ~no_skip
+        new_graph._append_edges(
+            periodic_comp[tails[skip]], periodic_comp[neighbors[skip]], tags[skip]
+        )
+        return new_graph
 
     def copy(self):
         """
         Create a copy of this graph with no shared data
 
         Args:
-            self (MetaGraph): The current graph
+            self (CompactMetaGraph): The current graph
 
         """
-        new_graph = MetaGraph()
-        new_graph._adjacency = deepcopy(self._adjacency)
-        new_graph._vertex_states = deepcopy(self._vertex_states)
-        new_graph._vertex_component = deepcopy(self._vertex_component)
+        new_graph = CompactMetaGraph()
+        new_graph._sources = self._sources.copy()
+        new_graph._targets = self._targets.copy()
+        new_graph._tags = self._tags.copy()
+        new_graph._num_edges = self._num_edges
+        new_graph._vertex_states = self._vertex_states.copy()
+        new_graph._vertex_component = self._vertex_component.copy()
         new_graph._meta_data = deepcopy(self._meta_data)
         new_graph._next_vertex_index = self._next_vertex_index
-        new_graph._next_edge_index = self._next_edge_index
         return new_graph
@@ -0,0 +1,30 @@
+"""
+Periodicity crossings of the bonds of a trajectory frame.
+
+Atom coordinates in the dump files are scaled to the simulation box, between
+0 and 1 in every dimension. A bond whose two atoms are more than half a box
+apart in some dimension cannot be that long: it crosses the periodic boundary
+of that dimension instead. Its crossing tag holds, for each dimension, the
+direction of that crossing (-1, 0 or 1), as the EdgeTag of the MetaGraph edge
+from the first atom of the bond to the second one.
+"""
+
+import numpy as np
+
+
+def crossing_tags(from_indices, to_indices, positions, threshold=0.5):
+    """
+    Compute the crossing tags of whole arrays of bonds at once: +1 in the
+    dimensions in which the scaled coordinate of the target atom exceeds that
+    of the base atom by more than threshold, -1 where it falls short of it by
+    more than threshold, 0 elsewhere. Returns an (E, 3) int8 array
+
+    Args:
+        from_indices (np.ndarray): Row of positions of the base atom of each bond
+        to_indices (np.ndarray): Row of positions of the target atom of each bond
+        positions (np.ndarray): Scaled coordinates, one row (x, y, z) per atom
+        threshold (float): Smallest difference of scaled coordinates across a boundary
+
+    """
+    dist = positions[to_indices] - positions[from_indices]
+    return (dist > threshold).astype(np.int8) - (dist < -threshold)
@@ -0,0 +1,137 @@
+"""
+Frontier structures shared by the graph traversals.
+
+Popping the head of a Python list (list.pop(0)) shifts every remaining
+element, which makes a breadth-first traversal O(V^2) once the frontier
+grows with the graph. Two O(1)-per-node alternatives are provided:
+
+    Frontier: FIFO queue backed by collections.deque. Drop-in replacement
+        for the list-based queues, visiting nodes in the same order.
+
+    LevelFrontier: level-synchronous frontier backed by NumPy arrays. All
+        the nodes of one BFS level are stored in an array and expanded at
+        once over a compressed sparse row (CSR) adjacency, given as the two
+        arrays indptr and indices (the neighbors of node v are
+        indices[indptr[v]:indptr[v + 1]]).
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class Frontier:
+    """FIFO queue of nodes (or of any per-node payload) to be explored.
+
+    Args:
+        items (iterable): Initial content of the queue, in visiting order
+
+    """
+
+    def __init__(self, items=()):
+        self._queue = deque(items)
+
+    def push(self, item):
+        """
+        Append an item at the back of the queue
+
+        Args:
+            self (Frontier): This frontier
+            item (undefined): The node or payload to be explored later
+
+        """
+        self._queue.append(item)
+
+    def pop(self):
+        """
+        Remove and return the item at the front of the queue
+
+        Args:
+            self (Frontier): This frontier
+
+        """
+        return self._queue.popleft()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __bool__(self):
+        return bool(self._queue)
+
+
+class LevelFrontier:
+    """Level-synchronous frontier over a CSR adjacency.
+
+    Attributes:
+        nodes (np.ndarray): The nodes of the current level
+        level (int): Distance of the current level from the seeds
+
+    Args:
+        indptr (np.ndarray): CSR row pointers, of length num_nodes + 1
+        indices (np.ndarray): CSR column indices (neighbors)
+        seeds (iterable): The nodes of level 0
+
+    """
+
+    def __init__(self, indptr, indices, seeds):
+        self._indptr = indptr
+        self._indices = indices
+        self.nodes = np.unique(np.asarray(seeds, dtype=indices.dtype))
+        self.level = 0
+
+    def expand(self):
+        """
+        Return all the edges leaving the current level as two arrays,
+        (tails, heads), with one entry per edge
+
+        Args:
+            self (LevelFrontier): This frontier
+
+        """
+        starts = self._indptr[self.nodes]
+        counts = self._indptr[self.nodes + 1] - starts
+        offsets = np.cumsum(counts) - counts
+        edges = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+        return np.repeat(self.nodes, counts), self._indices[edges]
+
+    def advance(self, next_nodes):
+        """
+        Replace the current level by next_nodes (duplicates are dropped).
+        Returns False once the new level is empty
+
+        Args:
+            self (LevelFrontier): This frontier
+            next_nodes (np.ndarray): The nodes of the next level
+
+        """
+        self.nodes = np.unique(next_nodes)
+        self.level += 1
+        return self.nodes.size > 0
+
+    def __bool__(self):
+        return self.nodes.size > 0
+
+
+def bfs_levels(indptr, indices, seeds, visited):
+    """
+    Level-synchronous BFS from seeds. Yields the array of nodes of each level,
+    starting from the seeds. visited (boolean array, one entry per node) is
+    updated in place; nodes already marked as visited are never entered, which
+    can be used to mask out parts of the graph.
+
+    Args:
+        indptr (np.ndarray): CSR row pointers
+        indices (np.ndarray): CSR column indices
+        seeds (iterable): The starting nodes
+        visited (np.ndarray): Boolean visitation marks
+
+    """
+    frontier = LevelFrontier(indptr, indices, seeds)
+    frontier.nodes = frontier.nodes[~visited[frontier.nodes]]
+    visited[frontier.nodes] = True
+    while frontier:
+        yield frontier.nodes
+        _, heads = frontier.expand()
+        heads = heads[~visited[heads]]
+        visited[heads] = True
+        frontier.advance(heads)
@@ -0,0 +1,344 @@
+"""
+Array-based union-find (disjoint sets) for component detection.
+
+The sets of nodes 0 .. num_nodes - 1 are stored as two NumPy arrays: the
+parent of every node (a root is its own parent) and the size of the set of
+every root. Whole arrays of edges are merged at once, in rounds: in every
+round, each root that shares an edge with another set is hooked under the
+largest of these sets (union by size, ties broken by the larger root index,
+so that no cycle can form), and then every node is pointed directly to its
+root by pointer jumping (path compression). The number of edges left
+between different sets shrinks geometrically from one round to the next
+(threefold on a long chain of nodes in random order), so that a few rounds
+of array operations replace a traversal of the graph, without recursion
+and without a Python loop over the nodes or edges.
+
+PeriodicUnionFind merges the edges of a periodic graph, tagged with their
+crossings of the periodicity (see graph.periodicity), the same way. Every node
+also stores its offset: the image of the periodicity cell it lies in, relative
+to the root of its set. An edge between two nodes of the same set closes a
+loop, whose crossing vector follows from their offsets at once, and the loop
+vectors of every set are kept reduced to a basis, whose size is the dimension
+in which the set percolates.
+"""
+
+import numpy as np
+
+
+class UnionFind:
+    """Disjoint sets of the nodes 0 .. num_nodes - 1.
+
+    Args:
+        num_nodes (int): Number of nodes, each in a set of its own to begin with
+
+    """
+
+    def __init__(self, num_nodes):
+        self._parent = np.arange(num_nodes, dtype=np.int64)
+        self._size = np.ones(num_nodes, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._parent)
+
+    def _compress(self):
+        """
+        Point every node directly to the root of its set
+
+        Args:
+            self (UnionFind): This union-find
+
+        """
+        parent = self._parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        self._parent = parent
+
+    def find(self, nodes):
+        """
+        Return the root of the set of each node
+
+        Args:
+            self (UnionFind): This union-find
+            nodes (np.ndarray): The nodes to look up
+
+        """
+        self._compress()
+        return self._parent[nodes]
+
+    def union_edges(self, from_indices, to_indices):
+        """
+        Merge the sets of the two ends of each edge
+
+        Args:
+            self (UnionFind): This union-find
+            from_indices (np.ndarray): Index of the base node of each edge
+            to_indices (np.ndarray): Index of the target node of each edge
+
+        """
+        num_nodes = len(self._parent)
+        self._compress()
+        roots_a = self._parent[np.asarray(from_indices, dtype=np.int64)]
+        roots_b = self._parent[np.asarray(to_indices, dtype=np.int64)]
+
+        while True:
+            crossing = roots_a != roots_b
+            if not np.any(crossing):
+                break
+            roots_a = roots_a[crossing]
+            roots_b = roots_b[crossing]
+
+            # Orient each edge from the smaller set to the larger one
+            rank_a = self._size[roots_a] * num_nodes + roots_a
+            rank_b = self._size[roots_b] * num_nodes + roots_b
+            smaller = np.where(rank_a < rank_b, roots_a, roots_b)
+            larger_rank = np.maximum(rank_a, rank_b)
+
+            # Hook every smaller root under the largest of its neighboring sets
+            hook_rank = np.full(num_nodes, -1, dtype=np.int64)
+            np.maximum.at(hook_rank, smaller, larger_rank)
+            hooked = np.flatnonzero(hook_rank >= 0)
+            self._parent[hooked] = hook_rank[hooked] % num_nodes
+
+            self._compress()
+            np.add.at(self._size, self._parent[hooked], self._size[hooked])
+
+            roots_a = self._parent[roots_a]
+            roots_b = self._parent[roots_b]
+
+    def labels(self, counted=None):
+        """
+        Number the sets in order of their smallest node, as a flood fill visiting the nodes in order of
+        their indices would. Returns the number of sets and the set number of each node.
+        With counted, only the sets containing a counted node are numbered, in order of their smallest
+        counted node, and the nodes of the other sets get -1
+
+        Args:
+            self (UnionFind): This union-find
+            counted (np.ndarray): Boolean mask of the nodes whose sets are numbered (default: all nodes)
+
+        """
+        num_nodes = len(self._parent)
+        self._compress()
+        roots = self._parent
+        if counted is None:
+            counted = np.ones(num_nodes, dtype=bool)
+
+        # Smallest counted node of the set of each root (num_nodes if none)
+        first_node = np.full(num_nodes, num_nodes, dtype=np.int64)
+        counted_nodes = np.flatnonzero(counted)
+        np.minimum.at(first_node, roots[counted_nodes], counted_nodes)
+
+        numbered = first_node[roots] < num_nodes
+        _, labels = np.unique(first_node[roots[numbered]], return_inverse=True)
+        component = np.full(num_nodes, -1, dtype=np.int64)
+        component[numbered] = labels.ravel()
+        return int(labels.max()) + 1 if len(labels) else 0, component
+
+    def set_sizes(self):
+        """
+        Return the size of the set of each node
+
+        Args:
+            self (UnionFind): This union-find
+
+        """
+        self._compress()
+        return self._size[self._parent]
+
+
+class PeriodicUnionFind(UnionFind):
+    """Disjoint sets of the nodes 0 .. num_nodes - 1 of a periodic graph, with the offset of every node
+    relative to the root of its set and a basis of the loop vectors of every set.
+
+    Args:
+        num_nodes (int): Number of nodes, each in a set of its own to begin with
+
+    """
+
+    def __init__(self, num_nodes):
+        super().__init__(num_nodes)
+        self._offset = np.zeros((num_nodes, 3), dtype=np.int64)
+        # Basis of the loop vectors of each set, one row per vector, with a node of the set
+        self._loop_nodes = np.zeros(0, dtype=np.int64)
+        self._loops = np.zeros((0, 3), dtype=np.int64)
+
+    def _compress(self):
+        """
+        Point every node directly to the root of its set, adding up the offsets along the way
+
+        Args:
+            self (PeriodicUnionFind): This union-find
+
+        """
+        parent = self._parent
+        offset = self._offset
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            offset = offset + offset[parent]
+            parent = grandparent
+        self._parent = parent
+        self._offset = offset
+
+    def offsets(self, nodes):
+        """
+        Return the offset of each node relative to the root of its set, one row (dx, dy, dz) per node
+
+        Args:
+            self (PeriodicUnionFind): This union-find
+            nodes (np.ndarray): The nodes to look up
+
+        """
+        self._compress()
+        return self._offset[nodes]
+
+    def union_edges(self, from_indices, to_indices, tags):
+        """
+        Merge the sets of the two ends of each edge, as UnionFind.union_edges does, and add the loops
+        closed by edges within a set to the basis of that set. May be called repeatedly, on successive
+        parts of the edges
+
+        Args:
+            self (PeriodicUnionFind): This union-find
+            from_indices (np.ndarray): Index of the base node of each edge
+            to_indices (np.ndarray): Index of the target node of each edge
+            tags (np.ndarray): The tag of the base to target orientation of each edge, one row (dx, dy, dz) per edge
+
+        """
+        num_nodes = len(self._parent)
+        self._compress()
+        nodes_a = np.asarray(from_indices, dtype=np.int64).ravel()
+        nodes_b = np.asarray(to_indices, dtype=np.int64).ravel()
+        tags = np.asarray(tags, dtype=np.int64).reshape(-1, 3)
+        loop_nodes = [self._loop_nodes]
+        loops = [self._loops]
+
+        while True:
+            roots_a = self._parent[nodes_a]
+            roots_b = self._parent[nodes_b]
+
+            # An edge within a set closes a loop: the offset of the image of b reached over the edge,
+            # relative to the image of b in the set of a, unless it is zero
+            within = np.flatnonzero(roots_a == roots_b)
+            shift = self._shifts(nodes_a[within], nodes_b[within], tags[within])
+            closing = np.any(shift != 0, axis=1)
+            loop_nodes.append(roots_a[within[closing]])
+            loops.append(shift[closing])
+
+            crossing = roots_a != roots_b
+            if not np.any(crossing):
+                break
+            nodes_a, nodes_b = nodes_a[crossing], nodes_b[crossing]
+            roots_a, roots_b = roots_a[crossing], roots_b[crossing]
+            tags = tags[crossing]
+
+            # Orient each edge from the smaller set to the larger one
+            rank_a = self._size[roots_a] * num_nodes + roots_a
+            rank_b = self._size[roots_b] * num_nodes + roots_b
+            a_smaller = rank_a < rank_b
+            smaller = np.where(a_smaller, roots_a, roots_b)
+            larger_rank = np.maximum(rank_a, rank_b)
+
+            # Hook every smaller root under the largest of its neighboring sets, over one of the edges to it
+            hook_rank = np.full(num_nodes, -1, dtype=np.int64)
+            np.maximum.at(hook_rank, smaller, larger_rank)
+            hooking = np.flatnonzero(larger_rank == hook_rank[smaller])
+            hooked, first = np.unique(smaller[hooking], return_index=True)
+            hooking = hooking[first]
+            shift = self._shifts(nodes_a[hooking], nodes_b[hooking], tags[hooking])
+            self._parent[hooked] = hook_rank[hooked] % num_nodes
+            self._offset[hooked] = np.where(a_smaller[hooking, None], -shift, shift)
+
+            self._compress()
+            np.add.at(self._size, self._parent[hooked], self._size[hooked])
+
+        sets = self._parent[np.concatenate(loop_nodes)]
+        self._loop_nodes, self._loops = _loop_basis(sets, np.concatenate(loops))
+
+    def _shifts(self, nodes_a, nodes_b, tags):
+        """
+        Return the offset of the image of each node b reached over the edge from node a, relative to the
+        image of b at the offset of a
+
+        Args:
+            self (PeriodicUnionFind): This union-find
+            nodes_a (np.ndarray): Base node of each edge
+            nodes_b (np.ndarray): Target node of each edge
+            tags (np.ndarray): Tag of each edge, one row per edge
+
+        """
+        return self._offset[nodes_a] + tags - self._offset[nodes_b]
+
+    def set_dimensions(self):
+        """
+        Return the percolation dimension of the set of each node: the number of independent loop vectors
+        of the set (0: no percolation, 1: line, 2: sheet, 3: rigid grid)
+
+        Args:
+            self (PeriodicUnionFind): This union-find
+
+        """
+        self._compress()
+        dimension = np.bincount(
+            self._parent[self._loop_nodes], minlength=len(self._parent)
+        )
+        return dimension[self._parent]
+
+
+def _loop_basis(sets, loops):
+    """
+    Reduce the loop vectors of every set to a basis of them, in exact integer arithmetic: the first
+    vector, the first one not parallel to it and the first one outside of the plane of these two, each
+    divided by the greatest common divisor of its entries. Returns the sets and the vectors of the basis
+
+    Args:
+        sets (np.ndarray): Root of the set of each loop
+        loops (np.ndarray): Loop vectors, one row (dx, dy, dz) per loop
+
+    """
+    nonzero = np.any(loops != 0, axis=1)
+    order = np.argsort(sets[nonzero], kind="stable")
+    sets, loops = sets[nonzero][order], loops[nonzero][order]
+    loops = loops // np.gcd.reduce(loops, axis=1)[:, None]
+
+    starts = np.ones(len(sets), dtype=bool)
+    starts[1:] = sets[1:] != sets[:-1]
+    group = np.cumsum(starts) - 1
+    num_groups = np.count_nonzero(starts)
+    basis = starts.copy()
+
+    # The first vector not parallel to the first one of its set
+    normal = np.cross(loops[starts][group], loops)
+    second = _first_of_group(group, np.any(normal != 0, axis=1), num_groups)
+    basis[second[second >= 0]] = True
+
+    # The first vector outside of the plane of these two
+    plane_normal = np.zeros((num_groups, 3), dtype=np.int64)
+    plane_normal[second >= 0] = normal[second[second >= 0]]
+    outside = np.einsum("ij,ij->i", loops, plane_normal[group]) != 0
+    third = _first_of_group(group, outside, num_groups)
+    basis[third[third >= 0]] = True
+
+    return sets[basis], loops[basis]
+
+
+def _first_of_group(group, selected, num_groups):
+    """
+    Return the index of the first selected row of each group (-1 for groups with no selected row)
+
+    Args:
+        group (np.ndarray): Group of each row, in ascending order
+        selected (np.ndarray): Boolean mask of the selected rows
+        num_groups (int): Number of groups
+
+    """
+    first = np.full(num_groups, -1, dtype=np.int64)
+    rows = np.flatnonzero(selected)
+    starts = np.ones(len(rows), dtype=bool)
+    starts[1:] = group[rows[1:]] != group[rows[:-1]]
+    first[group[rows[starts]]] = rows[starts]
+    return first
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
 import argparse
-import resource
 
 if __name__ == "__main__":
     import sys
@@ -88,10 +87,6 @@ if __name__ == "__main__":
     dumpTrajectory = args.trajectory
     outputFile = args.output
 
-    # tena2 only
-    resource.setrlimit(resource.RLIMIT_STACK, (2 ** 29, -1))
-    sys.setrecursionlimit(10 ** 6)
-
     data = LammpsData(dataFile, ["atoms"])
 
     connectivity_reader = SingleRecordReader(data)
@@ -1,6 +1,7 @@
 import numpy as np
-import sys
-from graph.graph_structs import MetaGraph, EdgeTag, EdgeEntry
+from graph.graph_structs import CompactMetaGraph
+from graph.periodicity import crossing_tags
+from graph.union_find import UnionFind
 
 
 def splitRecordEntry(l):
@@ -36,9 +37,16 @@ class MolecularGraph:
 
     def buildMolecularGraph(self):
         # vertex = atom; neighbors of vertex = bonding neighbors of atom
-        for i in range(self.numBondEntries):
-            btype, id1, id2 = splitRecordEntry(self.bondRecord.entries[i])
+        bondEntries = [
+            splitRecordEntry(self.bondRecord.entries[i])
+            for i in range(self.numBondEntries)
+        ]
+        for btype, id1, id2 in bondEntries:
             self.createBond(btype, id1, id2)
+        # the same bonds as arrays of the atom ids at their two ends
+        bonds = np.array(bondEntries, dtype=int).reshape(-1, 3)
+        self.bondAtoms1 = bonds[:, 1]
+        self.bondAtoms2 = bonds[:, 2]
 
     def createBond(self, btype, id1, id2):
         self.bond_atom[id1].append(id2)
@@ -50,208 +58,158 @@ class MolecularGraph:
 
     # COMPUTE MOLECULAR MASSES:
     # graph theory approach: count number of connected components of the
-    # molecular graph using a depth first search (DFS), computing mass of
-    # each component
+    # molecular graph using a union-find over all bonds (see
+    # graph/union_find.py), computing mass of each component
     #
     # COMPUTE NUMBER OF INTRAMOLECULAR CROSSLINKS:
     # this is equal to the num of bonds connecting a C or N atom to a
-    # previously seen C or N atom
+    # previously seen C or N atom in a depth first search (DFS)
 
     def computeMolecularMasses_numOfIntramolCrosslinks_largestMolecule(self):
-        self.initDFSattributes()
-        for atomId in range(1, self.numAtoms + 1):
-            self.exploreMoleculeStartingFromUnseenAtom(atomId)
-        self.handleLastMolecule()
-
-    def initDFSattributes(self):
-        self.visitedAtoms = np.zeros(self.numAtoms, dtype=int)
-        self.numMolecules = 0
+        # molecules are numbered in order of their smallest atom id
+        molecules = UnionFind(self.numAtoms)
+        molecules.union_edges(self.bondAtoms1 - 1, self.bondAtoms2 - 1)
+        self.numMolecules, self.moleculeOfAtom = molecules.labels()
+        self.computeMolecularMasses()
+        self.computeNumOfIntramolCrosslinks()
+        self.findLargestMolecule()
+
+    def computeMolecularMasses(self):
+        atomTypes = np.asarray(self.atomTypes[: self.numAtoms], dtype=int)
+        atomicMasses = np.asarray(self.atomicMasses, dtype=float)[atomTypes - 1]
+        self.molecularMasses = np.bincount(
+            self.moleculeOfAtom, weights=atomicMasses, minlength=self.numMolecules
+        ).tolist()
+
+    def computeNumOfIntramolCrosslinks(self):
+        # DFS from every unseen atom in turn, visiting the neighbors in the
+        # order of bond_atom, with an explicit stack instead of recursion;
+        # every bond back to a seen atom, other than the parent, is counted
         self.numIntramolCrosslinks = 0
-        self.molecularMasses = []
-        self.currentMolecule = np.zeros(self.numAtoms, dtype=int)
-        self.largestMoleculeMass = 0.0
-
-    def exploreMoleculeStartingFromUnseenAtom(self, atomId):
-        if self.visitedAtoms[atomId - 1]:
-            return
-        # new molecule found
-        self.molecularMasses.append(0.0)
-        self.numMolecules += 1
-        self.updateLargestMolecule()
-        self.currentMoleculeAtomIndex = 0
-        self.depthFirstSearch(atomId, atomId)  # entry atom in a new molecule is
-        # parent of itself
-
-    def updateLargestMolecule(self):
-        if self.numMolecules > 1:
-            currentMoleculeMass = self.molecularMasses[self.numMolecules - 2]
-            if currentMoleculeMass > self.largestMoleculeMass:
-                self.updateLargestMoleculeAtoms()
-
-    def updateLargestMoleculeAtoms(self):
-        self.largestMolecule = self.currentMolecule
-        self.largestMoleculeMass = self.molecularMasses[self.numMolecules - 2]
-        self.currentMolecule = np.zeros(self.numAtoms, dtype=int)
-
-    def handleLastMolecule(self):
-        self.numMolecules += 1
-        self.updateLargestMolecule()
-        self.numMolecules -= 1
-
-    def depthFirstSearch(self, startAtom, parentAtom):
-        self.visitedAtoms[startAtom - 1] = 1
-        self.addAtomToCurrentMolecule(startAtom)
-        self.addAtomicMassToMolecularMass(startAtom)
-        myNeighbors = self.bond_atom[startAtom]
-        for bondAtom in myNeighbors:
-            self.exploreUnseenNeighbor(bondAtom, startAtom, parentAtom)
-
-    def addAtomToCurrentMolecule(self, atomId):
-        self.currentMolecule[self.currentMoleculeAtomIndex] = atomId
-        self.currentMoleculeAtomIndex += 1
-
-    def addAtomicMassToMolecularMass(self, startAtom):
-        atomicMass = self.atomicMasses[self.atomTypes[startAtom - 1] - 1]
-        self.molecularMasses[self.numMolecules - 1] += atomicMass
-
-    def exploreUnseenNeighbor(self, bondAtom, startAtom, parentAtom):
-        if bondAtom == parentAtom:  # do not go back
-            return
-        if self.visitedAtoms[bondAtom - 1]:
-            if self.thisNeighborFormsAnIntramolCrosslink(bondAtom, startAtom):
-                self.numIntramolCrosslinks += 1
-            return
-        self.depthFirstSearch(bondAtom, startAtom)
+        visitedAtoms = np.zeros(self.numAtoms + 1, dtype=bool).tolist()
+        for entryAtom in range(1, self.numAtoms + 1):
+            if visitedAtoms[entryAtom]:
+                continue
+            # entry atom in a new molecule is parent of itself
+            visitedAtoms[entryAtom] = True
+            stack = [(entryAtom, entryAtom, iter(self.bond_atom[entryAtom]))]
+            while stack:
+                startAtom, parentAtom, myNeighbors = stack[-1]
+                for bondAtom in myNeighbors:
+                    if bondAtom == parentAtom:  # do not go back
+                        continue
+                    if visitedAtoms[bondAtom]:
+                        if self.thisNeighborFormsAnIntramolCrosslink(
+                            bondAtom, startAtom
+                        ):
+                            self.numIntramolCrosslinks += 1
+                        continue
+                    visitedAtoms[bondAtom] = True
+                    stack.append(
+                        (bondAtom, startAtom, iter(self.bond_atom[bondAtom]))
+                    )
+                    break
+                else:
+                    stack.pop()
 
     def thisNeighborFormsAnIntramolCrosslink(self, bondAtom, startAtom):
         # either bond atom or start atom is a nitrogen atom
         return self.atomTypes[bondAtom - 1] == 8 or self.atomTypes[startAtom - 1] == 8
 
+    def findLargestMolecule(self):
+        # first molecule of greatest mass: its atom ids, in ascending order,
+        # padded with zeros to numAtoms entries
+        largest = int(np.argmax(self.molecularMasses))
+        self.largestMoleculeMass = self.molecularMasses[largest]
+        atomIds = np.flatnonzero(self.moleculeOfAtom == largest) + 1
+        self.largestMolecule = np.zeros(self.numAtoms, dtype=int)
+        self.largestMolecule[: len(atomIds)] = atomIds
+
     # PERCOLATING MOLECULE
     # find out whether a molecule closes a loop with itself, crossing the pbcs
     # in all dimensions - this algorithm suggested by Kevin Hoellring.
     # A pbc component containing atom i is composed of all those atoms that can
     # be reached from i via bonds that do not cross any pb.
 
-    def getAtomX(self, atomId):
-        return self.trajSnapshot.x[atomId]
-
     def isAnyMoleculePercolating(self):
         self.findAllPbcComponents()
         self.buildGraphAmongPbcComponents()
         self.findPercolatingMolecules()
 
     def findAllPbcComponents(self):
+        # pbc components are numbered in order of their smallest atom id
         self.initAttributesPbcComponents()
-        for startAtom in range(1, self.numAtoms + 1):
-            self.findPbcComponentContainingStartAtom(startAtom)
+        notAcrossPbcs = ~np.any(self.bondBoundaries, axis=1)
+        pbcComponents = UnionFind(self.numAtoms)
+        pbcComponents.union_edges(
+            self.bondAtoms1[notAcrossPbcs] - 1, self.bondAtoms2[notAcrossPbcs] - 1
+        )
+        self.numOfPbcComponents, self.pbcComponentOfAtom = pbcComponents.labels()
+        self.findAtomsInPbcComponents()
 
     def initAttributesPbcComponents(self):
         self.pbcDistanceThreshold = 0.9 # remember: dump file coords
                                         # are between 0 and 1
-        self.visitedAtoms = np.zeros(self.numAtoms, dtype=int)
-        self.numOfPbcComponents = 0
-        self.atomsInPbcComponent = {}
-        self.pbcComponentOfAtom = np.zeros(self.numAtoms, dtype=int)
-
-    def findPbcComponentContainingStartAtom(self, startAtom):
-        if not self.visitedAtoms[startAtom - 1]:
-            self.addNewPbcComponent()
-            self.depthFirstSearchPbcComponents(startAtom, startAtom)
-
-    def addNewPbcComponent(self):
-        self.numOfPbcComponents += 1
-        self.atomsInPbcComponent[self.numOfPbcComponents - 1] = []
-
-    def depthFirstSearchPbcComponents(self, startAtom, parentAtom):
-        self.visitedAtoms[startAtom - 1] = 1
-        self.atomsInPbcComponent[self.numOfPbcComponents - 1].append(startAtom)
-        self.pbcComponentOfAtom[startAtom - 1] = self.numOfPbcComponents - 1
-        myNeighbors = self.getNeighbors(startAtom)
-        for bondAtom in myNeighbors:
-            self.exploreNeighbor(bondAtom, startAtom)
-
-    def getNeighbors(self, atomId):
-        return self.bond_atom[atomId]
-
-    def exploreNeighbor(self, bondAtom, startAtom):
-        if not self.visitedAtoms[bondAtom - 1]:
-            if self.neighborNotAcrossPbcs(bondAtom, startAtom):
-                self.depthFirstSearchPbcComponents(bondAtom, startAtom)
-
-    def neighborNotAcrossPbcs(self, bondAtom, startAtom):
-        startAtomX = self.getAtomX(startAtom)
-        bondAtomX = self.getAtomX(bondAtom)
-        for axis in range(3):
-            if abs(startAtomX[axis] - bondAtomX[axis]) > self.pbcDistanceThreshold:
-                return False
-        return True
+        self.bondBoundaries = self.findBoundaries(self.bondAtoms1, self.bondAtoms2)
+
+    def findBoundaries(self, atomIds, neighborIds):
+        # the boundary is -1 ("lo") if the bond crosses the lower boundary
+        # of the box on its way from the atom to its neighbor, 1 ("hi") if
+        # it crosses the upper one, 0 if no pbc crossing in this dimension
+        return -crossing_tags(
+            atomIds,
+            neighborIds,
+            self.trajSnapshot.positionArray(),
+            self.pbcDistanceThreshold,
+        )
+
+    def findAtomsInPbcComponents(self):
+        # atom ids of each pbc component, in ascending order
+        atomIds = np.argsort(self.pbcComponentOfAtom, kind="stable") + 1
+        numAtomsInPbcComponent = np.bincount(
+            self.pbcComponentOfAtom, minlength=self.numOfPbcComponents
+        )
+        self.atomsInPbcComponent = {
+            pbcComponentId: atoms.tolist()
+            for pbcComponentId, atoms in enumerate(
+                np.split(atomIds, np.cumsum(numAtomsInPbcComponent)[:-1])
+            )
+        }
 
     def buildGraphAmongPbcComponents(self):
-        self.graph = MetaGraph()
-        self.edgeList = []
-        for pbcComponentId in range(self.numOfPbcComponents):
-            self.pbcComponentId = pbcComponentId
-            self.connectPbcComponentToItsNeighbors()
-
-    def connectPbcComponentToItsNeighbors(self):
-        for atomId in self.atomsInPbcComponent[self.pbcComponentId]:
-            atomNeighbors = self.getNeighbors(atomId)
-            for atomNeighbor in atomNeighbors:
-                self.addEdgeToPbcComponentOfAtomNeighborIfNecessary(
-                    atomId, atomNeighbor
-                )
-
-    def addEdgeToPbcComponentOfAtomNeighborIfNecessary(self, atomId, atomNeighbor):
-        self.neighbors = {}
-        neighborPbcComponent = self.pbcComponentOfAtom[atomNeighbor - 1]
-        atomIdX = self.getAtomX(atomId)
-        neighborX = self.getAtomX(atomNeighbor)
-        for axis in range(3):
-            boundary = self.findBoundary(atomIdX[axis], neighborX[axis])
-            self.updateNeighbors(neighborPbcComponent, axis, boundary)
-        self.addEdges()
-
-    def updateNeighbors(self, neighborPbcComponent, axis, boundary):
-        if neighborPbcComponent not in self.neighbors:
-            self.neighbors[neighborPbcComponent] = []
-        self.neighbors[neighborPbcComponent].append(boundary)  # 1, -1 or 0
-
-    def findBoundary(self, atomIdX, neighborX):
-        if abs(atomIdX - neighborX) > self.pbcDistanceThreshold:
-            if atomIdX < neighborX:
-                return -1  # "lo"
-            return 1  # "hi"
-        return 0  # no pbc crossing in this dimension
-
-    def addEdges(self):
-        for neighborPbcComponent in self.neighbors:
-            neighborBoundaries = self.neighbors[neighborPbcComponent]
-            if neighborBoundaries != [0, 0, 0]:
-                self.addEdge(neighborPbcComponent, neighborBoundaries)
-
-    def addEdge(self, neighborPbcComponent, neighborBoundaries):
-        edge = (
-            self.pbcComponentId,
-            neighborPbcComponent,
-            neighborBoundaries[0],
-            neighborBoundaries[1],
-            neighborBoundaries[2],
+        self.graph = CompactMetaGraph()
+        self.edgeList = self.findEdgesAmongPbcComponents()
+        self.addEdgeListToGraph()
+
+    def findEdgesAmongPbcComponents(self):
+        # bonds across the pbcs, as edges (pbcComponentId,
+        # neighborPbcComponent, boundary in x, y and z) between the pbc
+        # components of their atoms
+        acrossPbcs = np.any(self.bondBoundaries, axis=1)
+        edges = np.column_stack(
+            [
+                self.pbcComponentOfAtom[self.bondAtoms1 - 1],
+                self.pbcComponentOfAtom[self.bondAtoms2 - 1],
+                self.bondBoundaries,
+            ]
         )
-        if edge not in self.edgeList:
-            self.graph.add_edge(edge[0], edge[1], self.createTag(neighborBoundaries))
-            self.edgeList.append(edge)
-            self.edgeList.append(self.reverseEdge(edge))
-
-    def createTag(self, neighborBoundaries):
-        tag = EdgeTag(0, 0, 0)
-        for axis, boundary in enumerate(neighborBoundaries):
-            if boundary != 0:
-                tag[axis] = boundary
-        return tag
-
-    def reverseEdge(self, edge):
-        return (edge[1], edge[0], -edge[2], -edge[3], -edge[4])
+        return edges[acrossPbcs]
+
+    def addEdgeListToGraph(self):
+        # several bonds may join the same two pbc components across the same
+        # boundaries, in either orientation: keep only the first occurrence
+        # of every edge, counting an edge and its reverse edge as the same,
+        # then add all of them at once
+        edges = self.edgeList
+        bothOrientations = np.concatenate([edges, self.reverseEdges(edges)])
+        _, rank = np.unique(bothOrientations, axis=0, return_inverse=True)
+        rank = rank.reshape(2, len(edges))
+        _, firstOccurrence = np.unique(rank.min(axis=0), return_index=True)
+        edges = edges[np.sort(firstOccurrence)]
+        self.graph.add_edges(edges[:, 0], edges[:, 1], edges[:, 2:])
+
+    def reverseEdges(self, edges):
+        return np.column_stack([edges[:, 1], edges[:, 0], -edges[:, 2:]])
 
     def findPercolatingMolecules(self):
         self.numPercolatingMolecules = 0
@@ -1,12 +1,31 @@
 #!/usr/bin/env python3
 
 import numpy as np
+from graph.periodicity import crossing_tags
 
 def splitRecordEntry(l):
     line = l.split(" ")
     return int(line[0]), line[2], line[3], line[4]
 
 
+def splitBondEntry(l):
+    line = l.split(" ")
+    return int(line[1]), int(line[2]), int(line[3])
+
+
+def frameBondArrays(aggrRecord):
+    # atom ids at the two ends of every bond of a frame (an aggregate of its
+    # bond and trajectory records), with the crossing tags of the bonds
+    # (see graph.periodicity.crossing_tags)
+    bondRecord, trajRecord = aggrRecord.record_data
+    bonds = np.array(
+        [splitBondEntry(entry) for entry in bondRecord.entries], dtype=int
+    ).reshape(-1, 3)
+    atomIds1, atomIds2 = bonds[:, 1], bonds[:, 2]
+    positions = TrajectorySnapshot(trajRecord).positionArray()
+    return atomIds1, atomIds2, crossing_tags(atomIds1, atomIds2, positions)
+
+
 # Position information of individual trajectory frame
 class TrajectorySnapshot:
     def __init__(self, trajRecord):
@@ -29,5 +48,13 @@ class TrajectorySnapshot:
             id, x, y, z = splitRecordEntry(entry)
             self.xAsString[id] = [x, y, z]
             self.x[id] = np.array([float(x), float(y), float(z)])
+
+    def positionArray(self):
+        # scaled coordinates of all atoms in one array, indexed by atom id
+        # (row 0 is unused), e.g. for graph.periodicity.crossing_tags
+        positions = np.zeros((max(self.x, default=0) + 1, 3))
+        for atomId, x in self.x.items():
+            positions[atomId] = x
+        return positions
             
         
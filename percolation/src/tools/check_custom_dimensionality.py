@@ -5,49 +5,7 @@ from os.path import dirname, abspath
 
 sys.path.append(abspath(dirname(__file__) + "/.."))
 import argparse
-from graph.graph_structs import MetaGraph, EdgeTag
-from mols.trajectorySnapshot import TrajectorySnapshot
-import numpy as np
-
-
-def splitBondEntry(l):
-    line = l.split(" ")
-    bondtype, partner_1, partner_2 = int(line[1]), int(line[2]), int(line[3])
-    return bondtype, partner_1, partner_2
-
-
-def get_graph_dim(aggr_record):
-    bondRecord, trajRecord = aggr_record.record_data
-    print("timestep:", trajRecord.timeStep)
-    traj = TrajectorySnapshot(trajRecord)
-
-    graph = MetaGraph()
-
-    xpos = traj.x
-
-    for bond_entry in bondRecord.entries:
-        bondtype, a1, a2 = splitBondEntry(bond_entry)
-
-        dist = xpos[a2] - xpos[a1]
-
-        raw_tag = []
-
-        for i in range(len(dist)):
-            if dist[i] < -0.5:
-                raw_tag.append(-1)
-            elif dist[i] > 0.5:
-                raw_tag.append(1)
-            else:
-                raw_tag.append(0)
-
-        tag = EdgeTag(*raw_tag)
-
-        graph.add_edge(a1, a2, tag)
-
-    num_comps, dims = graph.find_stable_loops()
-
-    max_dim = np.max(np.array(dims))
-    return max_dim
+from determine_frame_dimension import get_graph_dim
 
 
 if __name__ == "__main__":
@@ -9,7 +9,6 @@ from mols.trajectorySnapshot import TrajectorySnapshot
 
 
 import argparse
-import resource
 
 
 def splitBondEntry(l):
@@ -49,10 +48,6 @@ if __name__ == "__main__":
     dumpConnectivity1 = args.connectivity1
     dumpConnectivity2 = args.connectivity2
 
-    # tena2 only
-    resource.setrlimit(resource.RLIMIT_STACK, (2 ** 29, -1))
-    sys.setrecursionlimit(10 ** 6)
-
     connectivity_reader = SingleRecordReader(None)
 
     first_bonds = []
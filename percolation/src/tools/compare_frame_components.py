@@ -4,46 +4,19 @@ import sys
 from os.path import dirname, abspath
 
 sys.path.append(abspath(dirname(__file__) + "/.."))
-from graph.graph_structs import MetaGraph, EdgeTag
-from mols.trajectorySnapshot import TrajectorySnapshot
+from graph.graph_structs import CompactMetaGraph
+from mols.trajectorySnapshot import frameBondArrays
 import numpy as np
 import argparse
-import resource
-
-
-def splitBondEntry(l):
-    line = l.split(" ")
-    bondtype, partner_1, partner_2 = int(line[1]), int(line[2]), int(line[3])
-    return bondtype, partner_1, partner_2
 
 
 def build_graph(aggr_record):
-    bondRecord, trajRecord = aggr_record.record_data
-    print("timestep:", trajRecord.timeStep)
-    traj = TrajectorySnapshot(trajRecord)
-
-    graph = MetaGraph()
-
-    xpos = traj.x
-
-    for bond_entry in bondRecord.entries:
-        bondtype, a1, a2 = splitBondEntry(bond_entry)
+    print("timestep:", aggr_record.record_data[1].timeStep)
 
-        dist = xpos[a2] - xpos[a1]
+    graph = CompactMetaGraph()
 
-        raw_tag = []
-
-        for i in range(len(dist)):
-            if dist[i] < -0.5:
-                raw_tag.append(-1)
-            elif dist[i] > 0.5:
-                raw_tag.append(1)
-            else:
-                raw_tag.append(0)
-
-        tag = EdgeTag(*raw_tag)
-
-        graph.add_edge(a1, a2, tag)
+    a1, a2, tags = frameBondArrays(aggr_record)
+    graph.add_edges(a1, a2, tags)
 
     return graph
 
@@ -97,10 +70,6 @@ if __name__ == "__main__":
     dumpConnectivity2 = args.connectivity2
     dumpTrajectory2 = args.trajectory2
 
-    # tena2 only
-    resource.setrlimit(resource.RLIMIT_STACK, (2 ** 29, -1))
-    sys.setrecursionlimit(10 ** 6)
-
     data = None
 
     connectivity_reader = SingleRecordReader(data)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the crossing tags of one trajectory frame on synthetic frames
+with 10^4 to 10^6 atoms (1.5 bonds per atom, bonds of up to 0.01 box lengths,
+so that the bonds near the box boundaries cross the periodicity).
+
+The per-bond Python loop that the frame tools used before
+graph.periodicity.crossing_tags is timed as well, up to --loop-max atoms,
+for comparison, and so is the construction of the whole meta graph of the
+frame from the tags, either way.
+"""
+
+import sys
+import time
+from os.path import dirname, abspath
+
+sys.path.append(abspath(dirname(__file__) + "/.."))
+import argparse
+import numpy as np
+
+
+def random_frame(num_atoms, rng):
+    # A chain wrapped around the box, with steps of up to 0.005 box lengths,
+    # bonded to its next atom and every other atom to the one after next
+    steps = rng.uniform(-0.005, 0.005, (num_atoms, 3))
+    positions = (rng.random(3) + np.cumsum(steps, axis=0)) % 1.0
+    chain = np.arange(num_atoms - 1)
+    skips = np.arange(0, num_atoms - 2, 2)
+    a1 = np.concatenate([chain, skips])
+    a2 = np.concatenate([chain + 1, skips + 2])
+    return positions, a1, a2
+
+
+def loop_tags(positions, a1, a2):
+    # The per-bond loop of the frame tools before graph.periodicity, for reference
+    tags = []
+    for b1, b2 in zip(a1.tolist(), a2.tolist()):
+        dist = positions[b2] - positions[b1]
+
+        raw_tag = []
+
+        for i in range(len(dist)):
+            if dist[i] < -0.5:
+                raw_tag.append(-1)
+            elif dist[i] > 0.5:
+                raw_tag.append(1)
+            else:
+                raw_tag.append(0)
+
+        tags.append(EdgeTag(*raw_tag))
+    return tags
+
+
+def loop_graph(positions, a1, a2):
+    graph = MetaGraph()
+    for b1, b2, tag in zip(a1.tolist(), a2.tolist(), loop_tags(positions, a1, a2)):
+        graph.add_edge(b1, b2, tag)
+    return graph
+
+
+def array_graph(positions, a1, a2):
+    graph = MetaGraph()
+    graph.add_edges(a1, a2, crossing_tags(a1, a2, positions))
+    return graph
+
+
+def timed(label, num_atoms, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    print(
+        "{0:>9} atoms  {1:<34} {2:9.3f} s  {3:7.3f} us/atom".format(
+            num_atoms, label, elapsed, 1e6 * elapsed / num_atoms
+        )
+    )
+    return result
+
+
+if __name__ == "__main__":
+    from graph.graph_structs import MetaGraph, EdgeTag
+    from graph.periodicity import crossing_tags
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the crossing tags of synthetic trajectory frames."
+    )
+    parser.add_argument(
+        "-n",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10 ** 4, 10 ** 5, 10 ** 6],
+        help="Numbers of atoms of the synthetic frames.",
+    )
+    parser.add_argument(
+        "--loop-max",
+        type=int,
+        default=10 ** 5,
+        help="Largest frame on which the per-bond loops are timed.",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(2022)
+
+    for num_atoms in args.sizes:
+        positions, a1, a2 = random_frame(num_atoms, rng)
+
+        tags = timed("crossing_tags", num_atoms, crossing_tags, a1, a2, positions)
+        print(
+            "{0:>9} atoms  {1} of {2} bonds cross the periodicity".format(
+                num_atoms, np.count_nonzero(np.any(tags, axis=1)), len(a1)
+            )
+        )
+        timed(
+            "frame graph (crossing_tags)",
+            num_atoms,
+            array_graph,
+            positions,
+            a1,
+            a2,
+        )
+        if num_atoms <= args.loop_max:
+            timed("per-bond tag loop (old)", num_atoms, loop_tags, positions, a1, a2)
+            timed(
+                "frame graph (per-bond loop, old)",
+                num_atoms,
+                loop_graph,
+                positions,
+                a1,
+                a2,
+            )
+        print()
@@ -4,50 +4,26 @@ import sys
 from os.path import dirname, abspath
 
 sys.path.append(abspath(dirname(__file__) + "/.."))
-from graph.graph_structs import MetaGraph, EdgeTag
-from mols.trajectorySnapshot import TrajectorySnapshot
+from graph.union_find import PeriodicUnionFind
+from mols.trajectorySnapshot import frameBondArrays
 import numpy as np
 
 
-def splitBondEntry(l):
-    line = l.split(" ")
-    bondtype, partner_1, partner_2 = int(line[1]), int(line[2]), int(line[3])
-    return bondtype, partner_1, partner_2
+def get_graph_dim(aggr_record):
+    print("timestep:", aggr_record.record_data[1].timeStep)
 
+    a1, a2, tags = frameBondArrays(aggr_record)
 
-def build_graph(aggr_record):
-    bondRecord, trajRecord = aggr_record.record_data
-    print("timestep:", trajRecord.timeStep)
-    traj = TrajectorySnapshot(trajRecord)
-    
-    graph = MetaGraph()
-    
-    xpos = traj.x
-    
-    for bond_entry in bondRecord.entries:
-        bondtype, a1, a2 = splitBondEntry(bond_entry)
-        
-        dist = xpos[a2]-xpos[a1]
-        
-        raw_tag = []
-        
-        for i in range(len(dist)):
-            if dist[i] < -0.5: 
-                raw_tag.append(-1)
-            elif dist[i] > 0.5:
-                raw_tag.append(1)
-            else:
-                raw_tag.append(0)
-        
-        tag = EdgeTag(*raw_tag)
-        
-        graph.add_edge(a1,a2, tag)    
-
-    return graph
+    # one node per atom id, as in a MetaGraph of the bonds
+    num_nodes = int(np.max(np.concatenate([a1, a2]), initial=0)) + 1
+    components = PeriodicUnionFind(num_nodes)
+    components.union_edges(a1, a2, tags)
+
+    max_dim = np.max(components.set_dimensions())
+    return max_dim
 
 
 import argparse
-import resource
 
 if __name__ == "__main__":
     from streaming.LammpsData import LammpsData
@@ -83,10 +59,6 @@ if __name__ == "__main__":
     dumpConnectivity = args.connectivity
     dumpTrajectory = args.trajectory
     
-    # tena2 only
-    resource.setrlimit(resource.RLIMIT_STACK, (2 ** 29, -1))
-    sys.setrecursionlimit(10 ** 6)
-    
     data = None
 
     connectivity_reader = SingleRecordReader(data)
@@ -99,10 +71,6 @@ if __name__ == "__main__":
         with open(dumpTrajectory, "r") as trajectory_file:
             aggr_record = aggregate_reader.readRecord([connectivity_file, trajectory_file])
             
-            graph = build_graph(aggr_record)
-            
-            num_comps, dims = graph.find_stable_loops()
-            
-            max_dim = np.max(np.array(dims))
+            max_dim = get_graph_dim(aggr_record)
 
             print("Frame has maximum grid dimension {0}".format(max_dim))
@@ -4,44 +4,19 @@ import sys
 from os.path import dirname, abspath
 
 sys.path.append(abspath(dirname(__file__) + "/.."))
-from graph.graph_structs import MetaGraph, EdgeTag
-from mols.trajectorySnapshot import TrajectorySnapshot
+from graph.graph_structs import CompactMetaGraph
+from mols.trajectorySnapshot import frameBondArrays
 import numpy as np
 import argparse
 
-def splitBondEntry(l):
-    line = l.split(" ")
-    bondtype, partner_1, partner_2 = int(line[1]), int(line[2]), int(line[3])
-    return bondtype, partner_1, partner_2
-
 
 def build_graph(aggr_record):
-    bondRecord, trajRecord = aggr_record.record_data
-    print("timestep:", trajRecord.timeStep)
-    traj = TrajectorySnapshot(trajRecord)
-
-    graph = MetaGraph()
-
-    xpos = traj.x
-
-    for bond_entry in bondRecord.entries:
-        bondtype, a1, a2 = splitBondEntry(bond_entry)
-
-        dist = xpos[a2] - xpos[a1]
-
-        raw_tag = []
-
-        for i in range(len(dist)):
-            if dist[i] < -0.5:
-                raw_tag.append(-1)
-            elif dist[i] > 0.5:
-                raw_tag.append(1)
-            else:
-                raw_tag.append(0)
+    print("timestep:", aggr_record.record_data[1].timeStep)
 
-        tag = EdgeTag(*raw_tag)
+    graph = CompactMetaGraph()
 
-        graph.add_edge(a1, a2, tag)
+    a1, a2, tags = frameBondArrays(aggr_record)
+    graph.add_edges(a1, a2, tags)
 
     return graph
 
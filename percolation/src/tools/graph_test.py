@@ -5,7 +5,7 @@ from os.path import dirname, abspath
 sys.path.append(abspath(dirname(__file__) + "/.."))
 
 if __name__ == "__main__":
-    from graph.graph_structs import MetaGraph, EdgeTag
+    from graph.graph_structs import MetaGraph, CompactMetaGraph, EdgeTag
 
     # We will first create a graph with structure but without periodicity information
     graph = MetaGraph()
@@ -129,4 +129,48 @@ if __name__ == "__main__":
 
     graph_comp = graph.get_component_graph()
 
-    graph_comp.dump("duplicates_removed_comp_graph.dot", True)
\ No newline at end of file
+    graph_comp.dump("duplicates_removed_comp_graph.dot", True)
+
+    print("Check the array-backed variant against MetaGraph...")
+
+    for graph_class in (MetaGraph, CompactMetaGraph):
+        graph = graph_class()
+        graph.add_edge(0, 2, ux_tag)
+        graph.add_edge(0, 1, ux_tag)
+        graph.add_edge(0, 3, nx_tag)
+        graph.add_edge(2, 3, dx_tag)
+        graph.add_edge(1, 4, nx_tag)
+        graph.add_edge(7, 8, dx_tag)
+        graph.add_edge(8, 9, ux_tag)
+        graph.add_edge(7, 9, dx_tag)
+        graph.add_edge(13, 14, dx_tag)
+        graph.add_edge(14, 15, nx_tag)
+        graph.add_edge(15, 13, ux_tag)
+        graph.add_edge(15, 13, ux_tag)
+        print(graph_class.__name__)
+        print("Find stable loop dimension: ", graph.find_stable_loops())
+        print(
+            "Component graph loop dimension: ",
+            graph.get_component_graph().find_stable_loops(),
+        )
+        graph.reduce()
+        print("Reduced: ", graph.get_components())
+        simplified = graph.get_simplified_graph()
+        print("Simplified: ", simplified.get_components())
+        print("Purged: ", graph.get_purged_graph().find_stable_loops())
+        simplified.dump(graph_class.__name__ + "_simplified.dot", True)
+
+    print("Check that a path is reduced completely...")
+
+    # Peeling the path 1-3-0-4-2 from its leaves 1 and 2 leaves 3 and 4 with a
+    # single neighbor, so that they are marked as leaves too. The neighbor to
+    # peel next is then 0, not the leaf still in their adjacency
+    for graph_class in (MetaGraph, CompactMetaGraph):
+        graph = graph_class()
+        graph.add_edge(1, 3, nx_tag)
+        graph.add_edge(3, 0, nx_tag)
+        graph.add_edge(0, 4, nx_tag)
+        graph.add_edge(4, 2, nx_tag)
+        graph.reduce()
+        print(graph_class.__name__, "reduced: ", graph.get_components())
+        assert graph.get_components() == (0, []), graph_class.__name__
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the breadth-first traversals on synthetic random graphs with
+10^4 to 10^6 nodes (average degree 3, no periodicity crossings).
+
+For linear scaling, the time per node must stay roughly constant as the
+graph grows. The list-based queue (list.pop(0)) used before graph.traversal
+is timed as well, up to --list-max nodes, for comparison, and so are the
+array-backed CompactMetaGraph, the union-find of graph.union_find and the
+construction of the graphs, edge by edge (add_edge) or from whole arrays
+(add_edges).
+"""
+
+import sys
+import time
+from os.path import dirname, abspath
+
+sys.path.append(abspath(dirname(__file__) + "/.."))
+import argparse
+import numpy as np
+
+
+def random_edges(num_nodes, rng):
+    num_edges = 3 * num_nodes // 2
+    src = rng.integers(0, num_nodes, num_edges)
+    dst = rng.integers(0, num_nodes, num_edges)
+    return src, dst
+
+
+def to_csr(num_nodes, src, dst):
+    tails = np.concatenate([src, dst])
+    heads = np.concatenate([dst, src])
+    order = np.argsort(tails, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=num_nodes), out=indptr[1:])
+    return indptr, heads[order]
+
+
+def list_queue_flood_fill(num_nodes, indptr, indices):
+    # The pre-graph.traversal queue, for reference
+    component = [-1] * num_nodes
+    neighbors = [indices[indptr[i]:indptr[i + 1]].tolist() for i in range(num_nodes)]
+    curr_comp = 0
+    for i in range(num_nodes):
+        if component[i] == -1:
+            queue = [i]
+            while queue:
+                curr = queue.pop(0)
+                if component[curr] == -1:
+                    component[curr] = curr_comp
+                    for neighbor in neighbors[curr]:
+                        if component[neighbor] == -1:
+                            queue.append(neighbor)
+            curr_comp += 1
+    return curr_comp
+
+
+def level_flood_fill(num_nodes, indptr, indices):
+    visited = np.zeros(num_nodes, dtype=bool)
+    curr_comp = 0
+    for i in range(num_nodes):
+        if not visited[i]:
+            for _ in bfs_levels(indptr, indices, [i], visited):
+                pass
+            curr_comp += 1
+    return curr_comp
+
+
+def union_find_labels(num_nodes, src, dst):
+    components = UnionFind(num_nodes)
+    components.union_edges(src, dst)
+    return components.labels()[0]
+
+
+def add_edges_one_by_one(graph, src, dst, tag):
+    for a, b in zip(src.tolist(), dst.tolist()):
+        graph.add_edge(a, b, tag)
+    return graph
+
+
+def add_edges_at_once(graph, src, dst, tags):
+    graph.add_edges(src, dst, tags)
+    return graph
+
+
+def timed(label, num_nodes, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    print(
+        "{0:>9} nodes  {1:<38} {2:9.3f} s  {3:7.3f} us/node".format(
+            num_nodes, label, elapsed, 1e6 * elapsed / num_nodes
+        )
+    )
+    return result
+
+
+if __name__ == "__main__":
+    from graph.graph_structs import MetaGraph, CompactMetaGraph, EdgeTag
+    from graph.traversal import bfs_levels
+    from graph.union_find import UnionFind
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scaling of graph traversals on synthetic graphs."
+    )
+    parser.add_argument(
+        "-n",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10 ** 4, 10 ** 5, 10 ** 6],
+        help="Numbers of nodes of the synthetic graphs.",
+    )
+    parser.add_argument(
+        "--list-max",
+        type=int,
+        default=10 ** 5,
+        help="Largest graph on which the list.pop(0) queue is timed.",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(2022)
+    bare_tag = EdgeTag(0, 0, 0)
+
+    for num_nodes in args.sizes:
+        src, dst = random_edges(num_nodes, rng)
+        indptr, indices = to_csr(num_nodes, src, dst)
+
+        zero_tags = np.zeros((len(src), 3), dtype=int)
+        if num_nodes <= args.list_max:
+            timed(
+                "MetaGraph.add_edge loop (old)",
+                num_nodes,
+                add_edges_one_by_one,
+                MetaGraph(),
+                src,
+                dst,
+                bare_tag,
+            )
+        graph = timed(
+            "MetaGraph.add_edges",
+            num_nodes,
+            add_edges_at_once,
+            MetaGraph(),
+            src,
+            dst,
+            zero_tags,
+        )
+        timed("MetaGraph.find_components", num_nodes, graph.find_components)
+        timed("MetaGraph.find_stable_loops", num_nodes, graph.find_stable_loops)
+        timed("MetaGraph.mark_states", num_nodes, graph.mark_states)
+        timed("MetaGraph.get_component_graph", num_nodes, graph.get_component_graph)
+
+        graph = timed(
+            "CompactMetaGraph.add_edges",
+            num_nodes,
+            add_edges_at_once,
+            CompactMetaGraph(),
+            src,
+            dst,
+            zero_tags,
+        )
+        timed("CompactMetaGraph.adjacency", num_nodes, graph.adjacency)
+        timed("CompactMetaGraph.find_components", num_nodes, graph.find_components)
+        timed(
+            "CompactMetaGraph.find_stable_loops", num_nodes, graph.find_stable_loops
+        )
+        timed("CompactMetaGraph.mark_states", num_nodes, graph.mark_states)
+        timed(
+            "CompactMetaGraph.get_component_graph",
+            num_nodes,
+            graph.get_component_graph,
+        )
+        timed(
+            "CSR level-synchronous flood fill",
+            num_nodes,
+            level_flood_fill,
+            num_nodes,
+            indptr,
+            indices,
+        )
+        timed(
+            "union-find labeling",
+            num_nodes,
+            union_find_labels,
+            num_nodes,
+            src,
+            dst,
+        )
+        if num_nodes <= args.list_max:
+            timed(
+                "list.pop(0) flood fill (old)",
+                num_nodes,
+                list_queue_flood_fill,
+                num_nodes,
+                indptr,
+                indices,
+            )
+        print()